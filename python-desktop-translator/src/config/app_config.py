@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Sequence
 
 
 class AppConfig:
@@ -18,8 +18,27 @@ class AppConfig:
         self.auto_start: bool = False
         # 目标语言（用于翻译功能），默认中文，可选：zh|en|vi
         self.target_language: str = "zh"
+        # 润色输出模式：full=完整重写；edits=仅返回编辑脚本，本地应用（长文本更快）
+        self.polish_mode: str = "full"
+        # 问答时从本地知识库索引注入的参考段落数量（0 表示不注入）
+        self.kb_top_k: int = 4
+        # 问答语义缓存：相似度阈值；命中后是否在后台重新生成答案以刷新缓存
+        self.qa_cache_threshold: float = 0.85
+        self.qa_cache_refresh: bool = False
+        # 空闲预热：悬停/空闲时提前构造最常用的气泡并建立连接；内存增长与 CPU 繁忙阈值
+        self.prewarm_enabled: bool = True
+        self.prewarm_max_bubbles: int = 2
+        self.prewarm_memory_mb: int = 80
+        self.prewarm_cpu_percent: int = 70
+        # 气泡隐藏超过该分钟数后保存状态并销毁以释放内存（0 表示不休眠）
+        self.bubble_hibernate_minutes: int = 10
+        # 划词翻译：全局热键复制当前选中文本并在光标旁弹出译文
+        self.translate_selection_hotkey: str = "ctrl+alt+d"
+        # 语音翻译实时听写的识别语言（SpeechRecognition 语言代码）
+        self.speech_recognition_language: str = "zh-CN"
 
         self._config_path: str = self._resolve_config_path()
+        self._saver: Optional[Callable[[], None]] = None
         # 初始化时尝试加载已有配置
         self.load_config()
 
@@ -33,6 +52,20 @@ class AppConfig:
         os.makedirs(base_dir, exist_ok=True)
         return os.path.join(base_dir, "config.json")
 
+    @property
+    def config_path(self) -> str:
+        return self._config_path
+
+    @property
+    def data_dir(self) -> str:
+        """配置文件所在目录，本地数据（会话历史等）与配置放在一起。"""
+        return os.path.dirname(self._config_path)
+
+    @property
+    def kb_index_dir(self) -> str:
+        """内部知识库离线索引目录（由 tools/build_kb_index.py 生成）。"""
+        return os.path.join(self.data_dir, "kb_index")
+
     # ---------------------- 配置加载/保存 ----------------------
     def load_config(self) -> None:
         if not os.path.isfile(self._config_path):
@@ -44,26 +77,77 @@ class AppConfig:
         except Exception as e:  # noqa: BLE001 简化错误处理
             print(f"[AppConfig] 读取配置失败: {e}")
 
-    def save_config(self) -> None:
-        data = {
+    def to_dict(self) -> Dict[str, Any]:
+        return {
             "ai_server": self.ai_server,
             "model": self.model,
             "api_key": self.api_key,
             "auto_start": self.auto_start,
             "target_language": self.target_language,
+            "polish_mode": self.polish_mode,
+            "kb_top_k": self.kb_top_k,
+            "qa_cache_threshold": self.qa_cache_threshold,
+            "qa_cache_refresh": self.qa_cache_refresh,
+            "prewarm_enabled": self.prewarm_enabled,
+            "prewarm_max_bubbles": self.prewarm_max_bubbles,
+            "prewarm_memory_mb": self.prewarm_memory_mb,
+            "prewarm_cpu_percent": self.prewarm_cpu_percent,
+            "bubble_hibernate_minutes": self.bubble_hibernate_minutes,
+            "translate_selection_hotkey": self.translate_selection_hotkey,
+            "speech_recognition_language": self.speech_recognition_language,
         }
+
+    def save_config(self) -> None:
+        """保存配置；由 ConfigStore 接管（set_saver）时合并为一次后台写入。"""
+        if self._saver is not None:
+            self._saver()
+            return
+        self.write_config(self.to_dict())
+
+    def set_saver(self, saver: Optional[Callable[[], None]]) -> None:
+        self._saver = saver
+
+    def write_config(self, data: Dict[str, Any]) -> Optional[str]:
+        """原子写入：先写同目录临时文件并 fsync，再 os.replace 覆盖，写到一半崩溃不会损坏原文件。
+
+        返回写入的文本；失败时返回 None。可在任意线程调用。
+        """
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        tmp_path = f"{self._config_path}.tmp"
         try:
-            with open(self._config_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._config_path)
+            return text
         except Exception as e:  # noqa: BLE001
             print(f"[AppConfig] 保存配置失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
 
     def update_from_dict(self, data: Dict[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise ValueError("配置文件内容应为 JSON 对象")
         self.ai_server = data.get("ai_server", self.ai_server)
         self.model = data.get("model", self.model)
         self.api_key = data.get("api_key", self.api_key)
         self.auto_start = data.get("auto_start", self.auto_start)
         self.target_language = data.get("target_language", self.target_language)
+        self.polish_mode = data.get("polish_mode", self.polish_mode)
+        self.kb_top_k = data.get("kb_top_k", self.kb_top_k)
+        self.qa_cache_threshold = data.get("qa_cache_threshold", self.qa_cache_threshold)
+        self.qa_cache_refresh = data.get("qa_cache_refresh", self.qa_cache_refresh)
+        self.prewarm_enabled = data.get("prewarm_enabled", self.prewarm_enabled)
+        self.prewarm_max_bubbles = data.get("prewarm_max_bubbles", self.prewarm_max_bubbles)
+        self.prewarm_memory_mb = data.get("prewarm_memory_mb", self.prewarm_memory_mb)
+        self.prewarm_cpu_percent = data.get("prewarm_cpu_percent", self.prewarm_cpu_percent)
+        self.bubble_hibernate_minutes = data.get("bubble_hibernate_minutes", self.bubble_hibernate_minutes)
+        self.translate_selection_hotkey = data.get("translate_selection_hotkey", self.translate_selection_hotkey)
+        self.speech_recognition_language = data.get("speech_recognition_language", self.speech_recognition_language)
 
     # ---------------------- 业务辅助方法 ----------------------
     def build_chat_payload(self, system_prompt: str, user_content: str) -> Dict[str, Any]:
@@ -76,8 +160,8 @@ class AppConfig:
             ],
         }
 
-    def build_translation_prompt(self, original_text: str) -> Dict[str, Any]:
-        """根据 target_language 生成翻译请求 payload.
+    def build_translation_prompt(self, original_text: str, target_language: Optional[str] = None) -> Dict[str, Any]:
+        """根据 target_language（默认取配置）生成翻译请求 payload.
 
         支持语言：
         zh (中文), en (英文), vi (越南语)
@@ -87,7 +171,7 @@ class AppConfig:
             "en": "英文",
             "vi": "越南语",
         }
-        target_label = language_map.get(self.target_language, "中文")
+        target_label = language_map.get(target_language or self.target_language, "中文")
         system_prompt = (
             "你是一个专业的翻译专家，擅长多种语言间的准确翻译。请遵循以下原则：\n\n"
             "1. 保持原文意思准确无误\n"
@@ -115,8 +199,28 @@ class AppConfig:
         user_content = f"待润色文本: {original_text}" if original_text else ""
         return self.build_chat_payload(system_prompt, user_content)
 
-    def build_qa_prompt(self, question: str) -> Dict[str, Any]:
-        """构造通用问答 prompt：要求准确、简洁，有条理。"""
+    def build_polish_edit_prompt(self, original_text: str) -> Dict[str, Any]:
+        """构造编辑脚本模式的润色 prompt：只输出需要替换的片段（JSON），不重写全文。"""
+        system_prompt = (
+            "你是一位专业的文本润色助手，目标：提升可读性、语法正确性、表达自然性，保持原意。\n"
+            "润色原则与常规润色相同，但不要输出完整文本，只输出一个 JSON 数组，"
+            "列出需要修改的片段：\n"
+            '[{"old": "原文中逐字出现的片段", "new": "替换后的片段"}]\n'
+            "要求：\n"
+            "1. old 必须与原文逐字一致，尽量短但足以唯一定位\n"
+            "2. 按片段在原文中出现的先后顺序排列，片段之间不得重叠\n"
+            "3. 原文无需修改时输出 []\n"
+            "4. 只输出 JSON，不要解释，不要使用代码块"
+        )
+        user_content = f"待润色文本: {original_text}" if original_text else ""
+        return self.build_chat_payload(system_prompt, user_content)
+
+    def build_qa_prompt(self, question: str, passages: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+        """构造通用问答 prompt：要求准确、简洁，有条理。
+
+        passages 为知识库检索结果（需有 title/text 属性），非空时作为参考资料注入，
+        总长度受限以控制 prompt 大小。
+        """
         system_prompt = (
             "你是一个专业的知识问答助手，回答需：准确、分点清晰、必要时给简短示例。\n"
             "原则：\n"
@@ -126,6 +230,19 @@ class AppConfig:
             "4. 用简洁的语言表达核心要点\n\n"
             "请回答用户问题。"
         )
+        if passages:
+            blocks = []
+            used = 0
+            for i, p in enumerate(passages, 1):
+                block = f"[{i}] {getattr(p, 'title', '')}\n{p.text}"
+                if blocks and used + len(block) > 2000:
+                    break
+                blocks.append(block)
+                used += len(block)
+            system_prompt += (
+                "\n\n以下是从公司内部知识库检索到的参考资料，回答时优先依据这些内容，"
+                "引用时标注编号；资料与问题无关时忽略：\n\n" + "\n\n".join(blocks)
+            )
         user_content = f"问题: {question}" if question else ""
         return self.build_chat_payload(system_prompt, user_content)
 
@@ -145,6 +262,7 @@ class AppConfig:
             f"model={self.model}, "
             f"api_key={masked_key}, "
             f"auto_start={self.auto_start}, "
-            f"target_language={self.target_language}"\
+            f"target_language={self.target_language}, "
+            f"polish_mode={self.polish_mode}"
             ")"
         )
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""配置持久化与热加载：合并短时间内的多次修改，在后台线程原子写入 config.json，并监视外部修改。
+
+    store = ConfigStore(config)          # 接管 config.save_config()
+    store.changed.connect(on_changed)    # {字段: (旧值, 新值)}
+    config.model = "qwen3"
+    config.save_config()                 # 立即返回；debounce_ms 内的修改合并为一次写入
+    store.flush()                        # 退出前同步写完
+
+外部编辑（如手动修改 AI 服务器或密钥）被检测到后直接应用到 AppConfig 并发出 changed，
+监听方据此热更新（如 AIClient.reconfigure），不必通过 restart_application 重启。
+自己写入的内容按文本比对识别，不会触发重新加载。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from config.app_config import AppConfig
+
+
+def diff_config(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    return {key: (old.get(key), value) for key, value in new.items() if old.get(key) != value}
+
+
+class ConfigStore(QObject):
+    """AppConfig 的后台保存与文件监视。须在主线程创建，changed 在主线程发出。"""
+
+    changed = pyqtSignal(dict)  # {字段: (旧值, 新值)}
+
+    def __init__(self, config: AppConfig, debounce_ms: int = 300, reload_delay_ms: int = 100,
+                 watch: bool = True, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.config = config
+        self.path = config.config_path
+        self._snapshot: Dict[str, Any] = config.to_dict()
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(debounce_ms)
+        self._save_timer.timeout.connect(self._submit)
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(reload_delay_ms)
+        self._reload_timer.timeout.connect(self.reload)
+
+        # 写线程只保留最新的一份待写快照，来不及写的旧快照直接被覆盖
+        self._cond = threading.Condition()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._writing = False
+        self._closed = False
+        self._written_text: Optional[str] = self._read_text()
+        self.writes = 0
+        self._writer = threading.Thread(target=self._write_loop, name="ConfigWriter", daemon=True)
+        self._writer.start()
+
+        self._watcher: Optional[QFileSystemWatcher] = None
+        if watch:
+            # 原子替换后原文件的监视会失效，同时监视所在目录以便重新加入
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.addPath(os.path.dirname(self.path))
+            if os.path.isfile(self.path):
+                self._watcher.addPath(self.path)
+            self._watcher.fileChanged.connect(self._on_fs_changed)
+            self._watcher.directoryChanged.connect(self._on_fs_changed)
+        config.set_saver(self.schedule_save)
+
+    # ---------------- 保存 ----------------
+    def schedule_save(self) -> None:
+        """记录当前配置：立即通知监听方，写盘推迟到 debounce_ms 内没有新修改时。"""
+        current = self.config.to_dict()
+        changes = diff_config(self._snapshot, current)
+        self._snapshot = current
+        self._save_timer.start()
+        if changes:
+            self.changed.emit(changes)
+
+    def _submit(self) -> None:
+        with self._cond:
+            self._pending = dict(self._snapshot)
+            self._cond.notify_all()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+                self._writing = True
+            text = self.config.write_config(data)
+            with self._cond:
+                if text is not None:
+                    self._written_text = text
+                    self.writes += 1
+                self._writing = False
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """立即写出尚未保存的修改并等待写完（退出前调用），返回是否在超时前完成。"""
+        if self._save_timer.isActive():
+            self._save_timer.stop()
+            self._submit()
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self) -> None:
+        self.flush()
+        self.config.set_saver(None)
+        if self._watcher is not None:
+            self._watcher.removePaths(self._watcher.files() + self._watcher.directories())
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=2.0)
+
+    # ---------------- 热加载 ----------------
+    def _on_fs_changed(self, _path: str) -> None:
+        if self._watcher is not None and os.path.isfile(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        # 编辑器保存时常连续触发多次，稍等文件写完再读
+        self._reload_timer.start()
+
+    def _read_text(self) -> Optional[str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def reload(self) -> Dict[str, Tuple[Any, Any]]:
+        """重新读取配置文件并应用外部修改，返回变化的字段。"""
+        text = self._read_text()
+        with self._cond:
+            own_write = text == self._written_text
+        if text is None or own_write:
+            return {}
+        try:
+            data = json.loads(text)
+            if not isinstance(data, dict):
+                raise ValueError("配置文件内容应为 JSON 对象")
+        except ValueError as e:
+            # 外部编辑器可能正写到一半；保留当前配置，等待下一次修改
+            print(f"[ConfigStore] 忽略无效的配置文件: {e}")
+            return {}
+        with self._cond:
+            self._written_text = text
+        self.config.update_from_dict(data)
+        current = self.config.to_dict()
+        changes = diff_config(self._snapshot, current)
+        self._snapshot = current
+        if changes:
+            print(f"[ConfigStore] 已应用外部修改: {', '.join(sorted(changes))}")
+            self.changed.emit(changes)
+        return changes
@@ -0,0 +1,114 @@
+"""AI 请求后台引擎：所有流式请求在线程池中执行，通过 Qt 信号把片段送回界面。
+
+以前各气泡在主线程里迭代 chat_stream 并逐片段调用 processEvents，连接/等待期间界面冻结，
+还会引发重入。现在统一为：
+
+    request = ai_engine.stream(client, payload)
+    request.chunk.connect(message.stream_text)      # 每个文本片段
+    request.finished.connect(on_done)                # 完整文本
+    request.aborted.connect(on_cancelled)            # 被 cancel() 中止，参数为已收到的部分文本
+    request.failed.connect(on_error)                 # 异常对象
+
+finished / aborted / failed 三者只会发射其一；被截断的文本不会经 finished 送出，调用方不必担心把它写入缓存。
+
+StreamRequest 对象属于主线程，工作线程发射的信号自动以排队方式投递到主线程；
+多个气泡可以同时发起请求，并发数由线程池上限控制。
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Set, Union
+
+from PyQt5 import QtCore
+
+PayloadSource = Union[Dict[str, Any], Callable[[], Dict[str, Any]]]
+
+
+class StreamRequest(QtCore.QObject):
+    """一次流式请求的句柄；信号均在主线程触发。"""
+
+    chunk = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(str)   # 完整文本
+    aborted = QtCore.pyqtSignal(str)    # 被取消，参数为已收到的部分文本
+    failed = QtCore.pyqtSignal(object)  # 异常对象
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """请求在下一个片段到达时停止。"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class _StreamJob(QtCore.QRunnable):
+    def __init__(self, client, payload: PayloadSource, request: StreamRequest):
+        super().__init__()
+        self.client = client
+        self.payload = payload
+        self.request = request
+
+    def run(self):
+        request = self.request
+        parts = []
+        try:
+            # 允许传入可调用对象，使构造 payload（如知识库检索）也在后台完成
+            payload = self.payload() if callable(self.payload) else self.payload
+            for piece in self.client.chat_stream(payload):
+                if request.cancelled:
+                    break
+                parts.append(piece)
+                request.chunk.emit(piece)
+        except Exception as e:  # noqa: BLE001 - 交给界面决定如何展示
+            request.failed.emit(e)
+            return
+        if request.cancelled:
+            request.aborted.emit("".join(parts))
+        else:
+            request.finished.emit("".join(parts))
+
+
+class AIStreamEngine(QtCore.QObject):
+    """共享的后台请求引擎（单例使用 ai_engine）。"""
+
+    def __init__(self, max_concurrency: int = 4):
+        super().__init__()
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_concurrency)
+        self._active: Set[StreamRequest] = set()
+
+    def stream(self, client, payload: PayloadSource) -> StreamRequest:
+        """提交流式请求，立即返回句柄；须在返回事件循环前连接信号。"""
+        # 以引擎为父对象，避免 Python 引用释放导致排队中的信号丢失
+        request = StreamRequest(self)
+        request.finished.connect(lambda _text, r=request: self._release(r))
+        request.aborted.connect(lambda _text, r=request: self._release(r))
+        request.failed.connect(lambda _error, r=request: self._release(r))
+        self._active.add(request)
+        # 回到事件循环后再启动：确保调用方连接信号之前工作线程不会发射任何信号
+        job = _StreamJob(client, payload, request)
+        QtCore.QTimer.singleShot(0, lambda: self._pool.start(job))
+        return request
+
+    def _release(self, request: StreamRequest):
+        self._active.discard(request)
+        # 延迟删除：保证同一批排队信号都已投递给界面
+        request.deleteLater()
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def shutdown(self, timeout_ms: int = 2000) -> bool:
+        """取消全部请求并等待工作线程退出（应用退出时调用）。"""
+        for request in list(self._active):
+            request.cancel()
+        return self._pool.waitForDone(timeout_ms)
+
+
+ai_engine = AIStreamEngine()
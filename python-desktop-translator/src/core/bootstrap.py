@@ -2,25 +2,106 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import os
+import threading
+from typing import TYPE_CHECKING, Optional
 
 from config.app_config import AppConfig
+from core.ai_engine import ai_engine
+from core.render_pool import render_pool
 from services.ai_client import AIClient
+from services.conversation_store import ConversationStore
 from services.translation_service import TranslationService
 
+if TYPE_CHECKING:
+    from services.answer_cache import AnswerCache
+    from services.kb_index import KnowledgeBaseIndex
+
 
 class Bootstrap:
     def __init__(self):
         self.config: AppConfig = AppConfig()
         self.client: AIClient = AIClient(self.config.ai_server, self.config.api_key)
         self.translation_service: TranslationService = TranslationService(self.client, self.config)
+        self.store: ConversationStore = ConversationStore(os.path.join(self.config.data_dir, "history.db"))
+        # 知识库索引与问答缓存依赖 numpy 且需读取文件，首次提问或后台预热时才创建，不拖慢启动
+        self._kb_index: Optional[KnowledgeBaseIndex] = None
+        self._kb_index_checked = False
+        self._answer_cache: Optional[AnswerCache] = None
+        self._lazy_lock = threading.Lock()
+        self.config_store = None  # 需要 Qt 事件循环，在 run() 中创建
         self._floating_window = None  # 延迟导入 UI
 
     def run(self):
+        from PyQt5.QtWidgets import QApplication
+        from config.config_store import ConfigStore
         from ui.floating_window import FloatingWindow  # 局部导入避免循环引用
-        self._floating_window = FloatingWindow(self.config, self.client, self.translation_service)
+        from ui.frame_budget import frame_stats
+        # 设置保存改为后台原子写入；配置文件被外部修改时热更新客户端
+        self.config_store = ConfigStore(self.config)
+        self.config_store.changed.connect(self._apply_config_changes)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.config_store.close)
+            # 退出前把尚未落盘的会话写完
+            app.aboutToQuit.connect(self.store.close)
+            app.aboutToQuit.connect(self._save_answer_cache)
+            # 取消仍在进行的流式请求，等待后台线程退出
+            app.aboutToQuit.connect(ai_engine.shutdown)
+            app.aboutToQuit.connect(render_pool.shutdown)
+            app.aboutToQuit.connect(self.client.close)
+            # XIAOKAI_FRAME_STATS=1 时打印各动画的绘制耗时
+            app.aboutToQuit.connect(frame_stats.dump)
+        self._floating_window = FloatingWindow(
+            self.config, self.client, self.translation_service, store=self.store,
+            kb_index_provider=self.kb_index, answer_cache_provider=self.answer_cache,
+        )
         self._floating_window.show()
 
+    def kb_index(self) -> Optional[KnowledgeBaseIndex]:
+        """返回知识库索引，首次调用时加载（可在后台线程中调用）。
+
+        索引由 tools/build_kb_index.py 离线生成；未生成时返回 None，问答不注入参考资料。
+        """
+        with self._lazy_lock:
+            if not self._kb_index_checked:
+                self._kb_index_checked = True
+                if os.path.isfile(os.path.join(self.config.kb_index_dir, "meta.json")):
+                    from services.kb_index import KnowledgeBaseIndex
+                    self._kb_index = KnowledgeBaseIndex(self.config.kb_index_dir)
+            return self._kb_index
+
+    def answer_cache(self) -> AnswerCache:
+        """返回问答缓存，首次调用时创建（可在预热线程中调用）。"""
+        with self._lazy_lock:
+            if self._answer_cache is None:
+                from services.answer_cache import AnswerCache
+                self._answer_cache = AnswerCache(
+                    threshold=self.config.qa_cache_threshold,
+                    path=os.path.join(self.config.data_dir, "answer_cache.json"),
+                )
+            return self._answer_cache
+
+    def _apply_config_changes(self, changes: dict):
+        if "ai_server" in changes or "api_key" in changes:
+            self.client.reconfigure(self.config.ai_server, self.config.api_key)
+        # 缓存尚未创建时无需处理：创建时读取最新阈值，查询时按模型过滤
+        cache = self._answer_cache
+        if cache is None:
+            return
+        if "model" in changes:
+            # 换模型后旧模型的缓存答案不再适用
+            cache.invalidate_model(changes["model"][0])
+        if "qa_cache_threshold" in changes:
+            cache.threshold = self.config.qa_cache_threshold
+
+    def _save_answer_cache(self):
+        cache = self._answer_cache
+        if cache is None:
+            return
+        print(f"[QA Cache] {cache.stats()}")
+        cache.save()
+
     @property
     def window(self) -> Optional[object]:  # pragma: no cover - 仅用于运行期访问
         return self._floating_window
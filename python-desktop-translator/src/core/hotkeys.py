@@ -1,25 +1,102 @@
 """全局热键支持。
 
 如果运行环境未安装 pynput，则热键功能自动降级为 no-op，避免启动时报错。
+
+组合键在注册时预编译为 frozenset，并按组合中的每个键建立索引：每次按键只检查包含该键的组合。
+pynput 的监听线程只做集合运算，回调通过排队信号交给 Qt 主线程执行，不会阻塞全局输入；
+按住不放产生的自动重复不会重复触发（边沿触发，需松开组合中的任一键后才能再次触发）。
 """
 
+import bisect
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from PyQt5 import QtCore
+
 try:
     from pynput import keyboard  # type: ignore
 except ImportError:  # 环境缺失依赖时的降级处理
     keyboard = None  # type: ignore
     print("[HotkeyManager] pynput 未安装，已禁用全局热键功能。请执行: pip install pynput")
 
-class HotkeyManager:
-    """简单全局热键管理：支持类似 'ctrl+alt+t' 的组合。"""
+# 左右修饰键统一为同一名称，'ctrl+alt+t' 才能匹配 ctrl_l / alt_gr 等实际按键
+_KEY_ALIASES = {
+    'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl',
+    'alt_l': 'alt', 'alt_r': 'alt', 'alt_gr': 'alt',
+    'shift_l': 'shift', 'shift_r': 'shift',
+    'cmd_l': 'cmd', 'cmd_r': 'cmd', 'win': 'cmd',
+    'control': 'ctrl', 'option': 'alt',
+}
+
+
+class LatencyHistogram:
+    """按毫秒分桶的耗时直方图（计数在 GIL 下递增，跨线程读写无需加锁）。"""
+
+    BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
 
     def __init__(self):
-        self.hotkeys = {}  # combination string -> callback
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.total += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """返回 p 分位所在桶的上界（毫秒）；超出最大桶时返回观测到的最大值。"""
+        if not self.total:
+            return 0.0
+        rank = p / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.BUCKETS_MS[i] if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.total,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class HotkeyManager(QtCore.QObject):
+    """简单全局热键管理：支持类似 'ctrl+alt+t' 的组合。须在 Qt 主线程创建。"""
+
+    # (组合, 按下时刻)；由监听线程发射，排队投递到主线程
+    _triggered = QtCore.pyqtSignal(object, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hotkeys: Dict[FrozenSet[str], Callable[[], object]] = {}  # 组合 -> 回调
+        self._by_key: Dict[str, List[FrozenSet[str]]] = {}  # 键 -> 包含该键的组合
         self._pressed = set()  # 当前按下的键（str）
+        self._fired = set()  # 已触发且尚未松开的组合
+        self._lock = threading.Lock()
         self.listener = None
+        self.last_pressed_at = 0.0  # 最近一次触发的按键时刻（perf_counter），回调可据此计算端到端延迟
+        # press：监听线程处理一次按键的耗时；dispatch：按下到主线程开始执行回调的延迟
+        self.press_latency = LatencyHistogram()
+        self.dispatch_latency = LatencyHistogram()
+        self._triggered.connect(self._dispatch, QtCore.Qt.QueuedConnection)
 
     def register_hotkey(self, key_combination: str, callback):
-        combo_norm = self._normalize(key_combination)
-        self.hotkeys[combo_norm] = callback
+        combo = self._compile(key_combination)
+        if not combo:
+            return
+        with self._lock:
+            self.hotkeys[combo] = callback
+            for key in combo:
+                combos = self._by_key.setdefault(key, [])
+                if combo not in combos:
+                    combos.append(combo)
         if keyboard is None:
             # 依赖缺失时直接返回，不启动监听
             return
@@ -32,38 +109,63 @@ class HotkeyManager:
             self.listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
             self.listener.start()
 
+    # ---------------- 监听线程 ----------------
     def _on_press(self, key):
+        started = time.perf_counter()
         key_str = self._key_to_str(key)
-        if key_str:
+        if not key_str:
+            return
+        with self._lock:
+            if key_str in self._pressed:
+                return  # 按住产生的自动重复
             self._pressed.add(key_str)
-        self._check_hotkeys()
+            hits = [c for c in self._by_key.get(key_str, ()) if c not in self._fired and c <= self._pressed]
+            self._fired.update(hits)
+        for combo in hits:
+            self._triggered.emit(combo, started)
+        self.press_latency.add((time.perf_counter() - started) * 1000)
 
     def _on_release(self, key):
         key_str = self._key_to_str(key)
-        if key_str and key_str in self._pressed:
-            self._pressed.remove(key_str)
-
-    def _check_hotkeys(self):
-        for combo, callback in self.hotkeys.items():
-            parts = combo.split('+')
-            if all(p in self._pressed for p in parts):
-                try:
-                    callback()
-                except Exception as e:
-                    print(f"Hotkey callback error for {combo}: {e}")
-
-    def _key_to_str(self, key):
+        if not key_str:
+            return
+        with self._lock:
+            self._pressed.discard(key_str)
+            if self._fired:
+                self._fired = {c for c in self._fired if key_str not in c}
+
+    # ---------------- 主线程 ----------------
+    def _dispatch(self, combo, pressed_at: float):
+        self.dispatch_latency.add((time.perf_counter() - pressed_at) * 1000)
+        callback = self.hotkeys.get(combo)
+        if callback is None:
+            return
+        self.last_pressed_at = pressed_at
+        try:
+            callback()
+        except Exception as e:
+            print(f"Hotkey callback error for {'+'.join(sorted(combo))}: {e}")
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        return {'press': self.press_latency.summary(), 'dispatch': self.dispatch_latency.summary()}
+
+    # ---------------- 键名 ----------------
+    def _key_to_str(self, key) -> Optional[str]:
         try:
-            if hasattr(key, 'char') and key.char:
-                return key.char.lower()
+            char = getattr(key, 'char', None)
+            if char:
+                # 按住 Ctrl 时部分平台给出控制字符（如 Ctrl+T -> '\x14'），还原为字母
+                if len(char) == 1 and ord(char) < 32:
+                    char = chr(ord(char) + 96)
+                return char.lower()
             name = str(key).replace('Key.', '').lower()
-            return name
+            return _KEY_ALIASES.get(name, name)
         except Exception:
             return None
 
-    def _normalize(self, combo: str):
+    def _compile(self, combo: str) -> FrozenSet[str]:
         parts = [p.strip().lower() for p in combo.split('+') if p.strip()]
-        return '+'.join(parts)
+        return frozenset(_KEY_ALIASES.get(p, p) for p in parts)
 
     def stop_listener(self):
         if self.listener:
@@ -71,4 +173,4 @@ class HotkeyManager:
                 self.listener.stop()
             except Exception:
                 pass
-            self.listener = None
\ No newline at end of file
+            self.listener = None
@@ -0,0 +1,170 @@
+"""空闲预热：用户点击之前，在主线程空闲时逐个构造气泡（保持隐藏）并预先建立到 AI 服务器的连接。
+
+悬浮窗在进入 idle 或鼠标悬停时调用 start()；任务按「最可能被打开」的顺序逐个执行，每个时间片只做一件事：
+
+    prewarm.add_task('network', client.warm_up, background=True)   # 在线程池中执行
+    prewarm.add_task('qa', lambda: window._prewarm_bubble('qa'))
+    prewarm.start(delay_ms=1000)
+
+机器繁忙（主线程事件循环延迟过大或系统 CPU 占用过高）时指数退避；
+内存增长超过预算或预热的气泡数达到上限后不再构造气泡。record_open 记录各气泡的首次打开耗时。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from PyQt5 import QtCore
+
+from utils.system import process_rss_mb
+
+try:
+    import psutil  # 可选：更准确的 CPU 占用读数
+except ImportError:
+    psutil = None
+
+
+class _Task:
+    __slots__ = ("name", "fn", "background", "order")
+
+    def __init__(self, name: str, fn: Callable[[], object], background: bool, order: int):
+        self.name = name
+        self.fn = fn
+        self.background = background
+        self.order = order
+
+
+class PrewarmScheduler(QtCore.QObject):
+    """低优先级预热调度（仅在 GUI 线程使用）。"""
+
+    warmed = QtCore.pyqtSignal(str)  # 完成的任务名
+
+    TICK_MS = 200           # 两个任务之间的间隔
+    MAX_BACKOFF_MS = 10000  # 繁忙时退避的最长间隔
+    LAG_BUSY_MS = 50        # 计时器比预期晚到超过该值，视为主线程繁忙
+
+    def __init__(self, memory_budget_mb: float = 80, cpu_busy_percent: float = 70,
+                 max_foreground: int = 2, parent=None):
+        super().__init__(parent)
+        self.memory_budget_mb = memory_budget_mb
+        self.cpu_busy_percent = cpu_busy_percent
+        self.max_foreground = max_foreground
+        self._tasks: Dict[str, _Task] = {}
+        self._done: set = set()
+        self._usage: Counter = Counter()
+        self._foreground_done = 0
+        self._rss_start: Optional[float] = None
+        self._interval = self.TICK_MS
+        self._expected_at = 0.0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+        self.first_open_ms: Dict[str, float] = {}
+        self.backoffs = 0
+
+    # ---------------- 任务 ----------------
+    def add_task(self, name: str, fn: Callable[[], object], background: bool = False):
+        """注册预热任务；background=True 的任务（如网络连接）在线程池中执行，不占用主线程。"""
+        self._tasks[name] = _Task(name, fn, background, len(self._tasks))
+
+    def pending(self) -> List[str]:
+        """待执行任务名：后台任务优先，其余按打开次数降序、注册顺序升序。"""
+        tasks = [t for t in self._tasks.values() if t.name not in self._done]
+        tasks.sort(key=lambda t: (not t.background, -self._usage[t.name], t.order))
+        return [t.name for t in tasks]
+
+    def mark_done(self, name: str):
+        """任务对应的资源已由其他途径创建（如用户直接打开了气泡），不再预热。"""
+        self._done.add(name)
+
+    # ---------------- 调度 ----------------
+    def start(self, delay_ms: int = 0):
+        """开始（或继续）预热：后台任务立即提交，主线程任务在 delay_ms 之后逐个执行。"""
+        for name in self.pending():
+            task = self._tasks[name]
+            if task.background:
+                self._run(task)
+        if not self._timer.isActive() and self.pending():
+            self._interval = self.TICK_MS
+            self._schedule(max(delay_ms, 0))
+
+    def pause(self):
+        self._timer.stop()
+
+    @property
+    def active(self) -> bool:
+        return self._timer.isActive()
+
+    def _schedule(self, interval_ms: int):
+        self._expected_at = time.perf_counter() + interval_ms / 1000
+        self._timer.start(interval_ms)
+
+    def _tick(self):
+        lag_ms = (time.perf_counter() - self._expected_at) * 1000
+        if lag_ms > self.LAG_BUSY_MS or self._system_busy():
+            # 机器繁忙：放弃这个时间片，间隔翻倍后再试
+            self.backoffs += 1
+            self._interval = min(self._interval * 2, self.MAX_BACKOFF_MS)
+            self._schedule(self._interval)
+            return
+        self._interval = self.TICK_MS
+        for name in self.pending():
+            task = self._tasks[name]
+            if task.background:
+                continue
+            if not self._within_budget():
+                return
+            self._run(task)
+            break
+        if any(not self._tasks[n].background for n in self.pending()):
+            self._schedule(self._interval)
+
+    def _run(self, task: _Task):
+        self._done.add(task.name)
+        if task.background:
+            def _job(fn=task.fn):
+                try:
+                    fn()
+                except Exception as e:  # noqa: BLE001 - 预热失败不影响正常使用
+                    print(f"[Prewarm] {task.name} 失败: {e}")
+            QtCore.QThreadPool.globalInstance().start(_job)
+            return
+        if self._rss_start is None:
+            self._rss_start = process_rss_mb()
+        try:
+            task.fn()
+        except Exception as e:  # noqa: BLE001
+            print(f"[Prewarm] {task.name} 失败: {e}")
+            return
+        self._foreground_done += 1
+        self.warmed.emit(task.name)
+
+    # ---------------- 预算与繁忙检测 ----------------
+    def _within_budget(self) -> bool:
+        if self._foreground_done >= self.max_foreground:
+            return False
+        rss = process_rss_mb()
+        if rss is not None and self._rss_start is not None:
+            return rss - self._rss_start < self.memory_budget_mb
+        return True
+
+    def _system_busy(self) -> bool:
+        if psutil is not None:
+            return psutil.cpu_percent(interval=None) > self.cpu_busy_percent
+        if hasattr(os, "getloadavg"):
+            load = os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+            return load > self.cpu_busy_percent
+        return False
+
+    # ---------------- 统计 ----------------
+    def record_open(self, name: str, first_open_ms: Optional[float] = None, prewarmed: bool = False):
+        """记录一次打开；first_open_ms 非空时为该气泡的首次打开耗时。"""
+        self._usage[name] += 1
+        self.mark_done(name)
+        if first_open_ms is not None:
+            self.first_open_ms[name] = first_open_ms
+            state = "已预热" if prewarmed else "冷启动"
+            print(f"[Prewarm] 首次打开 {name}: {first_open_ms:.1f} ms（{state}）")
@@ -0,0 +1,118 @@
+"""Markdown 后台渲染进程池：大段回答的 Markdown + Pygments 高亮放到子进程中完成。
+
+markdown/codehilite 是纯 Python 实现，多段长代码块的回答在主线程渲染要数百毫秒；
+线程池受 GIL 限制帮不上忙，因此使用进程池（spawn 方式，与 Windows 行为一致）：
+
+    if render_pool.should_offload(text):
+        request = render_pool.render(text)
+        request.finished.connect(on_html)   # 渲染好的 HTML
+        request.failed.connect(on_error)    # 异常对象，调用方可回退为同步渲染
+
+结果会写回主进程的 markdown_engine 缓存，之后换主题等重复渲染直接命中缓存。
+RenderRequest 属于主线程，执行器回调线程发射的信号以排队方式投递到主线程。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Set
+
+from PyQt5 import QtCore
+
+from utils.markdown_engine import markdown_engine, render_html
+
+# 超过该长度（字符数）且未命中缓存的文本交给进程池渲染
+OFFLOAD_THRESHOLD_CHARS = 6000
+
+
+class RenderRequest(QtCore.QObject):
+    """一次后台渲染的句柄；信号均在主线程触发。"""
+
+    finished = QtCore.pyqtSignal(str)   # 渲染好的 HTML（未包装样式）
+    failed = QtCore.pyqtSignal(object)  # 异常对象
+
+
+class MarkdownRenderPool(QtCore.QObject):
+    """共享的 Markdown 渲染进程池（单例使用 render_pool），子进程在首次使用时才启动。"""
+
+    def __init__(self, max_workers: Optional[int] = None, threshold: int = OFFLOAD_THRESHOLD_CHARS):
+        super().__init__()
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 2) - 1))
+        self.threshold = threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._active: Set[RenderRequest] = set()
+        self._futures: Set[Future] = set()  # 已提交、尚未完成的任务（退出时取消）
+        self._futures_lock = threading.Lock()  # 执行器回调线程与主线程都会修改 _futures
+
+    def should_offload(self, text: str) -> bool:
+        """文本足够长且缓存中没有现成结果时才值得交给子进程。"""
+        return 0 < self.threshold <= len(text) and markdown_engine.cached(text) is None
+
+    def render(self, text: str, theme: str = "default") -> RenderRequest:
+        """提交渲染任务，立即返回句柄；须在返回事件循环前连接信号。"""
+        request = RenderRequest(self)
+        request.finished.connect(lambda _html, r=request: self._release(r))
+        request.failed.connect(lambda _error, r=request: self._release(r))
+        self._active.add(request)
+        # 回到事件循环后再提交：子进程可能很快完成，须保证调用方已连接信号
+        QtCore.QTimer.singleShot(0, lambda: self._submit(request, text, theme))
+        return request
+
+    def _submit(self, request: RenderRequest, text: str, theme: str):
+        try:
+            future = self._get_executor().submit(render_html, text, theme)
+        except Exception as e:  # noqa: BLE001 - 进程池不可用时由调用方回退为同步渲染
+            self._executor = None
+            request.failed.emit(e)
+            return
+        with self._futures_lock:
+            self._futures.add(future)
+        future.add_done_callback(lambda f: self._deliver(request, text, theme, f))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _deliver(self, request: RenderRequest, text: str, theme: str, future: Future):
+        # 在执行器的回调线程中运行
+        with self._futures_lock:
+            self._futures.discard(future)
+        try:
+            html = future.result()
+        except BaseException as e:  # noqa: BLE001 - 包括取消与子进程崩溃
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            request.failed.emit(e)
+            return
+        markdown_engine.put(text, html, theme)
+        request.finished.emit(html)
+
+    def _release(self, request: RenderRequest):
+        self._active.discard(request)
+        request.deleteLater()
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def shutdown(self):
+        """取消排队中的任务并关闭子进程（应用退出时调用）。"""
+        executor, self._executor = self._executor, None
+        # 手动取消排队中的任务（shutdown 的 cancel_futures 参数需要 Python 3.9）
+        with self._futures_lock:
+            pending = list(self._futures)
+        # 在锁外取消：cancel() 会同步执行 done 回调，回调中同样需要获取锁
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+render_pool = MarkdownRenderPool()
@@ -0,0 +1,51 @@
+"""启动阶段计时：`python main.py --profile-startup` 时打印各阶段耗时。
+
+    startup_profile.enable()
+    startup_profile.mark("imports")        # 记录从上一个标记到现在的耗时
+    ...
+    startup_profile.report()               # [STARTUP] imports 120.3 ms | ... | total 480.1 ms
+
+未启用时 mark/report 均为空操作。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfile:
+    def __init__(self):
+        self.enabled = False
+        self._origin = time.perf_counter()
+        self._last = self._origin
+        self.phases: List[Tuple[str, float]] = []  # (阶段名, 毫秒)
+
+    def enable(self, origin: float = None):
+        """开始计时；origin 默认取模块导入时刻（尽量接近进程启动）。"""
+        self.enabled = True
+        if origin is not None:
+            self._origin = self._last = origin
+
+    def mark(self, phase: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self._origin) * 1000
+
+    def report(self):
+        if not self.enabled:
+            return
+        parts = [f"{name} {ms:.1f} ms" for name, ms in self.phases]
+        parts.append(f"total {self.total_ms:.1f} ms")
+        print("[STARTUP] " + " | ".join(parts))
+
+
+startup_profile = StartupProfile()
@@ -6,8 +6,12 @@ import pathlib
 import traceback
 import logging
 
-# 设置日志
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from core.startup_profile import PROFILE_FLAG, startup_profile
+
+# 注意：Markdown 渲染进程池以 spawn 方式启动子进程，子进程会以 __mp_main__ 名义重新导入本模块。
+# 模块顶层只保留定义，日志、异常钩子、Qt 插件诊断与 PyQt5/业务模块的导入都放在 __main__ 分支中，
+# 子进程因此不会重复打印诊断信息，也不会加载 PyQt5 和各项服务。
+
 
 def global_exception_handler(exctype, value, tb):
     """全局异常处理器"""
@@ -15,8 +19,19 @@ def global_exception_handler(exctype, value, tb):
     traceback.print_exception(exctype, value, tb)
     sys.exit(1)
 
-# 安装全局异常处理器
-sys.excepthook = global_exception_handler
+
+def _setup_process():
+    """仅主进程执行：解析启动参数、设置日志并安装全局异常处理器。"""
+    # --profile-startup：打印启动各阶段耗时（参数不传给 Qt）
+    if PROFILE_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_FLAG)
+        startup_profile.enable()
+
+    # 设置日志
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # 安装全局异常处理器
+    sys.excepthook = global_exception_handler
 
 def _ensure_qt_plugin_path(verbose: bool = True):
     """创建 QApplication 前：
@@ -77,20 +92,19 @@ def _ensure_qt_plugin_path(verbose: bool = True):
             print("[QT DIAG] Exception while ensuring plugin path:", e)
             traceback.print_exc()
 
-_ensure_qt_plugin_path()
-
-from PyQt5.QtCore import QCoreApplication, Qt  # noqa: E402 - 在创建 QApplication 之前设置属性
-from PyQt5.QtWidgets import QApplication  # noqa: E402 - 需在设置环境变量后再导入
-from PyQt5 import QtGui
-from core.bootstrap import Bootstrap  # noqa: E402
-
 
 def main():
     try:
         print("[APP] Starting 小铠同学 application...")
-        # 启动前进行插件诊断
+        # 启动前进行插件诊断（需在导入 QtWidgets、创建 QApplication 之前）
         _ensure_qt_plugin_path(verbose=True)
 
+        from PyQt5.QtCore import QCoreApplication, Qt, QTimer  # 在创建 QApplication 之前设置属性
+        from PyQt5.QtWidgets import QApplication  # 需在设置环境变量后再导入
+        from PyQt5 import QtGui
+        from core.bootstrap import Bootstrap
+        startup_profile.mark("imports")
+
         # 在创建 QApplication 之前，启用共享 OpenGL 上下文以满足 QtWebEngine 要求
         try:
             aa_share = getattr(Qt, 'AA_ShareOpenGLContexts', None)
@@ -104,6 +118,7 @@ def main():
         # 诊断后再导入 QApplication 避免路径缺失
         app = QApplication(sys.argv)
         print("[QT] QApplication created successfully")
+        startup_profile.mark("qapplication")
 
         # 防止关闭最后一个窗口后应用自动退出（托盘常驻）
         try:
@@ -126,8 +141,16 @@ def main():
 
         print("[APP] Initializing Bootstrap...")
         bootstrap = Bootstrap()
+        startup_profile.mark("bootstrap")
         print("[APP] Starting application...")
         bootstrap.run()
+        startup_profile.mark("floating_window")
+        if startup_profile.enabled:
+            # 事件循环处理完首批事件（悬浮窗首次绘制）后输出
+            def _report_visible():
+                startup_profile.mark("first_paint")
+                startup_profile.report()
+            QTimer.singleShot(0, _report_visible)
 
         print("[APP] Entering main event loop...")
         sys.exit(app.exec_())
@@ -139,4 +162,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # Markdown 渲染进程池使用 spawn 方式启动子进程，打包为可执行文件后需要此调用
+    import multiprocessing
+    multiprocessing.freeze_support()
+    _setup_process()
     main()
\ No newline at end of file
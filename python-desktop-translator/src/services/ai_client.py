@@ -20,6 +20,7 @@ import time
 from typing import Any, Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -52,12 +53,47 @@ TRANSIENT_STATUS = {429, 500, 502, 503, 504}
 
 
 class AIClient:
-    def __init__(self, server_url: str, api_key: str, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, server_url: str, api_key: str, timeout: int = 30, max_retries: int = 3, pool_size: int = 4):
         # server_url 期望为完整的 chat completions 端点: http://host:port/v1/chat/completions
         self.server_url = server_url.rstrip("/")
         self.api_key = api_key.replace("Bearer ", "") if api_key else ""
         self.timeout = timeout
         self.max_retries = max_retries
+        self._pool_size = pool_size
+        # 复用 TCP/TLS 连接：所有请求共用一个 Session，连接池大小与 ai_engine 并发上限一致
+        self._session = self._new_session()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def reconfigure(self, server_url: Optional[str] = None, api_key: Optional[str] = None) -> None:
+        """热更新服务器地址/密钥（配置文件被修改时调用），无需重启应用。
+
+        服务器变化时换用新的连接池；进行中的请求仍持有旧 Session，结束后随对象回收。
+        """
+        if api_key is not None:
+            self.api_key = api_key.replace("Bearer ", "") if api_key else ""
+        if server_url is not None and server_url.rstrip("/") != self.server_url:
+            self.server_url = server_url.rstrip("/")
+            self._session = self._new_session()
+
+    def warm_up(self, timeout: float = 3.0) -> bool:
+        """预先建立到服务器的连接并放回连接池（空闲预热用），失败时静默返回 False。"""
+        try:
+            resp = self._session.head(self.server_url, timeout=timeout)
+            resp.close()
+            return True
+        except requests.RequestException as e:
+            logger.debug("预热连接失败: %s", e)
+            return False
+
+    def close(self) -> None:
+        """关闭连接池（应用退出时调用）。"""
+        self._session.close()
 
     # --------------------- 对外主方法 ---------------------
     def chat(self, payload: Dict[str, Any]) -> str:
@@ -91,37 +127,37 @@ class AIClient:
                 "Content-Type": "application/json",
             }
             
-            response = requests.post(
+            # with 保证提前结束（取消）时也把连接归还连接池
+            with self._session.post(
                 self.server_url,
                 json=payload_with_stream,
                 headers=headers,
                 timeout=self.timeout,
                 stream=True
-            )
-            
-            if response.status_code >= 400:
-                self._raise_for_status(response)
+            ) as response:
+                if response.status_code >= 400:
+                    self._raise_for_status(response)
             
-            # 处理流式响应
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith('data: '):
-                        data_str = decoded_line[6:]  # 移除 'data: ' 前缀
-                        if data_str == '[DONE]':
-                            break
-                        try:
-                            import json
-                            chunk_data = json.loads(data_str)
-                            choices = chunk_data.get("choices", [])
-                            if choices:
-                                delta = choices[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                        except Exception:
-                            # 忽略解析错误的行
-                            continue
+                # 处理流式响应
+                for line in response.iter_lines():
+                    if line:
+                        decoded_line = line.decode('utf-8')
+                        if decoded_line.startswith('data: '):
+                            data_str = decoded_line[6:]  # 移除 'data: ' 前缀
+                            if data_str == '[DONE]':
+                                break
+                            try:
+                                import json
+                                chunk_data = json.loads(data_str)
+                                choices = chunk_data.get("choices", [])
+                                if choices:
+                                    delta = choices[0].get("delta", {})
+                                    content = delta.get("content", "")
+                                    if content:
+                                        yield content
+                            except Exception:
+                                # 忽略解析错误的行
+                                continue
         except Exception as e:
             raise AIClientError(f"流式请求失败: {e}") from e
 
@@ -157,7 +193,7 @@ class AIClient:
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json",
                 }
-                resp = requests.post(
+                resp = self._session.post(
                     self.server_url,
                     json=payload,
                     headers=headers,
@@ -0,0 +1,218 @@
+"""问答语义缓存：相似问题直接复用已有答案。
+
+做法：
+1. 问题归一化（NFKC、小写、去标点、合并空白）后作为精确键，O(1) 命中
+2. 未精确命中时，去掉疑问虚词后取字符 n-gram（英文词内三元组+整词，中文一/二元组），
+   哈希成固定维度向量并 L2 归一化存入 NumPy 矩阵；一次矩阵-向量乘法得到全部余弦相似度
+3. 相似度超过阈值、模型一致且数字/版本号完全相同才视为命中（"python 3.8" 与 "python 3.9"
+   字面上几乎一样，答案却不同）；缓存满时淘汰最久未使用的条目
+4. 统计命中/未命中次数，可持久化为 JSON（向量在加载时重新计算）
+
+不依赖任何外部服务；zlib.crc32 作为哈希函数保证跨进程稳定。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PUNCT_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_RUN_RE = re.compile(r"[a-z0-9]+|[^\sa-z0-9]+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,_-]\d+)*")
+# 疑问句式中的高频虚词，不参与相似度计算（"how to reset vpn" ≈ "vpn reset steps"）
+_STOP_WORDS = {"how", "to", "do", "does", "i", "my", "a", "the", "what", "is", "are", "can", "steps", "step", "please"}
+_STOP_PHRASES = ("如何", "怎么", "怎样", "什么", "请问", "一下", "步骤", "吗", "呢")
+
+
+class CachedAnswer(NamedTuple):
+    question: str
+    answer: str
+    model: str
+    similarity: float
+
+
+def _features(normalized: str) -> List[str]:
+    """英文取整词 + 词内字符三元组；中文等取字符一元组与二元组。"""
+    text = normalized
+    for phrase in _STOP_PHRASES:
+        text = text.replace(phrase, " ")
+    features: List[str] = []
+    for run in _RUN_RE.findall(text):
+        if run.isascii():
+            if run in _STOP_WORDS:
+                continue
+            features.append(run)
+            padded = f" {run} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        else:
+            features.extend(run)
+            features.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return features
+
+
+def question_numbers(text: str) -> FrozenSet[str]:
+    """问题中的数字与版本号（"3.8"、"2024"、"win10" 中的 "10"），须完全一致才可复用答案。"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return frozenset(_NUMBER_RE.findall(text))
+
+
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _PUNCT_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+class AnswerCache:
+    """基于字符 n-gram 向量的近似问题缓存（线程安全）。"""
+
+    def __init__(self, capacity: int = 500, threshold: float = 0.85, dim: int = 2048, path: Optional[str] = None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.dim = dim
+        self.path = path
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, str]]] = [None] * capacity
+        self._numbers: List[FrozenSet[str]] = [frozenset()] * capacity
+        self._exact: Dict[tuple, int] = {}  # (model, normalized) -> slot
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.isfile(path):
+            self.load()
+
+    # ---------------------- 向量化 ----------------------
+    def _vectorize(self, normalized: str) -> np.ndarray:
+        features = _features(normalized)
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if features:
+            idx = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) % self.dim for f in features), dtype=np.int64, count=len(features)
+            )
+            vec += np.bincount(idx, minlength=self.dim).astype(np.float32)
+            vec /= np.linalg.norm(vec)
+        return vec
+
+    # ---------------------- 查询与写入 ----------------------
+    def lookup(self, question: str, model: str) -> Optional[CachedAnswer]:
+        """查找相似问题的缓存答案；未命中返回 None。"""
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        numbers = question_numbers(question)
+        with self._lock:
+            slot = self._exact.get((model, normalized))
+            similarity = 1.0
+            if slot is None or self._numbers[slot] != numbers:
+                slot, similarity = self._nearest(self._vectorize(normalized), model, numbers)
+            if slot is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._last_used[slot] = time.time()
+            entry = self._entries[slot]
+            return CachedAnswer(entry["question"], entry["answer"], entry["model"], float(similarity))
+
+    def _nearest(self, vec: np.ndarray, model: str, numbers: FrozenSet[str]):
+        candidates = np.flatnonzero(self._active)
+        if not len(candidates):
+            return None, 0.0
+        sims = self._matrix[candidates] @ vec
+        order = np.argsort(-sims)
+        for i in order:
+            slot = int(candidates[i])
+            # 数字或版本号不同的问题即使字面相似也不复用答案
+            if self._entries[slot]["model"] == model and self._numbers[slot] == numbers:
+                return slot, float(sims[i])
+        return None, 0.0
+
+    def put(self, question: str, answer: str, model: str, last_used: Optional[float] = None) -> None:
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        with self._lock:
+            key = (model, normalized)
+            slot = self._exact.get(key)
+            if slot is None:
+                free = np.flatnonzero(~self._active)
+                if len(free):
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self._evict(slot)
+                self._matrix[slot] = self._vectorize(normalized)
+                self._active[slot] = True
+                self._exact[key] = slot
+            self._entries[slot] = {"question": question, "normalized": normalized, "answer": answer, "model": model}
+            self._numbers[slot] = question_numbers(question)
+            self._last_used[slot] = last_used if last_used is not None else time.time()
+
+    def _evict(self, slot: int) -> None:
+        entry = self._entries[slot]
+        if entry is not None:
+            self._exact.pop((entry["model"], entry["normalized"]), None)
+        self._entries[slot] = None
+        self._numbers[slot] = frozenset()
+        self._active[slot] = False
+        self._last_used[slot] = 0.0
+
+    def invalidate_model(self, model: str) -> int:
+        """删除指定模型产生的全部缓存答案，返回删除条数。"""
+        with self._lock:
+            slots = [i for i, e in enumerate(self._entries) if e is not None and e["model"] == model]
+            for slot in slots:
+                self._evict(slot)
+            return len(slots)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in np.flatnonzero(self._active):
+                self._evict(int(slot))
+
+    # ---------------------- 统计与持久化 ----------------------
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": int(self._active.sum()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            items = [
+                dict(self._entries[i], last_used=float(self._last_used[i]))
+                for i in np.flatnonzero(self._active)
+            ]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("保存问答缓存失败: %s", e)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("读取问答缓存失败: %s", e)
+            return
+        for item in sorted(items, key=lambda x: x.get("last_used", 0.0))[-self.capacity:]:
+            self.put(item["question"], item["answer"], item["model"], last_used=item.get("last_used"))
@@ -0,0 +1,239 @@
+"""离线批量转写 + 翻译：会议录音等长音频 -> 带时间戳的双语字幕（SRT / JSONL）。
+
+    transcriber = BatchTranscriber(functools.partial(SpeechRecognitionBackend, 'zh-CN'),
+                                   translation_service, target_language='en', workers=4)
+    stats = transcriber.run('meeting.wav', out_dir='transcripts')
+
+处理方式（内存占用与音频时长无关）：
+1. 按 window_s 的固定窗口流式读取（utils.audio.iter_audio_windows）：WAV 逐窗口 np.memmap 映射，其它格式由 ffmpeg 分块解码
+2. 主进程用 EnergyVAD 切出语音段，分发到进程池识别；同时在途的语音段不超过 max_pending
+3. 每段识别完成后立即提交到线程池翻译（TranslationService），与后续段的识别并行
+4. 结果按时间顺序逐条写出，不在内存中累积整份稿件
+
+识别后端由 recognizer_factory 在每个工作进程中构造一次，须可被 pickle（模块级类或 functools.partial）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from services.speech_pipeline import EnergyVAD
+from utils.audio import iter_audio_windows
+from utils.system import process_rss_mb
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.wma', '.webm', '.mp4')
+
+
+class TranscriptSegment(NamedTuple):
+    index: int
+    start_s: float
+    end_s: float
+    text: str
+    translation: str
+
+
+# ---------------------- 工作进程 ----------------------
+_worker_recognizer = None
+
+
+def _init_worker(recognizer_factory: Callable[[], object]):
+    global _worker_recognizer
+    _worker_recognizer = recognizer_factory()
+
+
+def _recognize(audio: np.ndarray, sample_rate: int) -> str:
+    return _worker_recognizer.recognize(audio, sample_rate)
+
+
+# ---------------------- 输出 ----------------------
+def format_srt_time(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+class TranscriptWriter:
+    """逐条写出字幕：SRT 每条为原文 + 译文两行，JSONL 每行一个 JSON 对象。"""
+
+    def __init__(self, base_path: str, formats: Iterable[str] = ('srt', 'jsonl')):
+        self.paths: Dict[str, str] = {fmt: f"{base_path}.{fmt}" for fmt in formats}
+        self._files = {fmt: open(path, 'w', encoding='utf-8', newline='\n') for fmt, path in self.paths.items()}
+
+    def write(self, segment: TranscriptSegment):
+        srt = self._files.get('srt')
+        if srt is not None:
+            lines = [str(segment.index + 1),
+                     f"{format_srt_time(segment.start_s)} --> {format_srt_time(segment.end_s)}",
+                     segment.text]
+            if segment.translation:
+                lines.append(segment.translation)
+            srt.write("\n".join(lines) + "\n\n")
+        jsonl = self._files.get('jsonl')
+        if jsonl is not None:
+            record = {'index': segment.index, 'start': round(segment.start_s, 3), 'end': round(segment.end_s, 3),
+                      'text': segment.text, 'translation': segment.translation}
+            jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------- 批量任务 ----------------------
+class BatchTranscriber:
+    """长音频转写与翻译。workers=0 时在当前进程内识别（调试或识别后端无法 pickle 时使用）。"""
+
+    def __init__(self, recognizer_factory: Callable[[], object], translation_service=None,
+                 target_language: Optional[str] = None, workers: Optional[int] = None,
+                 translate_workers: int = 4, window_s: float = 30.0, max_pending: Optional[int] = None,
+                 vad_options: Optional[Dict] = None):
+        self.recognizer_factory = recognizer_factory
+        self.translation_service = translation_service
+        self.target_language = target_language
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.translate_workers = translate_workers
+        self.window_s = window_s
+        self.max_pending = max_pending or max(2, self.workers * 2)
+        self.vad_options = vad_options or {}
+
+    def segments(self, path: str) -> Iterator[Tuple[float, float, np.ndarray, int]]:
+        """切出语音段 (开始秒, 结束秒, 样本, 采样率)。"""
+        vad = None
+        for window, rate in iter_audio_windows(path, self.window_s):
+            if vad is None:
+                vad = EnergyVAD(sample_rate=rate, **self.vad_options)
+            for utterance in vad.feed(window, now=0.0):
+                yield utterance.start_s, utterance.end_s, utterance.audio, rate
+        if vad is not None:
+            for utterance in vad.flush(now=0.0):
+                yield utterance.start_s, utterance.end_s, utterance.audio, rate
+
+    def transcribe(self, path: str) -> Iterator[TranscriptSegment]:
+        """按时间顺序产出识别并翻译完成的片段（识别为空的语音段跳过）。"""
+        if self.workers > 0:
+            recognize_pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.recognizer_factory,))
+        else:
+            recognize_pool = ThreadPoolExecutor(1, initializer=_init_worker, initargs=(self.recognizer_factory,))
+        translate_pool = ThreadPoolExecutor(self.translate_workers)
+        pending: deque = deque()
+        jobs: Set[Future] = set()  # 已提交、尚未完成的翻译任务
+        index = 0
+        try:
+            for start_s, end_s, audio, rate in self.segments(path):
+                recognition = recognize_pool.submit(_recognize, audio, rate)
+                pending.append((start_s, end_s, recognition, self._chain(recognition, translate_pool, jobs)))
+                # 在途段数达到上限时等待最早的一段，读取速度受识别速度约束，内存不随时长增长
+                while pending and (len(pending) >= self.max_pending or pending[0][3].done()):
+                    start, end, _recognition, result = pending.popleft()
+                    text, translation = result.result()
+                    if text:
+                        yield TranscriptSegment(index, start, end, text, translation)
+                        index += 1
+            while pending:
+                start, end, _recognition, result = pending.popleft()
+                text, translation = result.result()
+                if text:
+                    yield TranscriptSegment(index, start, end, text, translation)
+                    index += 1
+        finally:
+            # 提前退出时手动取消排队中的任务（shutdown 的 cancel_futures 参数需要 Python 3.9）
+            for _start, _end, recognition, result in pending:
+                result.cancel()
+                recognition.cancel()
+            for job in list(jobs):
+                job.cancel()
+            recognize_pool.shutdown(wait=True)
+            translate_pool.shutdown(wait=True)
+
+    def _chain(self, recognition: Future, translate_pool: ThreadPoolExecutor, jobs: Set[Future]) -> Future:
+        """识别完成后立即提交翻译；返回 (原文, 译文) 的 Future，失败的段落以空文本记录。
+
+        提前退出时 transcribe() 会取消返回的 Future，回调中须先检查其状态再设置结果。
+        """
+        result: Future = Future()
+
+        def _settle(value: Tuple[str, str]):
+            # 已被取消时 set_result 会抛出 InvalidStateError
+            if not result.done():
+                result.set_result(value)
+
+        def _on_translated(job: Future, text: str):
+            jobs.discard(job)
+            _settle((text, "" if job.cancelled() else job.result()))
+
+        def _on_recognized(done: Future):
+            if result.done() or done.cancelled():
+                return
+            try:
+                text = (done.result() or "").strip()
+            except Exception as e:  # noqa: BLE001 - 单段失败不影响整份稿件
+                print(f"[BatchTranscribe] 识别失败: {e}")
+                text = ""
+            if not text or self.translation_service is None:
+                _settle((text, ""))
+                return
+            try:
+                job = translate_pool.submit(self._translate, text)
+            except RuntimeError:  # 线程池已关闭（提前退出）
+                return
+            jobs.add(job)
+            job.add_done_callback(lambda j: _on_translated(j, text))
+
+        recognition.add_done_callback(_on_recognized)
+        return result
+
+    def _translate(self, text: str) -> str:
+        try:
+            return self.translation_service.translate(text, self.target_language)
+        except Exception as e:  # noqa: BLE001
+            print(f"[BatchTranscribe] 翻译失败: {e}")
+            return ""
+
+    def run(self, path: str, out_dir: Optional[str] = None, formats: Iterable[str] = ('srt', 'jsonl')) -> Dict:
+        """转写单个文件，字幕写到 out_dir（默认与音频同目录），返回统计信息。"""
+        out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+        started = time.perf_counter()
+        count = 0
+        audio_end = 0.0
+        with TranscriptWriter(base, formats) as writer:
+            for segment in self.transcribe(path):
+                writer.write(segment)
+                count += 1
+                audio_end = segment.end_s
+        elapsed = time.perf_counter() - started
+        return {'path': path, 'outputs': list(writer.paths.values()), 'segments': count,
+                'audio_s': round(audio_end, 1), 'elapsed_s': round(elapsed, 2), 'rss_mb': process_rss_mb()}
+
+    def run_many(self, paths: Iterable[str], out_dir: Optional[str] = None,
+                 formats: Iterable[str] = ('srt', 'jsonl')) -> List[Dict]:
+        return [self.run(path, out_dir, formats) for path in paths]
+
+
+def collect_audio_files(inputs: Iterable[str]) -> List[str]:
+    """展开输入：目录下的音频文件（不递归）按文件名排序，文件原样保留。"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            names = sorted(n for n in os.listdir(item) if n.lower().endswith(AUDIO_EXTENSIONS))
+            files.extend(os.path.join(item, n) for n in names)
+        else:
+            files.append(item)
+    return files
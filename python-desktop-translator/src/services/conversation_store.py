@@ -0,0 +1,303 @@
+"""本地会话存储：SQLite(WAL) + FTS5 全文索引。
+
+设计要点：
+1. WAL 模式：读（GUI 线程分页/搜索）与写（后台线程）互不阻塞
+2. 写入通过队列交给后台写线程，按批次合并为单个事务提交，GUI 线程只做入队
+3. 分页查询基于 (conversation, id) 索引，按 id 倒序向前翻页，复杂度与历史总量无关
+4. 全文检索使用 FTS5（优先 trigram 分词以支持中文子串匹配），不可用时降级为 LIKE
+
+每个气泡使用独立的 conversation 键（translate / polish / qa / speech）。
+气泡休眠时的界面状态（草稿、窗口位置）以 JSON 存入 ui_state 表，见 save_state / load_state。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StoredMessage(NamedTuple):
+    id: int
+    conversation: str
+    role: str
+    content: str
+    created_at: float
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation, id);
+CREATE TABLE IF NOT EXISTS ui_state (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+_COLUMNS = "m.id, m.conversation, m.role, m.content, m.created_at"
+
+
+class ConversationStore:
+    """持久化消息存储。写入异步批量提交，读取在调用线程同步执行。"""
+
+    def __init__(self, db_path: str, batch_interval: float = 0.2, batch_size: int = 128):
+        self.db_path = db_path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self._local = threading.local()
+        # 各线程的读连接：close() 时统一关闭，否则 Windows 上 WAL/SHM 文件会一直被占用
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._fts_tokenizer = self._init_schema()
+        self._writer = threading.Thread(target=self._writer_loop, name="ConversationStoreWriter", daemon=True)
+        self._writer.start()
+
+    # ---------------------- 连接与表结构 ----------------------
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 只在所属线程中使用；关闭发生在调用 close() 的线程，因此关闭线程检查
+            conn = self._connect(check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def _init_schema(self) -> Optional[str]:
+        """建表并返回实际使用的 FTS5 分词器名称；FTS5 不可用时返回 None。"""
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'messages_fts'"
+            ).fetchone()
+            if row is not None:
+                return "trigram" if "trigram" in (row[0] or "") else "unicode61"
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE messages_fts USING fts5("
+                        f"content, content='messages', content_rowid='id', tokenize='{tokenizer}')"
+                    )
+                except sqlite3.OperationalError:
+                    continue
+                conn.executescript(_FTS_TRIGGERS)
+                # 已有历史数据（旧版本无索引时写入）补建索引
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+                conn.commit()
+                return tokenizer
+            logger.warning("SQLite 未编译 FTS5，会话搜索降级为 LIKE 扫描")
+            return None
+        finally:
+            conn.commit()
+            conn.close()
+
+    # ---------------------- 写入（后台线程） ----------------------
+    def append(self, conversation: str, role: str, content: str) -> None:
+        """异步追加一条消息（立即返回，不阻塞 GUI 线程）。"""
+        if self._closed or not content:
+            return
+        self._queue.put(("msg", (conversation, role, content, time.time())))
+
+    def save_state(self, key: str, state: Dict[str, Any]) -> None:
+        """异步保存一份界面状态（同 key 覆盖）。"""
+        if self._closed:
+            return
+        data = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        self._queue.put(("state", (key, data, time.time())))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前入队的写入全部落盘。"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=5.0)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+
+    def _writer_loop(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch, states, waiters, stop = [], [], [], False
+                deadline = time.monotonic() + self.batch_interval
+                while item is not None:
+                    kind, data = item
+                    if kind == "msg":
+                        batch.append(data)
+                    elif kind == "state":
+                        states.append(data)
+                    else:
+                        # flush 请求：立即提交当前批次
+                        waiters.append(data)
+                        break
+                    if len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                self._write_batch(conn, batch, states)
+                for ev in waiters:
+                    ev.set()
+                if stop:
+                    break
+            # 关闭前写完剩余内容
+            rest, rest_states = [], []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    continue
+                kind, data = item
+                if kind == "msg":
+                    rest.append(data)
+                elif kind == "state":
+                    rest_states.append(data)
+                else:
+                    data.set()
+            self._write_batch(conn, rest, rest_states)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch, states=()) -> None:
+        if not batch and not states:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO messages(conversation, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ui_state(key, data, updated_at) VALUES (?, ?, ?)", states
+                )
+        except sqlite3.Error as e:
+            logger.error("写入会话记录失败(%s 条): %s", len(batch), e)
+
+    # ---------------------- 读取（调用线程） ----------------------
+    def recent(self, conversation: str, limit: int = 30) -> List[StoredMessage]:
+        """返回最近 limit 条消息，按时间正序。"""
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM messages m WHERE m.conversation = ? ORDER BY m.id DESC LIMIT ?",
+            (conversation, limit),
+        ).fetchall()
+        return [StoredMessage(*r) for r in reversed(rows)]
+
+    def page_before(self, conversation: str, before_id: int, limit: int = 30) -> List[StoredMessage]:
+        """返回 id 小于 before_id 的前一页消息，按时间正序。"""
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM messages m WHERE m.conversation = ? AND m.id < ? "
+            "ORDER BY m.id DESC LIMIT ?",
+            (conversation, before_id, limit),
+        ).fetchall()
+        return [StoredMessage(*r) for r in reversed(rows)]
+
+    def load_state(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取 save_state 保存的界面状态；不存在或无法解析时返回 None。"""
+        row = self._reader().execute("SELECT data FROM ui_state WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def count(self, conversation: str) -> int:
+        row = self._reader().execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation = ?", (conversation,)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def search(self, query: str, conversation: Optional[str] = None, limit: int = 20) -> List[StoredMessage]:
+        """全文检索，按相关度排序。多个空格分隔的词之间为 AND 关系。"""
+        terms = [t for t in query.split() if t]
+        if not terms:
+            return []
+        # trigram 分词要求每个词至少 3 个字符，较短的词只能回退到 LIKE
+        min_len = 3 if self._fts_tokenizer == "trigram" else 1
+        if self._fts_tokenizer is None or any(len(t) < min_len for t in terms):
+            return self._search_like(terms, conversation, limit)
+        match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        sql = (
+            f"SELECT {_COLUMNS} FROM messages_fts f JOIN messages m ON m.id = f.rowid "
+            "WHERE messages_fts MATCH ?"
+        )
+        params: list = [match]
+        if conversation is not None:
+            sql += " AND m.conversation = ?"
+            params.append(conversation)
+        sql += " ORDER BY f.rank LIMIT ?"
+        params.append(limit)
+        try:
+            rows = self._reader().execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning("FTS 查询失败，回退 LIKE: %s", e)
+            return self._search_like(terms, conversation, limit)
+        return [StoredMessage(*r) for r in rows]
+
+    def _search_like(self, terms: List[str], conversation: Optional[str], limit: int) -> List[StoredMessage]:
+        clauses = ["m.content LIKE ? ESCAPE '\\'" for _ in terms]
+        params: list = [
+            "%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for t in terms
+        ]
+        if conversation is not None:
+            clauses.append("m.conversation = ?")
+            params.append(conversation)
+        params.append(limit)
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM messages m WHERE {' AND '.join(clauses)} ORDER BY m.id DESC LIMIT ?",
+            params,
+        ).fetchall()
+        return [StoredMessage(*r) for r in rows]
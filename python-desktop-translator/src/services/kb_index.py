@@ -0,0 +1,391 @@
+"""内部知识库本地检索：离线导入 HTML/Markdown 导出文件，构建磁盘倒排索引并用 BM25 打分。
+
+索引目录结构：
+    passages.db          SQLite：文档摘要(用于增量判断)与段落原文、长度、删除标记
+    meta.json            段(segment)列表
+    seg_XXXX_terms.npy   段内词项（已排序，检索时二分查找）
+    seg_XXXX_offsets.npy 每个词项在 postings 中的起止偏移
+    seg_XXXX_ids.npy     postings：段落 id
+    seg_XXXX_tfs.npy     postings：词频
+
+增量更新：每次导入只为新增/变更的文档写一个新段，旧段落打删除标记；段过多或
+删除比例过高时自动合并(compact)。检索时按词项读取 postings（npy 以 mmap 方式加载），
+用 NumPy 向量化累加 BM25 分数，10 万段落规模下单次检索为毫秒级。
+
+分词：英文/数字按词切分并小写化；中日韩文字按字符二元组(bigram)切分，无需额外分词库。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".html", ".htm", ".md", ".markdown", ".txt"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿가-힯]+")
+_CJK_START = "぀"
+
+
+class Passage(NamedTuple):
+    id: int
+    source: str
+    title: str
+    text: str
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    """英文按词、中日韩按字符 bigram 切分。"""
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if run[0] < _CJK_START:
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+# ---------------------- 文档解析与切段 ----------------------
+class _HTMLTextExtractor(HTMLParser):
+    _SKIP = {"script", "style", "noscript", "head"}
+    _BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "section", "article", "table"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skip_depth += 1
+        if tag == "title":
+            self._in_title = True
+        if tag in self._BLOCK:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == "title":
+            self._in_title = False
+        if tag in self._BLOCK:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+_MD_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MD_MARKUP_RE = re.compile(r"^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+\.\s+)|[*_`~]+", re.MULTILINE)
+
+
+def extract_text(path: str) -> Tuple[str, str]:
+    """读取导出文档，返回 (标题, 纯文本)。"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        raw = f.read()
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".html", ".htm"):
+        parser = _HTMLTextExtractor()
+        parser.feed(raw)
+        text = "".join(parser.parts)
+        title = parser.title.strip()
+    else:
+        text = _MD_MARKUP_RE.sub("", _MD_LINK_RE.sub(r"\1", raw))
+        heading = re.search(r"^\s{0,3}#\s+(.+)$", raw, re.MULTILINE)
+        title = heading.group(1).strip() if heading else ""
+    return title or os.path.splitext(os.path.basename(path))[0], text
+
+
+def split_passages(text: str, max_chars: int = 400) -> List[str]:
+    """按空行切段，并把过短的段合并到 max_chars 左右；超长段落按长度硬切。"""
+    passages: List[str] = []
+    current = ""
+    for para in re.split(r"\n\s*\n", text):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        while len(para) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(para[:max_chars])
+            para = para[max_chars:]
+        if current and len(current) + len(para) + 1 > max_chars:
+            passages.append(current)
+            current = para
+        else:
+            current = f"{current} {para}" if current else para
+    if current:
+        passages.append(current)
+    return passages
+
+
+# ---------------------- 索引 ----------------------
+class _Segment:
+    """只读段：词项有序数组 + postings（mmap 加载）。"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.terms = np.load(prefix + "_terms.npy")
+        self.offsets = np.load(prefix + "_offsets.npy", mmap_mode="r")
+        self.ids = np.load(prefix + "_ids.npy", mmap_mode="r")
+        self.tfs = np.load(prefix + "_tfs.npy", mmap_mode="r")
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        i = int(np.searchsorted(self.terms, term))
+        if i >= len(self.terms) or self.terms[i] != term:
+            return None
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.ids[start:end], self.tfs[start:end]
+
+    @staticmethod
+    def write(prefix: str, postings: Dict[str, Dict[int, int]]) -> None:
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        ids: List[int] = []
+        tfs: List[int] = []
+        for i, term in enumerate(terms):
+            plist = postings[term]
+            ids.extend(plist.keys())
+            tfs.extend(plist.values())
+            offsets[i + 1] = len(ids)
+        np.save(prefix + "_terms.npy", np.array(terms, dtype=str) if terms else np.array([], dtype="<U1"))
+        np.save(prefix + "_offsets.npy", offsets)
+        np.save(prefix + "_ids.npy", np.asarray(ids, dtype=np.int32))
+        np.save(prefix + "_tfs.npy", np.minimum(np.asarray(tfs, dtype=np.int64), 65535).astype(np.uint16))
+
+    @staticmethod
+    def remove_files(prefix: str) -> None:
+        for suffix in ("_terms.npy", "_offsets.npy", "_ids.npy", "_tfs.npy"):
+            try:
+                os.remove(prefix + suffix)
+            except OSError:
+                pass
+
+
+class KnowledgeBaseIndex:
+    """磁盘 BM25 倒排索引，支持增量导入与合并。"""
+
+    k1 = 1.2
+    b = 0.75
+    max_segments = 8
+    max_deleted_ratio = 0.3
+
+    def __init__(self, index_dir: str, passage_chars: int = 400):
+        self.index_dir = index_dir
+        self.passage_chars = passage_chars
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(index_dir, "passages.db"), check_same_thread=False)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS docs (path TEXT PRIMARY KEY, digest TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                text TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_passages_source ON passages(source);
+            """
+        )
+        self._meta_path = os.path.join(index_dir, "meta.json")
+        self._meta = self._load_meta()
+        self._segments: List[_Segment] = []
+        self._reload()
+
+    # ---------------------- 元数据与内存统计 ----------------------
+    def _load_meta(self) -> Dict:
+        if os.path.isfile(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"segments": [], "next_segment": 1}
+
+    def _save_meta(self) -> None:
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def _reload(self) -> None:
+        self._segments = [_Segment(os.path.join(self.index_dir, name)) for name in self._meta["segments"]]
+        rows = self._db.execute("SELECT id, length, deleted FROM passages").fetchall()
+        size = (max(r[0] for r in rows) + 1) if rows else 1
+        self._doc_len = np.zeros(size, dtype=np.float32)
+        self._live = np.zeros(size, dtype=bool)
+        if rows:
+            arr = np.asarray(rows, dtype=np.int64)
+            self._doc_len[arr[:, 0]] = arr[:, 1]
+            self._live[arr[:, 0]] = arr[:, 2] == 0
+        self._n_live = int(self._live.sum())
+        self._avgdl = float(self._doc_len[self._live].mean()) if self._n_live else 1.0
+        # BM25 长度归一化项与查询无关，加载时预先计算
+        self._norm = (self.k1 * (1.0 - self.b + self.b * self._doc_len / self._avgdl)).astype(np.float32)
+
+    @property
+    def passage_count(self) -> int:
+        return self._n_live
+
+    # ---------------------- 导入 ----------------------
+    def ingest_directory(self, root: str) -> Dict[str, int]:
+        """导入目录下所有支持的文档；目录中已不存在的文档从索引中删除。"""
+        paths = []
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    paths.append(os.path.join(dirpath, name))
+        return self.ingest(paths, prune_under=root)
+
+    def ingest(self, paths: Iterable[str], prune_under: Optional[str] = None) -> Dict[str, int]:
+        """增量导入文档：内容未变化的跳过，变化的替换其段落。"""
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "passages": 0}
+        with self._lock:
+            known = dict(self._db.execute("SELECT path, digest FROM docs").fetchall())
+            seen = set()
+            postings: Dict[str, Dict[int, int]] = {}
+            next_id = int(self._db.execute("SELECT COALESCE(MAX(id), 0) FROM passages").fetchone()[0]) + 1
+            with self._db:
+                for path in paths:
+                    path = os.path.abspath(path)
+                    seen.add(path)
+                    with open(path, "rb") as f:
+                        digest = hashlib.sha1(f.read()).hexdigest()
+                    if known.get(path) == digest:
+                        stats["unchanged"] += 1
+                        continue
+                    stats["updated" if path in known else "added"] += 1
+                    self._db.execute("UPDATE passages SET deleted = 1 WHERE source = ?", (path,))
+                    self._db.execute("INSERT OR REPLACE INTO docs(path, digest) VALUES (?, ?)", (path, digest))
+                    title, text = extract_text(path)
+                    for passage in split_passages(text, self.passage_chars):
+                        tokens = tokenize(f"{title} {passage}")
+                        if not tokens:
+                            continue
+                        self._db.execute(
+                            "INSERT INTO passages(id, source, title, text, length) VALUES (?, ?, ?, ?, ?)",
+                            (next_id, path, title, passage, len(tokens)),
+                        )
+                        for tok in tokens:
+                            plist = postings.setdefault(tok, {})
+                            plist[next_id] = plist.get(next_id, 0) + 1
+                        next_id += 1
+                        stats["passages"] += 1
+                if prune_under is not None:
+                    root = os.path.abspath(prune_under)
+                    for path in known:
+                        if path not in seen and path.startswith(root):
+                            self._db.execute("UPDATE passages SET deleted = 1 WHERE source = ?", (path,))
+                            self._db.execute("DELETE FROM docs WHERE path = ?", (path,))
+                            stats["removed"] += 1
+            if postings:
+                self._add_segment(postings)
+            self._reload()
+            if self._needs_compaction():
+                self.compact()
+        logger.info("知识库导入完成: %s", stats)
+        return stats
+
+    def _add_segment(self, postings: Dict[str, Dict[int, int]]) -> None:
+        name = "seg_%04d" % self._meta["next_segment"]
+        _Segment.write(os.path.join(self.index_dir, name), postings)
+        self._meta["next_segment"] += 1
+        self._meta["segments"].append(name)
+        self._save_meta()
+
+    def _needs_compaction(self) -> bool:
+        total = int(self._db.execute("SELECT COUNT(*) FROM passages").fetchone()[0])
+        deleted = total - self._n_live
+        return len(self._segments) > self.max_segments or (total and deleted / total > self.max_deleted_ratio)
+
+    def compact(self) -> None:
+        """合并全部段并清理已删除段落。"""
+        with self._lock:
+            postings: Dict[str, Dict[int, int]] = {}
+            for pid, title, text in self._db.execute("SELECT id, title, text FROM passages WHERE deleted = 0"):
+                for tok in tokenize(f"{title} {text}"):
+                    plist = postings.setdefault(tok, {})
+                    plist[pid] = plist.get(pid, 0) + 1
+            old_prefixes = [seg.prefix for seg in self._segments]
+            # 先释放旧段的 mmap 引用，Windows 下才能删除文件
+            self._segments = []
+            self._meta["segments"] = []
+            self._add_segment(postings)
+            with self._db:
+                self._db.execute("DELETE FROM passages WHERE deleted = 1")
+            self._reload()
+            for prefix in old_prefixes:
+                _Segment.remove_files(prefix)
+
+    # ---------------------- 检索 ----------------------
+    def search(self, query: str, k: int = 5) -> List[Passage]:
+        """BM25 检索，返回得分最高的 k 个段落。"""
+        terms = set(tokenize(query))
+        if not terms or not self._n_live:
+            return []
+        with self._lock:
+            scores = np.zeros(len(self._doc_len), dtype=np.float32)
+            norm = self._norm
+            for term in terms:
+                hits = []
+                for postings in (seg.postings(term) for seg in self._segments):
+                    if postings is None:
+                        continue
+                    ids, tfs = postings
+                    # 已删除（尚未合并清理）的段落不计入文档频率，否则删除后 IDF 偏低
+                    live = self._live[ids]
+                    if not live.all():
+                        ids, tfs = ids[live], tfs[live]
+                    if len(ids):
+                        hits.append((ids, tfs))
+                if not hits:
+                    continue
+                df = sum(len(ids) for ids, _ in hits)
+                idf = np.float32(np.log(1.0 + (self._n_live - df + 0.5) / (df + 0.5)))
+                for ids, tfs in hits:
+                    tf = tfs.astype(np.float32)
+                    # 同一段内每个段落 id 唯一，可直接按索引累加
+                    scores[ids] += idf * tf * (self.k1 + 1.0) / (tf + norm[ids])
+            candidates = np.flatnonzero(scores)
+            if not len(candidates):
+                return []
+            if len(candidates) > k:
+                top = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+            else:
+                top = candidates
+            top = top[np.argsort(-scores[top])]
+            ids = [int(i) for i in top]
+            placeholders = ",".join("?" * len(ids))
+            rows = {
+                r[0]: r
+                for r in self._db.execute(
+                    f"SELECT id, source, title, text FROM passages WHERE id IN ({placeholders})", ids
+                )
+            }
+        return [Passage(i, rows[i][1], rows[i][2], rows[i][3], float(scores[i])) for i in ids if i in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._segments = []
+            self._db.close()
+
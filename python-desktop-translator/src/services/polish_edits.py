@@ -0,0 +1,93 @@
+"""文本润色的编辑脚本模式：模型只返回需要替换的片段，本地校验并应用。
+
+长文本润色时，完整重写原文的输出 token 是延迟的主要来源；多数情况下模型只改动
+少量词句。编辑脚本格式（JSON）：
+
+    [{"old": "原文中的片段", "new": "替换后的片段"}, ...]
+
+约定：
+1. old 必须逐字出现在原文中，且各条编辑按在原文中出现的先后顺序排列
+2. 编辑之间不能重叠；old 为空、找不到或顺序错乱均视为无效脚本
+3. 空列表 [] 表示原文无需修改
+
+任何校验失败都抛出 EditScriptError，由调用方回退到完整输出模式。
+"""
+
+from __future__ import annotations
+
+import html
+import json
+from typing import List, NamedTuple, Tuple
+
+
+class EditScriptError(ValueError):
+    """编辑脚本无法解析或无法应用到原文。"""
+
+
+class PolishEdit(NamedTuple):
+    old: str
+    new: str
+
+
+def parse_edit_script(text: str) -> List[PolishEdit]:
+    """解析模型输出的编辑脚本（容忍 ```json 围栏与 {"edits": [...]} 外层）。"""
+    body = (text or "").strip()
+    if body.startswith("```"):
+        first_nl = body.find("\n")
+        body = body[first_nl + 1:] if first_nl != -1 else ""
+        if body.rstrip().endswith("```"):
+            body = body.rstrip()[:-3]
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise EditScriptError(f"编辑脚本不是合法 JSON: {e}") from e
+    if isinstance(data, dict):
+        data = data.get("edits")
+    if not isinstance(data, list):
+        raise EditScriptError("编辑脚本应为列表")
+    edits: List[PolishEdit] = []
+    for item in data:
+        if not isinstance(item, dict):
+            raise EditScriptError("编辑项应为对象")
+        old, new = item.get("old"), item.get("new")
+        if not isinstance(old, str) or not isinstance(new, str) or not old:
+            raise EditScriptError(f"编辑项字段缺失或为空: {item!r}")
+        edits.append(PolishEdit(old, new))
+    return edits
+
+
+def apply_edits(original: str, edits: List[PolishEdit]) -> Tuple[str, List[Tuple[int, int]]]:
+    """按顺序应用编辑，返回 (最终文本, 替换片段在最终文本中的 [start, end) 区间)。"""
+    parts: List[str] = []
+    spans: List[Tuple[int, int]] = []
+    cursor = 0
+    out_len = 0
+    for edit in edits:
+        pos = original.find(edit.old, cursor)
+        if pos == -1:
+            raise EditScriptError(f"原文中找不到待替换片段: {edit.old[:40]!r}")
+        keep = original[cursor:pos]
+        parts.append(keep)
+        out_len += len(keep)
+        parts.append(edit.new)
+        if edit.new:
+            spans.append((out_len, out_len + len(edit.new)))
+        out_len += len(edit.new)
+        cursor = pos + len(edit.old)
+    parts.append(original[cursor:])
+    return "".join(parts), spans
+
+
+def highlight_changes_html(text: str, spans: List[Tuple[int, int]], color: str = "#fff3a0") -> str:
+    """将最终文本转为 HTML 片段，并用背景色标记被替换的区间。"""
+    out: List[str] = []
+    cursor = 0
+    for start, end in spans:
+        out.append(html.escape(text[cursor:start], quote=False))
+        out.append(
+            f'<span style="background-color:{color}; color:#222;">'
+            f"{html.escape(text[start:end], quote=False)}</span>"
+        )
+        cursor = end
+    out.append(html.escape(text[cursor:], quote=False))
+    return "".join(out)
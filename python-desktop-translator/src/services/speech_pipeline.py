@@ -0,0 +1,446 @@
+"""实时语音翻译流水线：麦克风分块采集 -> 语音活动检测(VAD)切分 -> 识别 -> 逐句增量翻译。
+
+三段并行执行，翻译与说话同时进行，而不是等整段说完后才开始：
+
+    采集线程   音频源按 chunk_ms 分块读取，EnergyVAD 在静音超过 hangover_ms 时结束一段语音
+    识别线程   每段语音交给可替换的识别后端（Recognizer.recognize），结果按句末标点切句
+    主线程     每句一完成立即通过 ai_engine 流式翻译，多句的翻译可同时进行
+
+    pipeline = SpeechPipeline(MicrophoneSource(), SpeechRecognitionBackend('zh-CN'),
+                              client, config.build_speech_translation_prompt)
+    pipeline.sentence_ready.connect(...)        # Sentence：识别出的原文
+    pipeline.translation_chunk.connect(...)     # (Sentence, 片段)
+    pipeline.translated.connect(...)            # Sentence：译文与延迟
+    pipeline.start()
+
+测试与离线调试使用 WavFileSource + ScriptedRecognizer 代替麦克风与在线识别。
+延迟从「说完最后一个有声帧」算起，包含 VAD 的静音等待、识别和翻译首字三部分。
+"""
+
+from __future__ import annotations
+
+import queue
+import re
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+from PyQt5 import QtCore
+
+from core.ai_engine import ai_engine
+
+try:
+    import speech_recognition as sr  # type: ignore
+except ImportError:  # 未安装时只能使用离线替身
+    sr = None
+
+
+class Utterance(NamedTuple):
+    audio: np.ndarray       # int16 单声道
+    sample_rate: int
+    start_s: float          # 在音频流中的起止时间（秒）
+    end_s: float
+    speech_end_at: float    # 最后一个有声帧所在分块被采集的时刻（perf_counter）
+    closed_at: float        # VAD 判定语音结束的时刻（perf_counter）
+
+
+# ---------------------- 语音活动检测 ----------------------
+class EnergyVAD:
+    """基于短时能量的 VAD：分帧与 RMS 计算全部向量化，逐帧循环只发生在有声/静音段的边界上。
+
+    阈值取 max(min_rms, 背景噪声 × noise_ratio)，背景噪声由静音帧的能量指数平滑估计。
+    语音开始前保留 pre_roll_ms 的音频，避免切掉首字的辅音。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, min_rms: float = 0.01,
+                 noise_ratio: float = 3.0, hangover_ms: int = 500, min_speech_ms: int = 200,
+                 pre_roll_ms: int = 200, max_utterance_s: float = 15.0):
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.noise_floor = min_rms / noise_ratio
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._pre_roll: deque = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._frames: List[np.ndarray] = []  # 当前语音段（含尾部静音）
+        self._voiced = 0                     # 当前语音段的有声帧数
+        self._silence = 0                    # 当前语音段末尾连续静音帧数
+        self._start_frame = 0
+        self._frame_index = 0                # 已处理的总帧数
+        self._speech_end_at = 0.0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self._frames)
+
+    def frame_energy(self, frames: np.ndarray) -> np.ndarray:
+        """(n, frame_len) int16 -> 每帧 RMS（满幅为 1.0）。"""
+        samples = frames.astype(np.float32) / 32768.0
+        return np.sqrt(np.mean(samples * samples, axis=1))
+
+    def feed(self, chunk: np.ndarray, now: Optional[float] = None) -> List[Utterance]:
+        """送入一块 int16 音频，返回其中结束的语音段。"""
+        now = time.perf_counter() if now is None else now
+        data = np.concatenate((self._remainder, np.asarray(chunk, dtype=np.int16).ravel()))
+        count = len(data) // self.frame_len
+        self._remainder = data[count * self.frame_len:]
+        if not count:
+            return []
+        frames = data[:count * self.frame_len].reshape(count, self.frame_len)
+        energy = self.frame_energy(frames)
+        voiced = energy > max(self.min_rms, self.noise_floor * self.noise_ratio)
+        quiet = energy[~voiced]
+        if quiet.size and not self.in_speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(quiet.mean())
+
+        # 按有声/静音切成若干连续段，逐段推进状态机
+        edges = np.flatnonzero(np.diff(voiced.astype(np.int8))) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [count]))
+        closed = []
+        for begin, end in zip(starts.tolist(), ends.tolist()):
+            if voiced[begin]:
+                self._on_voiced(frames[begin:end], now)
+            else:
+                utterance = self._on_silence(frames[begin:end], now)
+                if utterance is not None:
+                    closed.append(utterance)
+            if self.in_speech and len(self._frames) >= self.max_frames:
+                # 连续说话过长时强制切段，避免识别与翻译迟迟不开始
+                utterance = self._close(now)
+                if utterance is not None:
+                    closed.append(utterance)
+        return closed
+
+    def flush(self, now: Optional[float] = None) -> List[Utterance]:
+        """音频流结束：把尚未结束的语音段作为最后一段返回。"""
+        utterance = self._close(time.perf_counter() if now is None else now) if self.in_speech else None
+        self._remainder = np.zeros(0, dtype=np.int16)
+        return [utterance] if utterance is not None else []
+
+    def _on_voiced(self, frames: np.ndarray, now: float):
+        if not self.in_speech:
+            self._frames = list(self._pre_roll)
+            self._start_frame = self._frame_index - len(self._frames)
+            self._voiced = 0
+            self._pre_roll.clear()
+        self._frames.extend(frames)
+        self._voiced += len(frames)
+        self._silence = 0
+        self._frame_index += len(frames)
+        self._speech_end_at = now
+
+    def _on_silence(self, frames: np.ndarray, now: float) -> Optional[Utterance]:
+        if not self.in_speech:
+            self._pre_roll.extend(frames)
+            self._frame_index += len(frames)
+            return None
+        needed = self.hangover_frames - self._silence
+        tail = frames[:needed]
+        self._frames.extend(tail)
+        self._silence += len(tail)
+        self._frame_index += len(tail)
+        if self._silence < self.hangover_frames:
+            return None
+        utterance = self._close(now)
+        rest = frames[len(tail):]
+        self._pre_roll.extend(rest)
+        self._frame_index += len(rest)
+        return utterance
+
+    def _close(self, now: float) -> Optional[Utterance]:
+        frames, voiced = self._frames, self._voiced
+        self._frames, self._voiced, self._silence = [], 0, 0
+        if voiced < self.min_speech_frames:
+            return None  # 短促噪声（咳嗽、敲击）不算语音
+        start_s = self._start_frame * self.frame_len / self.sample_rate
+        audio = np.concatenate(frames)
+        return Utterance(audio, self.sample_rate, start_s, start_s + len(audio) / self.sample_rate,
+                         self._speech_end_at, now)
+
+
+# ---------------------- 音频源 ----------------------
+class WavFileSource:
+    """从 16 位 PCM WAV 文件分块读取（多声道取平均），用作麦克风的离线替身。
+
+    speed 为 0 时尽快读完；为 1 时按实时速度读取，大于 1 时按倍速读取。
+    """
+
+    def __init__(self, path: str, chunk_ms: int = 100, speed: float = 0.0):
+        self.path = path
+        self.chunk_ms = chunk_ms
+        self.speed = speed
+        self._stop = threading.Event()
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"仅支持 16 位 PCM WAV: {path}")
+            self.sample_rate = wav.getframerate()
+            self.channels = wav.getnchannels()
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        per_chunk = max(1, self.sample_rate * self.chunk_ms // 1000)
+        started = time.perf_counter()
+        read = 0
+        with wave.open(self.path, "rb") as wav:
+            while not self._stop.is_set():
+                raw = wav.readframes(per_chunk)
+                if not raw:
+                    break
+                samples = np.frombuffer(raw, dtype="<i2")
+                if self.channels > 1:
+                    samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+                read += len(samples)
+                if self.speed > 0:
+                    delay = started + read / self.sample_rate / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield samples
+
+    def stop(self):
+        self._stop.set()
+
+
+class MicrophoneSource:
+    """默认麦克风（SpeechRecognition + PyAudio），按 chunk_ms 分块读取 16 位单声道音频。"""
+
+    def __init__(self, sample_rate: int = 16000, chunk_ms: int = 100, device_index: Optional[int] = None):
+        if sr is None:
+            raise RuntimeError("未安装 SpeechRecognition，请执行: pip install SpeechRecognition pyaudio")
+        self.sample_rate = sample_rate
+        self.chunk_size = sample_rate * chunk_ms // 1000
+        try:
+            self._microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate,
+                                             chunk_size=self.chunk_size)
+        except AttributeError as e:  # SpeechRecognition 在缺少 PyAudio 时抛出 AttributeError
+            raise RuntimeError(f"无法打开麦克风: {e}") from e
+        self._stop = threading.Event()
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        with self._microphone as source:
+            while not self._stop.is_set():
+                raw = source.stream.read(self.chunk_size)
+                yield np.frombuffer(raw, dtype="<i2")
+
+    def stop(self):
+        self._stop.set()
+
+
+# ---------------------- 识别后端 ----------------------
+class SpeechRecognitionBackend:
+    """SpeechRecognition 在线识别（Google Web Speech）。"""
+
+    def __init__(self, language: str = "zh-CN"):
+        if sr is None:
+            raise RuntimeError("未安装 SpeechRecognition，请执行: pip install SpeechRecognition")
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio: np.ndarray, sample_rate: int) -> str:
+        data = sr.AudioData(np.asarray(audio, dtype="<i2").tobytes(), sample_rate, 2)
+        try:
+            return self._recognizer.recognize_google(data, language=self.language)
+        except sr.UnknownValueError:  # 没听清
+            return ""
+
+
+class ScriptedRecognizer:
+    """按顺序返回预设文本的识别替身：每段语音消耗一条。"""
+
+    def __init__(self, texts: Iterable[str]):
+        self._texts = iter(texts)
+
+    def recognize(self, audio: np.ndarray, sample_rate: int) -> str:
+        return next(self._texts, "")
+
+
+# 句末标点之后断开；英文句点须后跟空白，避免拆开 3.5 之类的数字
+_SENTENCE_END_RE = re.compile(r"(?<=[。！？!?；;])(?![。！？!?；;])|(?<=\.)(?=\s)")
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点切句；语音段末尾没有标点的部分也算一句（停顿即断句）。"""
+    return [s.strip() for s in _SENTENCE_END_RE.split(text) if s.strip()]
+
+
+# ---------------------- 流水线 ----------------------
+class Sentence:
+    """一句识别结果及其翻译进度与延迟（毫秒，自说完起算）。"""
+
+    __slots__ = ("index", "text", "start_s", "end_s", "speech_end_at", "recognize_ms",
+                 "translation", "first_chunk_ms", "translated_ms")
+
+    def __init__(self, index: int, text: str, utterance: Utterance, recognize_ms: float):
+        self.index = index
+        self.text = text
+        self.start_s = utterance.start_s
+        self.end_s = utterance.end_s
+        self.speech_end_at = utterance.speech_end_at
+        self.recognize_ms = recognize_ms
+        self.translation = ""
+        self.first_chunk_ms: Optional[float] = None
+        self.translated_ms: Optional[float] = None
+
+
+class SpeechPipeline(QtCore.QObject):
+    """实时语音翻译（在 GUI 线程创建与控制，信号均在主线程触发）。"""
+
+    sentence_ready = QtCore.pyqtSignal(object)           # Sentence
+    translation_chunk = QtCore.pyqtSignal(object, str)   # (Sentence, 片段)
+    translated = QtCore.pyqtSignal(object)               # Sentence
+    translation_failed = QtCore.pyqtSignal(object, object)  # (Sentence, 异常对象)
+    failed = QtCore.pyqtSignal(object)                   # 采集/识别的异常对象
+    stopped = QtCore.pyqtSignal()                        # 采集与识别均已结束
+
+    _recognized = QtCore.pyqtSignal(object)              # 识别线程 -> 主线程
+    _worker_failed = QtCore.pyqtSignal(object)
+    _worker_done = QtCore.pyqtSignal()
+
+    def __init__(self, source, recognizer, client, payload_for: Callable[[str], Dict],
+                 vad: Optional[EnergyVAD] = None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.recognizer = recognizer
+        self.client = client
+        self.payload_for = payload_for
+        self.vad = vad or EnergyVAD(sample_rate=source.sample_rate)
+        self._utterances: "queue.Queue[Optional[Utterance]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._requests: set = set()
+        self._delete_when_idle = False
+        self._cancelled = False
+        self._count = 0
+        self.sentences: List[Sentence] = []
+        self.capture_finished_at: Optional[float] = None
+        self._recognized.connect(self._on_recognized, QtCore.Qt.QueuedConnection)
+        self._worker_failed.connect(self.failed, QtCore.Qt.QueuedConnection)
+        self._worker_done.connect(self._on_worker_done, QtCore.Qt.QueuedConnection)
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._cancelled = False
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="SpeechCapture", daemon=True),
+            threading.Thread(target=self._recognize_loop, name="SpeechRecognize", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """停止采集；已切出的语音段仍会识别并翻译完。"""
+        self.source.stop()
+
+    def wait(self, timeout: Optional[float] = None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ---------------- 工作线程 ----------------
+    def _capture_loop(self):
+        try:
+            for chunk in self.source.chunks():
+                for utterance in self.vad.feed(chunk):
+                    self._utterances.put(utterance)
+            for utterance in self.vad.flush():
+                self._utterances.put(utterance)
+        except Exception as e:  # noqa: BLE001 - 麦克风被占用/拔出等
+            self._worker_failed.emit(e)
+        finally:
+            self.capture_finished_at = time.perf_counter()
+            self._utterances.put(None)
+
+    def _recognize_loop(self):
+        while True:
+            utterance = self._utterances.get()
+            if utterance is None:
+                break
+            started = time.perf_counter()
+            try:
+                text = self.recognizer.recognize(utterance.audio, utterance.sample_rate)
+            except Exception as e:  # noqa: BLE001 - 单段识别失败不影响后续
+                self._worker_failed.emit(e)
+                continue
+            recognize_ms = (time.perf_counter() - started) * 1000
+            for piece in split_sentences(text or ""):
+                self._recognized.emit(Sentence(-1, piece, utterance, recognize_ms))
+        self._worker_done.emit()
+
+    # ---------------- 主线程 ----------------
+    def _on_recognized(self, sentence: Sentence):
+        if self._cancelled:
+            return  # cancel() 之后识别出的句子不再翻译
+        sentence.index = self._count
+        self._count += 1
+        self.sentences.append(sentence)
+        self.sentence_ready.emit(sentence)
+        request = ai_engine.stream(self.client, self.payload_for(sentence.text))
+        self._requests.add(request)
+        request.chunk.connect(lambda piece, s=sentence: self._on_chunk(s, piece))
+        request.finished.connect(lambda text, s=sentence, r=request: self._on_translated(s, r, text))
+        request.failed.connect(lambda error, s=sentence, r=request: self._on_failed(s, r, error))
+        # 被取消的译文不完整，不作为最终译文发出
+        request.aborted.connect(lambda _text, r=request: self._request_done(r))
+
+    def _on_chunk(self, sentence: Sentence, piece: str):
+        if sentence.first_chunk_ms is None:
+            sentence.first_chunk_ms = (time.perf_counter() - sentence.speech_end_at) * 1000
+        self.translation_chunk.emit(sentence, piece)
+
+    def _on_translated(self, sentence: Sentence, request, text: str):
+        self._request_done(request)
+        sentence.translation = text
+        sentence.translated_ms = (time.perf_counter() - sentence.speech_end_at) * 1000
+        first = sentence.first_chunk_ms if sentence.first_chunk_ms is not None else sentence.translated_ms
+        print(f"[SpeechPipeline] 第 {sentence.index + 1} 句：说完到译文首字 {first:.0f} ms"
+              f"（识别 {sentence.recognize_ms:.0f} ms），译完 {sentence.translated_ms:.0f} ms")
+        self.translated.emit(sentence)
+
+    def _on_failed(self, sentence: Sentence, request, error):
+        self._request_done(request)
+        self.translation_failed.emit(sentence, error)
+
+    def _on_worker_done(self):
+        self.stopped.emit()
+
+    def cancel(self):
+        """停止采集并取消进行中的翻译（关闭窗口时调用）。"""
+        self._cancelled = True
+        self.stop()
+        for request in list(self._requests):
+            try:
+                request.cancel()
+            except RuntimeError:
+                pass
+        # 被取消的请求随后发射 aborted，届时才从 _requests 中移除
+
+    def delete_when_idle(self):
+        """停止后释放对象：仍有翻译在进行时等其结束再 deleteLater，避免信号发往已删除的对象。"""
+        self._delete_when_idle = True
+        self._request_done(None)
+
+    def _request_done(self, request):
+        self._requests.discard(request)
+        if self._delete_when_idle and not self._requests:
+            self._delete_when_idle = False
+            self.deleteLater()
+
+    # ---------------- 统计 ----------------
+    def latency_report(self) -> Dict[str, float]:
+        """已完成句子的「说完到译文首字」延迟（毫秒）。"""
+        values = np.array([s.first_chunk_ms for s in self.sentences if s.first_chunk_ms is not None])
+        if not values.size:
+            return {'count': 0}
+        return {
+            'count': int(values.size),
+            'p50_ms': round(float(np.percentile(values, 50)), 1),
+            'max_ms': round(float(values.max()), 1),
+        }
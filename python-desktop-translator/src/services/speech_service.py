@@ -1,20 +1,399 @@
-from gtts import gTTS
+"""朗读（TTS）服务：合成在内存中完成，结果按 (文本, 语言, 音色) 缓存，播放在后台音频线程进行。
+
+    speech = SpeechService(language='en')
+    speech.speak(long_translation)   # 立即返回；按句合成并依次播放
+    speech.stop()                    # 停止朗读并丢弃尚未播放的句子
+
+长文本按句切分：合成线程总是提前合成下一句（prefetch 句），播放线程播完一句即可接着播下一句，
+句间不会因等待合成而停顿。输出设备需要的格式转换（如 MP3 解码为 WAV）也在合成线程完成，
+缓存的是转换后的片段，播放线程只负责写入音频帧。合成引擎与输出设备均可替换：
+
+    合成引擎  GTTSEngine（在线，返回 MP3 字节）/ ToneEngine（离线替身，返回 WAV 字节，供测试）
+    输出设备  PyAudioOutput（内存中直接播放，非 WAV 由 ffmpeg 预先解码）/ PlaysoundOutput（写临时文件）
+"""
+
+from __future__ import annotations
+
+import io
+import math
 import os
-import playsound
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.speech_pipeline import split_sentences
+
+try:
+    from gtts import gTTS  # type: ignore
+except ImportError:  # 未安装时只能使用离线引擎
+    gTTS = None
+
+try:
+    import pyaudio  # type: ignore
+except ImportError:
+    pyaudio = None
+
+try:
+    import playsound  # type: ignore
+except ImportError:
+    playsound = None
+
+
+class AudioClip(NamedTuple):
+    data: bytes
+    format: str  # 'mp3' / 'wav'
+
+
+def wav_duration(clip: AudioClip) -> float:
+    """WAV 片段时长（秒）；其它格式返回 0。"""
+    if clip.format != 'wav':
+        return 0.0
+    with wave.open(io.BytesIO(clip.data), 'rb') as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+# ---------------------- 合成引擎 ----------------------
+class GTTSEngine:
+    """Google TTS：合成结果写入内存缓冲区，不落盘。"""
+
+    def __init__(self):
+        if gTTS is None:
+            raise RuntimeError("未安装 gTTS，请执行: pip install gTTS")
+
+    def synthesize(self, text: str, language: str, voice: str = "") -> AudioClip:
+        buffer = io.BytesIO()
+        # gTTS 用顶级域名区分口音（如 com / co.uk），这里把 voice 作为 tld 使用
+        gTTS(text=text, lang=language, tld=voice or "com").write_to_fp(buffer)
+        return AudioClip(buffer.getvalue(), 'mp3')
+
+
+class ToneEngine:
+    """离线替身：按文本长度生成正弦音 WAV，音高随语言与音色变化。"""
+
+    def __init__(self, sample_rate: int = 16000, ms_per_char: float = 60.0):
+        self.sample_rate = sample_rate
+        self.ms_per_char = ms_per_char
+
+    def synthesize(self, text: str, language: str, voice: str = "") -> AudioClip:
+        seconds = max(len(text), 1) * self.ms_per_char / 1000
+        freq = 220.0 + (sum(map(ord, language + voice)) % 12) * 20
+        t = np.arange(int(seconds * self.sample_rate)) / self.sample_rate
+        samples = (0.2 * 32767 * np.sin(2 * math.pi * freq * t)).astype('<i2')
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples.tobytes())
+        return AudioClip(buffer.getvalue(), 'wav')
+
+
+# ---------------------- 缓存 ----------------------
+class AudioCache:
+    """按字节数限制容量的 LRU 缓存（线程安全）。"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[Tuple[str, str, str], AudioClip]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[AudioClip]:
+        with self._lock:
+            clip = self._items.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key: Tuple[str, str, str], clip: AudioClip):
+        if len(clip.data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old.data)
+            self._items[key] = clip
+            self.size += len(clip.data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted.data)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# ---------------------- 输出设备 ----------------------
+def _decode_to_wav(clip: AudioClip) -> AudioClip:
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError(f"播放 {clip.format} 需要 ffmpeg，请安装后加入 PATH")
+    result = subprocess.run([ffmpeg, '-nostdin', '-v', 'error', '-f', clip.format, '-i', 'pipe:0', '-f', 'wav', 'pipe:1'],
+                            input=clip.data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return AudioClip(result.stdout, 'wav')
+
 
+class PyAudioOutput:
+    """通过 PyAudio 直接播放内存中的 WAV；分块写入，stop() 可在句中打断。
+
+    其它格式须先经 prepare() 解码（耗时，应在合成线程中调用）。
+    """
+
+    BLOCK_FRAMES = 1024
+
+    def __init__(self):
+        if pyaudio is None:
+            raise RuntimeError("未安装 PyAudio，请执行: pip install pyaudio")
+        self._audio = pyaudio.PyAudio()
+        self._stop = threading.Event()
+
+    def prepare(self, clip: AudioClip) -> AudioClip:
+        """转换为可直接播放的 WAV。"""
+        return clip if clip.format == 'wav' else _decode_to_wav(clip)
+
+    def play(self, clip: AudioClip):
+        if clip.format != 'wav':
+            raise ValueError(f"PyAudioOutput 只能播放 WAV，{clip.format} 须先经 prepare() 解码")
+        with wave.open(io.BytesIO(clip.data), 'rb') as wav:
+            stream = self._audio.open(format=self._audio.get_format_from_width(wav.getsampwidth()),
+                                      channels=wav.getnchannels(), rate=wav.getframerate(), output=True)
+            try:
+                while not self._stop.is_set():
+                    block = wav.readframes(self.BLOCK_FRAMES)
+                    if not block:
+                        break
+                    stream.write(block)
+            finally:
+                stream.stop_stream()
+                stream.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        """新一轮朗读开始前清除停止标记（不在 play() 中清除，以免丢失刚好在播放前到达的 stop）。"""
+        self._stop.clear()
+
+
+class PlaysoundOutput:
+    """playsound 只能播放文件：写入系统临时目录，播完删除（无法在句中打断）。"""
+
+    def __init__(self):
+        if playsound is None:
+            raise RuntimeError("未安装 playsound，请执行: pip install playsound")
+
+    def prepare(self, clip: AudioClip) -> AudioClip:
+        return clip
+
+    def play(self, clip: AudioClip):
+        handle, path = tempfile.mkstemp(suffix=f".{clip.format}", prefix="xiaokai_tts_")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(clip.data)
+            playsound.playsound(path)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stop(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+def default_output():
+    for output in (PyAudioOutput, PlaysoundOutput):
+        try:
+            return output()
+        except RuntimeError:
+            continue
+    raise RuntimeError("没有可用的音频输出，请安装 pyaudio 或 playsound")
+
+
+# ---------------------- 朗读服务 ----------------------
 class SpeechService:
-    def __init__(self, language='en'):
+    """按句合成与播放；speak() 不阻塞调用线程。"""
+
+    def __init__(self, language: str = 'en', voice: str = "", engine=None, output=None,
+                 cache: Optional[AudioCache] = None, prefetch: int = 1):
         self.language = language
+        self.voice = voice
+        self._engine = engine
+        self._output = output
+        self.cache = cache or AudioCache()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._sentences: "queue.Queue" = queue.Queue()
+        self._clips: "queue.Queue" = queue.Queue(maxsize=max(1, prefetch))
+        self._threads: List[threading.Thread] = []
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+        self._last_end: Optional[float] = None
+        self._played_generation = 0  # 音频线程最近播放的轮次
+        self.gaps_ms: List[float] = []  # 同一次朗读中相邻两句之间的停顿
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = GTTSEngine()
+        return self._engine
+
+    @property
+    def output(self):
+        if self._output is None:
+            self._output = default_output()
+        return self._output
+
+    # ---------------- 对外接口 ----------------
+    def speak(self, text: str):
+        """打断当前朗读，按句朗读 text。"""
+        sentences = split_sentences(text or "")
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._pending = len(sentences)
+            self._last_end = None
+            self.gaps_ms = []
+            if sentences:
+                self._idle.clear()
+            else:
+                self._idle.set()
+        self._drain(self._clips)
+        if self._output is not None:
+            self._output.stop()  # 打断正在播放的句子；新一轮的第一句播放前由音频线程复位
+        self._ensure_threads()
+        for sentence in sentences:
+            self._sentences.put((generation, sentence))
+
+    def text_to_speech(self, text: str):
+        self.speak(text)
+
+    def stop(self):
+        with self._lock:
+            self._generation += 1
+            self._pending = 0
+            self._idle.set()
+        self._drain(self._sentences)
+        self._drain(self._clips)
+        if self._output is not None:
+            self._output.stop()
 
-    def text_to_speech(self, text):
-        tts = gTTS(text=text, lang=self.language)
-        filename = 'temp_audio.mp3'
-        tts.save(filename)
-        playsound.playsound(filename)
-        os.remove(filename)
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待当前朗读结束，返回是否已结束。"""
+        return self._idle.wait(timeout)
+
+    def synthesize(self, text: str) -> AudioClip:
+        """合成单句并转换为输出设备可直接播放的格式（命中缓存时直接返回）。"""
+        key = (text, self.language, self.voice)
+        clip = self.cache.get(key)
+        if clip is None:
+            clip = self.engine.synthesize(text, self.language, self.voice)
+            prepare = getattr(self.output, 'prepare', None)
+            if prepare is not None:
+                clip = prepare(clip)
+            self.cache.put(key, clip)
+        return clip
+
+    def close(self):
+        self.stop()
+        self._sentences.put(None)
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
 
     def set_language(self, language):
         self.language = language
 
     def get_language(self):
-        return self.language
\ No newline at end of file
+        return self.language
+
+    # ---------------- 后台线程 ----------------
+    def _ensure_threads(self):
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(target=self._synth_loop, name="TTSSynth", daemon=True),
+            threading.Thread(target=self._audio_loop, name="TTSAudio", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _synth_loop(self):
+        while True:
+            item = self._sentences.get()
+            if item is None:
+                self._clips.put(None)
+                return
+            generation, sentence = item
+            if generation != self._generation:
+                continue
+            try:
+                clip = self.synthesize(sentence)
+            except Exception as e:  # noqa: BLE001 - 单句失败跳过，继续朗读后面的句子
+                print(f"[SpeechService] 合成失败: {e}")
+                self._sentence_done(generation)
+                continue
+            # 队列满说明已领先播放 prefetch 句；期间被 stop/speak 取代时放弃这一句
+            while generation == self._generation:
+                try:
+                    self._clips.put((generation, clip), timeout=0.05)
+                    break
+                except queue.Full:
+                    continue
+
+    def _audio_loop(self):
+        while True:
+            item = self._clips.get()
+            if item is None:
+                return
+            generation, clip = item
+            if generation != self._generation:
+                continue
+            if generation != self._played_generation:
+                self._played_generation = generation
+                self.output.reset()
+            started = time.perf_counter()
+            if self._last_end is not None:
+                self.gaps_ms.append((started - self._last_end) * 1000)
+            try:
+                self.output.play(clip)
+            except Exception as e:  # noqa: BLE001
+                print(f"[SpeechService] 播放失败: {e}")
+            if generation == self._generation:
+                self._last_end = time.perf_counter()
+            self._sentence_done(generation)
+
+    def _sentence_done(self, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending -= 1
+            if self._pending <= 0:
+                self._idle.set()
+
+    @staticmethod
+    def _drain(q: "queue.Queue"):
+        while True:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                q.put(None)  # 保留退出标记
+                return
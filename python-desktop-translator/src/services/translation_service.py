@@ -3,34 +3,93 @@
 核心职责：
 1. 将纯文本翻译请求委托给 AIClient.translate
 2. 支持批量翻译
-3. 预留语言检测与支持语言查询（当前 One-API 接口未提供，抛出 NotImplementedError）
+3. 本地语言检测（按字符集启发式判断 zh / en / vi，无网络请求）
+4. 译文 LRU 缓存：划词翻译命中缓存时无需请求 AI 服务器
 
 source_language 在当前多轮 prompt 中不单独传递；如果后端未来需要，可在 AppConfig 中新增字段。
 """
 
 from __future__ import annotations
 
-from typing import List
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 
 from config.app_config import AppConfig
 from services.ai_client import AIClient
 
 
+_CJK_RE = re.compile(r"[\u4e00-\u9fff\u3400-\u4dbf]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+# 越南语特有字母（含声调组合），英文文本中基本不会出现
+_VI_RE = re.compile(r"[ăâđêôơưĂÂĐÊÔƠƯạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ]")
+
+
 class TranslationService:
+    CACHE_SIZE = 256
+
     def __init__(self, ai_client: AIClient, config: AppConfig):
         self.ai_client = ai_client
         self.config = config
+        self._cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
 
-    def translate(self, text: str) -> str:
+    def translate(self, text: str, target_language: Optional[str] = None) -> str:
         if not text:
             return ""
-        return self.ai_client.translate(self.config, text)
+        target = target_language or self.config.target_language
+        hit = self.cached(text, target)
+        if hit is not None:
+            return hit
+        payload = self.config.build_translation_prompt(text, target)
+        result = self.ai_client.chat(payload)
+        self.remember(text, result, target)
+        return result
+
+    # ---------------------- 缓存 ----------------------
+    def _key(self, text: str, target: str) -> Tuple[str, str, str]:
+        return (self.config.model, target, text.strip())
+
+    def cached(self, text: str, target_language: Optional[str] = None) -> Optional[str]:
+        key = self._key(text, target_language or self.config.target_language)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def remember(self, text: str, translation: str, target_language: Optional[str] = None) -> None:
+        if not text or not translation:
+            return
+        key = self._key(text, target_language or self.config.target_language)
+        with self._lock:
+            self._cache[key] = translation
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
 
     def batch_translate(self, texts: List[str]) -> List[str]:
         return [self.translate(t) for t in texts]
 
-    def detect_language(self, text: str) -> str:  # pragma: no cover - 未实现
-        raise NotImplementedError("当前后端未提供语言检测接口")
+    def detect_language(self, text: str) -> str:
+        """按字符集粗略判断文本语言：zh / vi / en；无法判断时返回空字符串。"""
+        cjk = len(_CJK_RE.findall(text))
+        latin = len(_LATIN_RE.findall(text))
+        if cjk and cjk >= latin / 4:
+            return "zh"
+        if _VI_RE.search(text):
+            return "vi"
+        if latin:
+            return "en"
+        return ""
+
+    def target_for(self, text: str) -> str:
+        """划词翻译的目标语言：原文已是目标语言时改为译成英文（目标为英文时译成中文）。"""
+        target = self.config.target_language
+        if self.detect_language(text) == target:
+            return "zh" if target == "en" else "en"
+        return target
 
     def get_supported_languages(self) -> List[str]:  # pragma: no cover - 未实现
         # 与 AppConfig target_language 约定的枚举保持一致
@@ -0,0 +1,156 @@
+"""气泡生命周期：隐藏超过一定时间的气泡在保存界面状态后销毁（休眠），再次打开时重建并恢复。
+
+消息本身已由 ConversationStore 持久化，重建后 bind_store 会加载最近的记录；这里额外保存
+输入框草稿与窗口位置（ui_state 表，键为 bubble:<name>）。销毁会连同全部消息组件以及
+问答气泡中的 WebEngine 页面一起释放。
+
+    lifecycle = BubbleLifecycle(names, release=lambda name: ..., store=store, hibernate_after_s=600)
+    lifecycle.watch('qa', bubble)          # 创建气泡后登记，并恢复休眠前的状态
+    lifecycle.report()                     # 托盘「内存占用」显示的文本
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+from core.ai_engine import ai_engine
+from utils.system import process_peak_rss_mb, process_rss_mb
+
+
+class BubbleLifecycle(QtCore.QObject):
+    """跟踪气泡的隐藏时长并按时休眠（仅在 GUI 线程使用）。"""
+
+    hibernated = QtCore.pyqtSignal(str)
+
+    CHECK_INTERVAL_MS = 30000
+    DRAFT_ATTRS = ('input_text', 'question_input')  # 各气泡的输入框属性名
+
+    def __init__(self, names: Iterable[str], release: Callable[[str], None], store=None,
+                 hibernate_after_s: float = 600, parent=None):
+        super().__init__(parent)
+        self.names = list(names)
+        self._release = release
+        self._store = store
+        self.hibernate_after_s = hibernate_after_s
+        self._bubbles: Dict[str, QtWidgets.QWidget] = {}
+        self._hidden_since: Dict[str, float] = {}
+        self._hibernated: set = set()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(self.CHECK_INTERVAL_MS)
+        self._timer.timeout.connect(self.check)
+
+    @property
+    def enabled(self) -> bool:
+        # 没有会话存储时消息无法恢复，不休眠
+        return self._store is not None and self.hibernate_after_s > 0
+
+    # ---------------- 登记与隐藏计时 ----------------
+    def watch(self, name: str, bubble: QtWidgets.QWidget):
+        """登记新建的气泡；若此前休眠过则恢复其界面状态。"""
+        self._bubbles[name] = bubble
+        bubble.installEventFilter(self)
+        if name in self._hibernated:
+            self._hibernated.discard(name)
+            state = self._store.load_state(f"bubble:{name}") if self._store is not None else None
+            if state:
+                self.apply_state(bubble, state)
+        if not bubble.isVisible():
+            self._mark_hidden(name)
+
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype in (QtCore.QEvent.Show, QtCore.QEvent.Hide):
+            name = next((n for n, b in self._bubbles.items() if b is obj), None)
+            if name is not None:
+                if etype == QtCore.QEvent.Show:
+                    self._hidden_since.pop(name, None)
+                else:
+                    self._mark_hidden(name)
+        return super().eventFilter(obj, event)
+
+    def _mark_hidden(self, name: str):
+        self._hidden_since[name] = time.monotonic()
+        if self.enabled and not self._timer.isActive():
+            self._timer.start()
+
+    # ---------------- 休眠 ----------------
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """休眠隐藏时间超过阈值的气泡，返回本次休眠的名称。"""
+        if not self._hidden_since:
+            self._timer.stop()
+        if not self.enabled or ai_engine.active_count:
+            # 仍有请求在流式输出时不销毁，等下一轮
+            return []
+        now = time.monotonic() if now is None else now
+        due = [n for n, since in self._hidden_since.items() if now - since >= self.hibernate_after_s]
+        return [n for n in due if self.hibernate(n)]
+
+    def hibernate(self, name: str) -> bool:
+        bubble = self._bubbles.get(name)
+        if bubble is None or bubble.isVisible():
+            return False
+        self._store.save_state(f"bubble:{name}", self.capture_state(bubble))
+        # 等待消息与状态落盘，重建时才能完整恢复
+        self._store.flush(timeout=2.0)
+        del self._bubbles[name]
+        self._hidden_since.pop(name, None)
+        self._hibernated.add(name)
+        bubble.removeEventFilter(self)
+        self._release(name)
+        bubble.deleteLater()
+        self.hibernated.emit(name)
+        return True
+
+    def capture_state(self, bubble: QtWidgets.QWidget) -> dict:
+        geo = bubble.geometry()
+        state = {'geometry': [geo.x(), geo.y(), geo.width(), geo.height()]}
+        draft = self._draft_input(bubble)
+        if draft is not None and draft.toPlainText():
+            state['draft'] = draft.toPlainText()
+        return state
+
+    def apply_state(self, bubble: QtWidgets.QWidget, state: dict):
+        geometry = state.get('geometry')
+        if geometry and len(geometry) == 4:
+            bubble.setGeometry(*geometry)
+        draft = self._draft_input(bubble)
+        if draft is not None and state.get('draft'):
+            draft.setPlainText(state['draft'])
+
+    def _draft_input(self, bubble):
+        for attr in self.DRAFT_ATTRS:
+            widget = getattr(bubble, attr, None)
+            if widget is not None and hasattr(widget, 'toPlainText'):
+                return widget
+        return None
+
+    # ---------------- 内存报告 ----------------
+    def report(self) -> str:
+        rss = process_rss_mb()
+        if rss is not None:
+            lines = [f"进程内存：{rss:.1f} MB"]
+        else:
+            peak = process_peak_rss_mb()
+            lines = [f"进程内存峰值：{peak:.1f} MB" if peak is not None else "进程内存：未知"]
+        now = time.monotonic()
+        for name in self.names:
+            bubble = self._bubbles.get(name)
+            if bubble is None:
+                lines.append(f"{name}：{'已休眠' if name in self._hibernated else '未创建'}")
+                continue
+            if bubble.isVisible():
+                state = "显示中"
+            else:
+                state = f"已隐藏 {int(now - self._hidden_since.get(name, now))} 秒"
+            history = getattr(bubble, 'history', None)
+            if history is not None and hasattr(history, 'message_count'):
+                state += f"，消息 {history.message_count()} 条 / 组件 {len(history.get_messages())} 个"
+            if getattr(bubble, '_kb_widget', None) is not None:
+                state += "，含知识库网页"
+            lines.append(f"{name}：{state}")
+        if self.enabled:
+            lines.append(f"隐藏超过 {int(self.hibernate_after_s // 60)} 分钟的气泡会自动休眠")
+        return "\n".join(lines)
@@ -1,24 +1,29 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, QListWidget, QListWidgetItem, QLabel, QMessageBox, QAbstractItemView, QStackedWidget
-from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import QPropertyAnimation, QEasingCurve, QRect
 from PyQt5.QtWidgets import QGraphicsOpacityEffect, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
 from PyQt5.QtGui import QPixmap
 from PyQt5 import QtCore, QtGui, QtWidgets
 import os
 import sys
-from services.ai_client import AIClientError
+from core.ai_engine import ai_engine
+from ui.icon_cache import icon_cache
 from ui.theme_manager import theme_manager
 from ui.bubbles.chat_history_area import ChatHistoryArea
-from ui.bubbles.internal_kb import InternalKBWidget
 import importlib.util
 import pathlib
 
 
 class AIQAWidget(QWidget):
-    def __init__(self, config, client):
+    KB_PRELOAD_DELAY_MS = 1500  # 打开问答气泡后多久开始预加载知识库页
+
+    def __init__(self, config, client, store=None, kb_index_provider=None, answer_cache_provider=None):
         super().__init__()
         self.config = config
         self.client = client
+        # 本地知识库检索索引的获取函数（可选），用于为问答注入参考段落；索引首次检索时才加载
+        self._kb_index_provider = kb_index_provider
+        # 相似问题答案缓存的获取函数（可选）；缓存首次提问时才创建
+        self._answer_cache_provider = answer_cache_provider
         self.setWindowTitle("AI Q&A")
         self.setGeometry(180, 180, 500, 600)
         # 关闭该窗口不退出主程序（与托盘常驻一致）
@@ -28,18 +33,17 @@ class AIQAWidget(QWidget):
             pass
         
         # 设置窗口图标
-        try:
-            # 使用正确的相对路径
-            icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons", "ai_qa.png")
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QtGui.QIcon(icon_path))
-            else:
-                # 调试信息
-                print(f"AI问答图标未找到: {icon_path}")
-        except Exception as e:
-            print(f"设置AI问答图标时出错: {e}")
+        icon = icon_cache.icon("ai_qa.png")
+        if not icon.isNull():
+            self.setWindowIcon(icon)
+        else:
+            # 调试信息
+            print(f"AI问答图标未找到: {icon_cache.icons_dir}/ai_qa.png")
         
         self.setup_chat_ui()
+        # 绑定持久化会话：恢复最近消息，向上滚动时分页加载更早记录
+        if store is not None:
+            self.history.bind_store(store, 'qa')
 
     def setup_chat_ui(self):
         """设置聊天界面UI"""
@@ -154,17 +158,19 @@ class AIQAWidget(QWidget):
         qa_layout.addLayout(input_layout)
 
         # ------- Page 1: 内部知识库页 -------
-        # 使用独立组件 InternalKBWidget
-        kb_widget = InternalKBWidget(url="https://chatai.luxcaseict.com/chat/1cedc8977503e931")
-        kb_widget.back_requested.connect(lambda: self._flip_to(0))
+        # InternalKBWidget 依赖 QtWebEngine，首次点击「内部知识库」时才创建（见 _ensure_kb_page）
+        self._kb_widget = None
 
         # 堆叠页组装
         self.stacked.addWidget(qa_page)
-        self.stacked.addWidget(kb_widget)
         self.stacked.setCurrentIndex(0)
         main_layout.addWidget(self.stacked)
         self.setLayout(main_layout)
 
+    def add_message(self, role, content):
+        styles = theme_manager.get_styles()
+        return self.history.add_message(role, content, styles['message_user'], styles['message_ai'])
+
     def _ask(self):
         question = self.question_input.toPlainText().strip()
         if not question:
@@ -173,51 +179,153 @@ class AIQAWidget(QWidget):
         
         # 添加用户消息到对话历史
         self.add_message("user", question)
+        self.history.record("user", question)
         
         # 清空输入框
         self.question_input.clear()
+
+        # 相似问题命中缓存时立即给出答案，不再发起生成
+        if self._answer_from_cache(question):
+            self.question_input.setFocus()
+            return
         
         # 禁用按钮并显示正在处理状态
         self.ask_button.setEnabled(False)
         self.ask_button.setText("Asking...")
-        QtWidgets.QApplication.processEvents()
         
-        try:
-            # 创建AI消息气泡但暂时不设置内容
-            ai_message = self.add_message("ai", "")
-            ai_message.start_streaming()
-            
-            # 构造请求参数
-            payload = self.config.build_qa_prompt(question)
-            
-            # 流式获取AI响应
-            for chunk in self.client.chat_stream(payload):
-                ai_message.stream_text(chunk)
-                QtWidgets.QApplication.processEvents()  # 保持UI响应
-            
-            # 结束流式输出
-            ai_message.end_streaming()
-            # 通知全局 AI 完成事件（用于更新悬浮窗图标等）
-            try:
-                theme_manager.ai_response_complete.emit()
-            except Exception:
-                pass
-        except AIClientError as e:
-            # 添加错误消息到对话历史
-            self.add_message("ai", f"Error: {str(e)}")
-        finally:
-            self.ask_button.setEnabled(True)
-            self.ask_button.setText("Ask AI")
+        # 创建AI消息气泡但暂时不设置内容
+        ai_message = self.add_message("ai", "")
+        ai_message.start_streaming()
+        
+        # 请求参数（命中知识库时注入 top-k 参考段落）在后台线程中构造，检索同样不占用界面线程
+        request = ai_engine.stream(
+            self.client, lambda: self.config.build_qa_prompt(question, self._retrieve_passages(question))
+        )
+        request.chunk.connect(ai_message.stream_text)
+        request.finished.connect(lambda _text: self._on_answer_finished(question, ai_message))
+        request.aborted.connect(lambda _text: self._on_answer_finished(question, ai_message, complete=False))
+        request.failed.connect(lambda error: self._on_answer_failed(ai_message, error))
             
         # 聚焦到输入框
         self.question_input.setFocus()
 
+    def _on_answer_finished(self, question: str, ai_message, complete: bool = True):
+        # 结束流式输出
+        ai_message.end_streaming()
+        self.history.record("ai", ai_message.raw_text)
+        # 被取消的回答不完整，不写入缓存
+        cache = self._answer_cache()
+        if complete and cache is not None:
+            cache.put(question, ai_message.raw_text, self.config.model)
+        self._reset_ask_button()
+        # 通知全局 AI 完成事件（用于更新悬浮窗图标等）
+        try:
+            theme_manager.ai_response_complete.emit()
+        except Exception:
+            pass
+
+    def _on_answer_failed(self, ai_message, error):
+        ai_message.end_streaming()
+        # 添加错误消息到对话历史
+        self.add_message("ai", f"Error: {str(error)}")
+        self._reset_ask_button()
+
+    def _reset_ask_button(self):
+        self.ask_button.setEnabled(True)
+        self.ask_button.setText("Ask AI")
+
+    # ---------------- 答案缓存 ----------------
+    def _answer_cache(self):
+        return self._answer_cache_provider() if self._answer_cache_provider is not None else None
+
+    def _answer_from_cache(self, question: str) -> bool:
+        cache = self._answer_cache()
+        if cache is None:
+            return False
+        cached = cache.lookup(question, self.config.model)
+        if cached is None:
+            return False
+        self.add_message("ai", cached.answer)
+        # 提示记在消息记录上：组件滚出可见区域被回收、重建后仍能显示
+        handle = self.history.message_handle(-1)
+        self.history.set_message_tooltip(
+            handle, f"缓存答案（相似问题：{cached.question}，相似度 {cached.similarity:.2f}）"
+        )
+        if self.config.qa_cache_refresh:
+            # 后台重新生成答案并写回缓存，完成后替换消息内容；
+            # 会话中只保存最终显示的答案，刷新失败或被取消时保存缓存答案
+            request = ai_engine.stream(
+                self.client, lambda: self.config.build_qa_prompt(question, self._retrieve_passages(question))
+            )
+            request.finished.connect(lambda answer: self._on_answer_refreshed(question, handle, cached.answer, answer))
+            request.aborted.connect(lambda _text: self.history.record("ai", cached.answer))
+            request.failed.connect(lambda error: self._on_refresh_failed(cached.answer, error))
+        else:
+            self.history.record("ai", cached.answer)
+        try:
+            theme_manager.ai_response_complete.emit()
+        except Exception:
+            pass
+        return True
+
+    def _on_answer_refreshed(self, question: str, handle, cached_answer: str, answer: str):
+        if not answer:
+            self.history.record("ai", cached_answer)
+            return
+        self._answer_cache().put(question, answer, self.config.model)
+        self.history.record("ai", answer)
+        # 消息组件可能已滚出可见区域被回收；期间可能加载了更早的记录，按句柄而非序号更新
+        self.history.update_message(handle, answer)
+        self.history.set_message_tooltip(handle, "")
+
+    def _on_refresh_failed(self, cached_answer: str, error):
+        print(f"[AIQA] 后台刷新缓存答案失败: {error}")
+        self.history.record("ai", cached_answer)
+
+    def _retrieve_passages(self, question: str):
+        if self._kb_index_provider is None or self.config.kb_top_k <= 0:
+            return []
+        try:
+            kb_index = self._kb_index_provider()
+            return kb_index.search(question, k=self.config.kb_top_k) if kb_index is not None else []
+        except Exception as e:
+            print(f"[AIQA] 知识库检索失败: {e}")
+            return []
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # 问答气泡打开后在后台预加载知识库页，翻页时无需等待站点加载
+        if self._kb_widget is None:
+            QtCore.QTimer.singleShot(self.KB_PRELOAD_DELAY_MS, self._preload_kb)
+
+    def _preload_kb(self):
+        if not self.isVisible():
+            return
+        try:
+            self._ensure_kb_page().load()
+        except ImportError as e:
+            print(f"[AIQA] 知识库预加载跳过: {e}")
+
+    def _ensure_kb_page(self):
+        """首次使用时导入 QtWebEngine 并创建知识库页（页1）"""
+        if self._kb_widget is None:
+            from ui.bubbles.internal_kb import InternalKBWidget
+            self._kb_widget = InternalKBWidget(storage_dir=os.path.join(self.config.data_dir, "webengine"))
+            self._kb_widget.back_requested.connect(lambda: self._flip_to(0))
+            self.stacked.addWidget(self._kb_widget)
+        return self._kb_widget
+
     def _open_internal_kb(self):
         """切换到内部知识库页面，并执行翻页动画。"""
         try:
             print("[AIQA] 内部知识库按钮点击，准备切换到页1")
         except Exception:
             pass
+        try:
+            self._ensure_kb_page()
+        except ImportError as e:
+            QMessageBox.warning(self, "内部知识库", f"无法加载内置浏览器组件：{e}")
+            return
         # 先直接切到目标页，避免动画失败导致无反应
         try:
             self.stacked.setCurrentIndex(1)
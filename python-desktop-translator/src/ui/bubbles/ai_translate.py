@@ -1,13 +1,13 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-import os
 import sys
-from services.ai_client import AIClientError
+from core.ai_engine import ai_engine
 from ui.bubbles.chat_history_area import ChatHistoryArea
+from ui.icon_cache import icon_cache
 from ui.theme_manager import theme_manager
 
 
 class AITranslateBubble(QtWidgets.QWidget):
-    def __init__(self, config, client):
+    def __init__(self, config, client, store=None):
         super().__init__()
         self.config = config
         self.client = client
@@ -20,19 +20,18 @@ class AITranslateBubble(QtWidgets.QWidget):
             pass
         
         # 设置窗口图标
-        try:
-            # 使用正确的相对路径
-            icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons", "ai_translate.png")
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QtGui.QIcon(icon_path))
-            else:
-                # 调试信息
-                print(f"AI翻译图标未找到: {icon_path}")
-        except Exception as e:
-            print(f"设置AI翻译图标时出错: {e}")
+        icon = icon_cache.icon("ai_translate.png")
+        if not icon.isNull():
+            self.setWindowIcon(icon)
+        else:
+            # 调试信息
+            print(f"AI翻译图标未找到: {icon_cache.icons_dir}/ai_translate.png")
         
         self.chat_history = []  # 存储对话历史
         self.setup_chat_ui()
+        # 绑定持久化会话：恢复最近消息，向上滚动时分页加载更早记录
+        if store is not None:
+            self.history.bind_store(store, 'translate')
 
     def setup_chat_ui(self):
         """设置聊天界面UI"""
@@ -200,6 +199,7 @@ class AITranslateBubble(QtWidgets.QWidget):
             
         # 添加用户消息到对话历史
         self.add_message("user", original)
+        self.history.record("user", original)
         
         # 清空输入框
         self.input_text.clear()
@@ -207,29 +207,34 @@ class AITranslateBubble(QtWidgets.QWidget):
         # 禁用按钮并显示正在处理状态
         self.translate_button.setEnabled(False)
         self.translate_button.setText("Translating...")
-        QtWidgets.QApplication.processEvents()
         
-        try:
-            # 创建AI消息气泡但暂时不设置内容
-            ai_message = self.add_message("ai", "")
-            ai_message.start_streaming()
-            
-            # 构造请求参数
-            payload = self.config.build_translation_prompt(original)
-            
-            # 流式获取AI响应
-            for chunk in self.client.chat_stream(payload):
-                ai_message.stream_text(chunk)
-                QtWidgets.QApplication.processEvents()  # 保持UI响应
-            
-            # 结束流式输出
-            ai_message.end_streaming()
-        except AIClientError as e:
-            # 添加错误消息到对话历史
-            self.add_message("ai", f"Error: {str(e)}")
-        finally:
-            self.translate_button.setEnabled(True)
-            self.translate_button.setText("Translate")
+        # 创建AI消息气泡但暂时不设置内容
+        ai_message = self.add_message("ai", "")
+        ai_message.start_streaming()
+        
+        # 构造请求参数，交给后台引擎流式获取AI响应
+        payload = self.config.build_translation_prompt(original)
+        request = ai_engine.stream(self.client, payload)
+        request.chunk.connect(ai_message.stream_text)
+        request.finished.connect(lambda _text: self._on_translate_finished(ai_message))
+        request.aborted.connect(lambda _text: self._on_translate_finished(ai_message))
+        request.failed.connect(lambda error: self._on_translate_failed(ai_message, error))
             
         # 聚焦到输入框
         self.input_text.setFocus()
+
+    def _on_translate_finished(self, ai_message):
+        # 结束流式输出
+        ai_message.end_streaming()
+        self.history.record("ai", ai_message.raw_text)
+        self._reset_translate_button()
+
+    def _on_translate_failed(self, ai_message, error):
+        ai_message.end_streaming()
+        # 添加错误消息到对话历史
+        self.add_message("ai", f"Error: {str(error)}")
+        self._reset_translate_button()
+
+    def _reset_translate_button(self):
+        self.translate_button.setEnabled(True)
+        self.translate_button.setText("Translate")
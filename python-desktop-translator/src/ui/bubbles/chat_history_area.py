@@ -1,50 +1,370 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-from typing import List
+import bisect
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
 from ui.bubbles.message_widget import ChatMessageWidget
 from ui.theme_manager import theme_manager
 
 
+class _MessageRecord:
+    """一条消息的紧凑记录；只有可见（含预留区域）的消息才持有实际组件。"""
+
+    __slots__ = ("role", "content", "height", "widget", "heights", "tooltip")
+
+    def __init__(self, role: str, content: str, height: int):
+        self.role = role
+        self.content = content
+        self.height = height  # 已测量或估算的高度
+        self.widget: Optional[ChatMessageWidget] = None
+        # 已实测的高度：气泡宽度 -> 高度（内容变化时清空），窗口宽度来回调整时无需重新排版
+        self.heights: Optional[Dict[int, int]] = None
+        self.tooltip = ""  # 如"缓存答案"提示；组件重建时重新设置
+
+
 class ChatHistoryArea(QtWidgets.QScrollArea):
-    """可变高度聊天历史区域，使用 QVBoxLayout 自动管理消息组件。"""
+    """虚拟化聊天历史区域：全部消息以紧凑记录保存，仅为可见区域及上下预留区域创建消息组件。
+
+    画布高度由各消息的缓存高度累加得到；组件按绝对坐标摆放，滚出预留区域即销毁
+    （正在流式输出的消息除外），从而使内存与布局开销与会话长度无关。
+    """
+
+    MARGIN_X = 15
+    MARGIN_Y = 8
+    SPACING = 12
+    MIN_HEIGHT = 45
+    OVERSCAN = 400  # 可见区域上下各额外创建的像素范围
+    REFLOW_INTERVAL_MS = 16  # 拖动窗口边缘时每帧最多重排一次
+    MAX_CACHED_WIDTHS = 4
 
     def __init__(self, parent=None):
         super().__init__(parent)
         # 简化配置，使用窗口宽度的80%作为气泡宽度
         self.bubble_width_ratio = 0.8
         self.min_width = 150  # 最小宽度
-        
-        self.setWidgetResizable(True)
+
+        self.setWidgetResizable(False)
         self._container = QtWidgets.QWidget()
-        self._layout = QtWidgets.QVBoxLayout(self._container)
-        self._layout.setContentsMargins(15, 8, 15, 8)
-        self._layout.setSpacing(12)
+        self._container.installEventFilter(self)
         self.setFrameShape(QtWidgets.QFrame.NoFrame)
         self.setHorizontalScrollBarPolicy(getattr(QtCore.Qt, 'ScrollBarAlwaysOff'))
         self.setVerticalScrollBarPolicy(getattr(QtCore.Qt, 'ScrollBarAsNeeded'))
         self.setWidget(self._container)
         self.setStyleSheet("QScrollArea{background:transparent; border:none;} QWidget{background:transparent;}")
 
+        self._records: List[_MessageRecord] = []
+        self._tops: List[int] = []  # 每条消息顶部的 y 坐标（与 _records 对齐）
+        self._user_style = ""
+        self._ai_style = ""
+        self._layout_pending = False
+        self._updating = False  # 防止滚动范围变化触发的重入
+        # 尺寸变化合并为每帧一次重排
+        self._reflow_timer = QtCore.QTimer(self)
+        self._reflow_timer.setSingleShot(True)
+        self._reflow_timer.setInterval(self.REFLOW_INTERVAL_MS)
+        self._reflow_timer.timeout.connect(self._reflow_widths)
+
+        # 持久化会话（可选）：绑定后启动时加载最近消息，滚动到顶部时分页加载更早记录
+        self._store = None
+        self._conversation: Optional[str] = None
+        self._page_size = 30
+        self._oldest_id: Optional[int] = None
+        self._has_more_history = False
+        self._loading_older = False
+        bar = self.verticalScrollBar()
+        if bar is not None:
+            bar.valueChanged.connect(self._on_scroll_value_changed)
+
     def _compute_bubble_width(self, view_w: int) -> int:
         """计算气泡宽度为窗口宽度的80%"""
         width = int(view_w * self.bubble_width_ratio)
         return max(self.min_width, width)
 
+    def _view_width(self) -> int:
+        vw = self.viewport()
+        return vw.width() if vw is not None else 500
 
+    # ---------------- 添加与更新消息 ----------------
     def add_message(self, role: str, content: str, user_style: str, ai_style: str):
-        vw = self.viewport()
-        view_w = vw.width() if vw is not None else 500
-        bubble_w = self._compute_bubble_width(view_w)
-        
-        msg = ChatMessageWidget(role, content, bubble_w, user_style, ai_style)
-        
-        # 根据角色设置对齐方式
-        align = (getattr(QtCore.Qt, 'AlignRight') if role == 'user' 
-                else getattr(QtCore.Qt, 'AlignLeft'))
-        
-        self._layout.addWidget(msg, alignment=align)
+        """追加一条消息并立即创建其组件（新消息总在底部，即将滚动可见）。"""
+        self._user_style, self._ai_style = user_style, ai_style
+        record = _MessageRecord(role, content, self.MIN_HEIGHT)
+        self._records.append(record)
+        msg = self._realize(record)
+        self._remember_height(record, self._measure(msg))
+        self._update_offsets(len(self._records) - 1)
+        self._place(len(self._records) - 1)
         self._scroll_to_bottom_later()
         return msg
 
+    def add_messages(self, items: Iterable[Tuple[str, str]], user_style: str, ai_style: str):
+        """批量追加 (role, content)，只为最终可见的消息创建组件。"""
+        self._user_style, self._ai_style = user_style, ai_style
+        start = len(self._records)
+        bubble_w = self._compute_bubble_width(self._view_width())
+        for role, content in items:
+            self._records.append(_MessageRecord(role, content, self._estimate_height(content, bubble_w)))
+        if len(self._records) > start:
+            self._update_offsets(start)
+            self._scroll_to_bottom_later()
+
+    def message_handle(self, index: int) -> _MessageRecord:
+        """第 index 条消息（支持负数）的句柄；分页加载更早记录后序号会变化，句柄不变。"""
+        return self._records[index]
+
+    def update_message(self, handle: _MessageRecord, content: str):
+        """替换 handle 对应消息的内容（组件已被回收时只更新记录）。"""
+        index = self._index_of(handle)
+        if index is None:
+            return
+        record = self._records[index]
+        record.content = content
+        record.heights = None
+        if record.widget is not None:
+            record.widget.set_markdown(content)
+        else:
+            record.height = self._estimate_height(content, self._compute_bubble_width(self._view_width()))
+            self._update_offsets(index)
+            self._update_visible()
+
+    def set_message_tooltip(self, handle: _MessageRecord, text: str):
+        """设置 handle 对应消息的提示文字（保存在记录上，组件回收重建后仍保留）。"""
+        handle.tooltip = text
+        if handle.widget is not None:
+            handle.widget.setToolTip(text)
+
+    def _index_of(self, handle: _MessageRecord) -> Optional[int]:
+        # 被更新的通常是最近的消息，从末尾开始查找
+        for i in range(len(self._records) - 1, -1, -1):
+            if self._records[i] is handle:
+                return i
+        return None
+
+    def message_count(self) -> int:
+        return len(self._records)
+
+    # ---------------- 记录与组件 ----------------
+    def _create_message(self, role: str, content: str, user_style: str, ai_style: str) -> ChatMessageWidget:
+        bubble_w = self._compute_bubble_width(self._view_width())
+        return ChatMessageWidget(role, content, bubble_w, user_style, ai_style)
+
+    def _realize(self, record: _MessageRecord) -> ChatMessageWidget:
+        msg = self._create_message(record.role, record.content, self._user_style, self._ai_style)
+        msg.setParent(self._container)
+        if record.tooltip:
+            msg.setToolTip(record.tooltip)
+        record.widget = msg
+        msg.show()
+        return msg
+
+    def _unrealize(self, record: _MessageRecord):
+        msg = record.widget
+        record.widget = None
+        if msg is None:
+            return
+        # 组件上可能经 set_markdown 更新过内容，以组件为准
+        if record.content != msg.raw_text:
+            record.content = msg.raw_text
+            record.heights = None
+        # 隐藏持有焦点的组件时 Qt 会把焦点交给下一条消息，QScrollArea 随之滚动过去
+        focus = QtWidgets.QApplication.focusWidget()
+        if focus is not None and (focus is msg or msg.isAncestorOf(focus)):
+            self.setFocus(QtCore.Qt.OtherFocusReason)
+        msg.hide()
+        msg.deleteLater()
+
+    def _measure(self, msg: ChatMessageWidget) -> int:
+        return max(msg.minimumHeight(), self.MIN_HEIGHT)
+
+    def _remember_height(self, record: _MessageRecord, height: int):
+        """记录实测高度，并按当前气泡宽度缓存（等待重排时组件宽度尚未更新，不缓存）。"""
+        record.height = height
+        if self._reflow_timer.isActive():
+            return
+        if record.heights is None:
+            record.heights = {}
+        elif len(record.heights) >= self.MAX_CACHED_WIDTHS:
+            record.heights.pop(next(iter(record.heights)))
+        record.heights[self._compute_bubble_width(self._view_width())] = height
+
+    def _estimate_height(self, content: str, bubble_w: int) -> int:
+        """未创建组件的消息按字符数粗略估算高度，创建后以实测值替换。"""
+        chars_per_line = max(10, (bubble_w - 40) // 7)
+        lines = sum(len(line) // chars_per_line + 1 for line in content.split('\n'))
+        return max(self.MIN_HEIGHT, lines * 18 + 20)
+
+    def _update_offsets(self, start: int = 0):
+        """从 start 起重新累计各消息顶部坐标，并调整画布高度。"""
+        start = max(0, min(start, len(self._tops)))
+        del self._tops[start:]
+        y = self.MARGIN_Y if start == 0 else self._tops[start - 1] + self._records[start - 1].height + self.SPACING
+        heights = (r.height + self.SPACING for r in self._records[start:])
+        self._tops.extend(itertools.accumulate(heights, initial=y))
+        self._tops.pop()  # accumulate 多产生的末尾值
+        total = (self._tops[-1] + self._records[-1].height + self.MARGIN_Y) if self._records else 0
+        self._container.resize(self._view_width(), total)
+        # 画布隐藏时 QScrollArea 不会立即收到尺寸变化，这里同步滚动范围
+        bar = self.verticalScrollBar()
+        vp = self.viewport()
+        if bar is not None and vp is not None:
+            bar.setRange(0, max(0, total - vp.height()))
+
+    def _place(self, index: int):
+        record = self._records[index]
+        msg = record.widget
+        if msg is not None:
+            # 与原 QVBoxLayout 对齐方式一致：行宽取气泡最大宽度加头像，用户消息靠右、AI 消息靠左
+            available = max(0, self._view_width() - 2 * self.MARGIN_X)
+            width = min(available, msg.preferred_width())
+            x = self.MARGIN_X + available - width if record.role == 'user' else self.MARGIN_X
+            msg.setGeometry(x, self._tops[index], width, record.height)
+
+    def _visible_range(self) -> Tuple[int, int]:
+        bar = self.verticalScrollBar()
+        top = bar.value() if bar is not None else 0
+        vp = self.viewport()
+        bottom = top + (vp.height() if vp is not None else 400)
+        lo = max(0, bisect.bisect_right(self._tops, top - self.OVERSCAN) - 1)
+        hi = bisect.bisect_left(self._tops, bottom + self.OVERSCAN)
+        return lo, min(hi, len(self._records))
+
+    def _at_bottom(self) -> bool:
+        bar = self.verticalScrollBar()
+        return bar is not None and bar.value() >= bar.maximum() - 2
+
+    def _update_visible(self):
+        """为可见范围创建组件，回收范围外的组件（流式输出中的消息保留）。"""
+        if not self._records or self._updating:
+            return
+        self._updating = True
+        try:
+            self._realize_visible()
+        finally:
+            self._updating = False
+
+    def _realize_visible(self):
+        at_bottom = self._at_bottom()
+        lo, hi = self._visible_range()
+        for i, record in enumerate(self._records):
+            if record.widget is not None and not lo <= i < hi and not record.widget.is_streaming:
+                self._unrealize(record)
+        changed = None
+        for i in range(lo, hi):
+            record = self._records[i]
+            if record.widget is None:
+                self._realize(record)
+                height = self._measure(record.widget)
+                if height != record.height:
+                    if not at_bottom:
+                        self._shift_for_height_change(i, height - record.height)
+                    changed = i if changed is None else min(changed, i)
+                self._remember_height(record, height)
+            self._place(i)
+        if changed is not None:
+            self._update_offsets(changed)
+            for i in range(changed, hi):
+                self._place(i)
+            if at_bottom:
+                self._scroll_to_max()
+
+    def _shift_for_height_change(self, index: int, delta: int):
+        """视口上方的消息高度变化时同步调整滚动位置，避免内容跳动。"""
+        bar = self.verticalScrollBar()
+        if bar is not None and index < len(self._tops) and self._tops[index] < bar.value():
+            bar.blockSignals(True)
+            bar.setMaximum(bar.maximum() + max(0, delta))
+            bar.setValue(bar.value() + delta)
+            bar.blockSignals(False)
+
+    def _scroll_to_max(self):
+        bar = self.verticalScrollBar()
+        if bar is not None:
+            bar.blockSignals(True)
+            bar.setValue(bar.maximum())
+            bar.blockSignals(False)
+
+    def _schedule_layout(self):
+        if not self._layout_pending:
+            self._layout_pending = True
+            QtCore.QTimer.singleShot(0, self._relayout)
+
+    def _relayout(self):
+        """重新测量已创建组件的高度（如流式输出增长），合并为一次布局更新。"""
+        self._layout_pending = False
+        at_bottom = self._at_bottom()
+        changed = None
+        for i, record in enumerate(self._records):
+            if record.widget is None:
+                continue
+            height = self._measure(record.widget)
+            if height != record.height:
+                if not at_bottom:
+                    self._shift_for_height_change(i, height - record.height)
+                self._remember_height(record, height)
+                changed = i if changed is None else min(changed, i)
+        if changed is not None:
+            self._update_offsets(changed)
+        for i, record in enumerate(self._records):
+            if record.widget is not None:
+                self._place(i)
+        if at_bottom:
+            self._scroll_to_max()
+        self._update_visible()
+
+    def eventFilter(self, obj, event):
+        # 子组件 updateGeometry()（高度变化）会向无布局的父画布投递 LayoutRequest
+        if obj is self._container and event.type() == QtCore.QEvent.LayoutRequest:
+            self._schedule_layout()
+        return super().eventFilter(obj, event)
+
+    # ---------------- 持久化历史 ----------------
+    def bind_store(self, store, conversation: str, initial_limit: int = 30, page_size: int = 30):
+        """绑定会话存储并加载最近 initial_limit 条消息。"""
+        self._store = store
+        self._conversation = conversation
+        self._page_size = page_size
+        rows = store.recent(conversation, initial_limit)
+        styles = theme_manager.get_styles()
+        self.add_messages(((row.role, row.content) for row in rows), styles['message_user'], styles['message_ai'])
+        self._oldest_id = rows[0].id if rows else None
+        self._has_more_history = len(rows) >= initial_limit
+
+    def record(self, role: str, content: str):
+        """将一条已完成的消息写入会话存储（异步批量落盘）。"""
+        if self._store is not None and self._conversation:
+            self._store.append(self._conversation, role, content)
+
+    def _on_scroll_value_changed(self, value: int):
+        self._update_visible()
+        bar = self.verticalScrollBar()
+        if bar is None or value != bar.minimum() or bar.maximum() == bar.minimum():
+            return
+        if self._has_more_history and not self._loading_older:
+            # 延后到本次滚动处理结束后再插入，避免在 valueChanged 中重入
+            self._loading_older = True
+            QtCore.QTimer.singleShot(0, self._load_older_page)
+
+    def _load_older_page(self):
+        self._loading_older = False
+        if self._store is None or self._oldest_id is None:
+            return
+        rows = self._store.page_before(self._conversation, self._oldest_id, self._page_size)
+        self._has_more_history = len(rows) >= self._page_size
+        if not rows:
+            return
+        self._oldest_id = rows[0].id
+        bubble_w = self._compute_bubble_width(self._view_width())
+        older = [_MessageRecord(row.role, row.content, self._estimate_height(row.content, bubble_w)) for row in rows]
+        self._records[0:0] = older
+        self._update_offsets(0)
+        inserted = self._tops[len(older)] - self.MARGIN_Y
+        bar = self.verticalScrollBar()
+        if bar is not None:
+            # 保持用户当前看到的内容不跳动：向下偏移新插入内容的高度
+            bar.setValue(bar.value() + inserted)
+        for i, record in enumerate(self._records):
+            if record.widget is not None:
+                self._place(i)
+
     def _scroll_to_bottom_later(self):
         QtCore.QTimer.singleShot(50, self.scrollToBottom)
 
@@ -52,34 +372,54 @@ class ChatHistoryArea(QtWidgets.QScrollArea):
         bar = self.verticalScrollBar()
         if bar:
             bar.setValue(bar.maximum())
+        self._update_visible()
 
     def _reflow_widths(self):
-        """重新计算所有消息的宽度"""
-        vw = self.viewport()
-        view_w = vw.width() if vw is not None else 500
-        
+        """按当前宽度重排：已创建的组件立即重新测量，其余消息取该宽度下的缓存高度或估算值。
+
+        组件按 (内容版本, 宽度) 缓存文档高度，未创建的消息在滚动进入视口时才实测，
+        因此一次重排的开销只与可见消息数量相关。
+        """
+        self._reflow_timer.stop()
+        view_w = self._view_width()
         bubble_w = self._compute_bubble_width(view_w)
-        for msg in self.get_messages():
-            msg.update_width(bubble_w)
+        # 记录锚点：贴底时保持贴底，否则保持视口顶部那条消息的位置不变
+        bar = self.verticalScrollBar()
+        at_bottom = self._at_bottom()
+        anchor = max(0, bisect.bisect_right(self._tops, bar.value()) - 1) if self._tops else 0
+        anchor_offset = bar.value() - self._tops[anchor] if self._tops else 0
+        for record in self._records:
+            if record.widget is not None:
+                record.widget.update_width(bubble_w)
+                self._remember_height(record, self._measure(record.widget))
+            else:
+                cached = record.heights.get(bubble_w) if record.heights else None
+                record.height = cached if cached is not None else self._estimate_height(record.content, bubble_w)
+        self._update_offsets(0)
+        for i, record in enumerate(self._records):
+            if record.widget is not None:
+                self._place(i)
+        if at_bottom:
+            self._scroll_to_max()
+        elif self._tops:
+            bar.setValue(self._tops[anchor] + anchor_offset)
+        self._update_visible()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        # 延迟重排以确保尺寸正确
-        QtCore.QTimer.singleShot(100, self._reflow_widths)
+        # 拖动窗口边缘会连续产生尺寸事件，合并为每帧最多一次重排
+        if not self._reflow_timer.isActive():
+            self._reflow_timer.start()
 
     def set_width_mode(self, mode: str):
         self._reflow_widths()
 
     def get_messages(self) -> List[ChatMessageWidget]:
-        result = []
-        for i in range(self._layout.count()):
-            item = self._layout.itemAt(i)
-            if item and (widget := item.widget()):
-                if isinstance(widget, ChatMessageWidget):
-                    result.append(widget)
-        return result
+        """当前已创建组件的消息（按显示顺序）。"""
+        return [r.widget for r in self._records if r.widget is not None]
 
     def apply_theme(self):
         styles = theme_manager.get_styles()
+        self._user_style, self._ai_style = styles['message_user'], styles['message_ai']
         for w in self.get_messages():
             w.apply_theme(styles['message_user'], styles['message_ai'])
@@ -1,18 +1,52 @@
+import os
+from typing import Optional
+
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile, QWebEngineView
+
+KB_URL = "https://chatai.luxcaseict.com/chat/1cedc8977503e931"
+# 内网链路较慢：站点资源走持久化磁盘缓存，重启后也无需重新下载
+KB_PROFILE_NAME = "luxcase-kb"
+KB_CACHE_MB = 200
+
+_profile: Optional[QWebEngineProfile] = None
+
+
+def kb_profile(storage_dir: Optional[str] = None) -> QWebEngineProfile:
+    """知识库共用的持久化 WebEngine 配置（磁盘 HTTP 缓存 + 持久 Cookie），进程内只创建一次。
+
+    storage_dir 为空时使用 Qt 默认的数据目录。
+    """
+    global _profile
+    if _profile is None:
+        # 以 QApplication 为父对象：页面在退出前释放（见 InternalKBWidget._release_page），配置随后销毁
+        profile = QWebEngineProfile(KB_PROFILE_NAME, QtCore.QCoreApplication.instance())
+        if storage_dir:
+            profile.setPersistentStoragePath(os.path.join(storage_dir, "storage"))
+            profile.setCachePath(os.path.join(storage_dir, "cache"))
+        profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        profile.setHttpCacheMaximumSize(KB_CACHE_MB * 1024 * 1024)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
+        _profile = profile
+    return _profile
 
 
 class InternalKBWidget(QtWidgets.QWidget):
     """内部知识库页：紧凑头部 + WebEngine 内容视图。
-    发出 back_requested 信号用于返回 QA 页。
+    发出 back_requested 信号用于返回 QA 页。视图在翻页之间复用，只在首次 load() 时请求站点。
     """
     back_requested = QtCore.pyqtSignal()
 
-    def __init__(self, url: str, parent=None):
+    def __init__(self, url: str = KB_URL, parent=None, storage_dir: Optional[str] = None):
         super().__init__(parent)
-        self._init_ui(url)
+        self.url = url
+        self._loading_started = False
+        self._init_ui(storage_dir)
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._release_page)
 
-    def _init_ui(self, url: str):
+    def _init_ui(self, storage_dir: Optional[str]):
         layout = QtWidgets.QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
@@ -35,9 +69,25 @@ class InternalKBWidget(QtWidgets.QWidget):
         header_layout.addStretch()
         header_layout.addWidget(back_btn)
 
-        # 内容视图
+        # 内容视图：页面使用持久化配置
         self.view = QWebEngineView()
-        self.view.setUrl(QtCore.QUrl(url))
+        self.view.setPage(QWebEnginePage(kb_profile(storage_dir), self.view))
 
         layout.addWidget(header)
         layout.addWidget(self.view)
+
+    def load(self):
+        """开始加载站点（可在页面隐藏时调用以后台预加载）；重复调用不会重新请求。"""
+        if not self._loading_started:
+            self._loading_started = True
+            self.view.setUrl(QtCore.QUrl(self.url))
+
+    def showEvent(self, event):
+        self.load()
+        super().showEvent(event)
+
+    def _release_page(self):
+        """退出前释放页面，避免配置先于页面销毁"""
+        page = self.view.page()
+        if page is not None:
+            page.deleteLater()
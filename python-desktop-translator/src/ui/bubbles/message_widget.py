@@ -1,11 +1,11 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-import os
-from typing import Optional
+import html as html_mod
+import re
+from typing import Dict, List, Optional, Union
 
-try:
-    import markdown as _markdown
-except ImportError:  # 运行环境尚未安装 markdown 包时的降级处理
-    _markdown = None
+from core.render_pool import render_pool
+from ui.icon_cache import icon_cache
+from utils.markdown_engine import markdown_engine
 
 # Pygments 用于代码高亮（可选）
 try:
@@ -14,6 +14,139 @@ except ImportError:
     pygments = None
 
 
+# 消息正文基础样式 + codehilite 样式（简化版）
+_MESSAGE_CSS = (
+    "pre {background:#2d2d2d; color:#ccc; padding:8px 10px; border-radius:6px; font-size:12px; white-space:pre-wrap; word-break:break-word; overflow-wrap:anywhere; overflow:hidden;}"
+    "code {font-family:Consolas, monospace; white-space: pre-wrap; word-break: break-word;}"
+    ".codehilite pre {background:#2d2d2d; color:#ccc; padding:8px 10px; border-radius:6px; white-space:pre-wrap; word-break:break-word; overflow-wrap:anywhere;}"
+    ".codehilite .hll {background-color:#444}"
+    "p {white-space: pre-wrap; margin: 0 0 0.6em 0;}"  # 减小段落底部空白避免额外高度
+    "div {white-space: pre-wrap;}"
+    "ul, ol {margin: 0.5em 0; padding-left: 2em;}"
+    "li {margin: 0.2em 0;}"
+    "strong {font-weight: bold;}"
+    "em {font-style: italic;}"
+)
+
+# 代码块工具条（复制 / 折叠）样式
+_CODE_TOOLS_CSS = (
+    '.code-block-wrapper{position:relative; margin:8px 0;}'
+    '.code-tools{position:absolute; top:4px; right:8px; font-size:11px;}'
+    '.code-tools a{color:#fff; background:rgba(0,0,0,0.35); padding:2px 6px; border-radius:4px; text-decoration:none; margin-left:4px;}'
+    '.code-tools a:hover{background:rgba(0,0,0,0.55);}'
+    '.code-content.collapsed{max-height:140px; overflow:hidden; position:relative;}'
+    '.code-content.collapsed:after{content:""; position:absolute; left:0; right:0; bottom:0; height:32px; background:linear-gradient(to bottom, rgba(45,45,45,0), rgba(45,45,45,0.85));}'
+)
+
+_PRE_RE = re.compile(r'<pre>(.*?)</pre>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_FENCE_RE = re.compile(r'(`{3,}|~{3,})')
+_LIST_ITEM_RE = re.compile(r' {0,3}([*+-]|\d+[.)])\s')
+
+
+def closed_block_prefix(text: str) -> int:
+    """返回 text 中已经闭合的 Markdown 块的前缀长度，之后的内容仍可能随流式输入而变化。
+
+    只看完整的行：代码围栏在闭合行结束；其它块在“空行 + 顶格新行”处结束，
+    但列表中的空行后若紧跟新的列表项则视为同一（松散）列表。
+    """
+    closed = 0
+    fence = None
+    blank_seen = False
+    block_is_list = None  # 当前块首行是否为列表项；None 表示当前块尚无内容
+    pos = 0
+    while True:
+        end = text.find('\n', pos)
+        if end == -1:
+            return closed
+        line = text[pos:end]
+        line_start, pos = pos, end + 1
+        if fence is not None:
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                fence = None
+                closed = pos
+                block_is_list = None
+                blank_seen = False
+            continue
+        m = _FENCE_RE.match(line)
+        if m:
+            fence = m.group(1)
+            closed = line_start
+            continue
+        if not line.strip():
+            blank_seen = block_is_list is not None
+            continue
+        if blank_seen and not line[0].isspace():
+            if not (block_is_list and _LIST_ITEM_RE.match(line)):
+                closed = line_start
+                block_is_list = None
+        blank_seen = False
+        if block_is_list is None:
+            block_is_list = bool(_LIST_ITEM_RE.match(line))
+
+
+def _bubble_style(base_style: str) -> str:
+    """气泡内容区样式表；传入样式不包含 border-radius 或 background 时补齐一份默认值。"""
+    if 'border-radius' not in base_style:
+        base_style = base_style.rstrip('}') + ' border-radius:18px;}'
+    if 'background' not in base_style and 'background-color' not in base_style:
+        base_style = base_style.rstrip('}') + ' background-color:rgba(255,255,255,0.9);}'
+    return base_style + "\nQTextBrowser{border:0px solid transparent;}\n"
+
+
+class _CodeBlock:
+    """解析一次的代码块：保存高亮后的内部 HTML，纯文本在复制时才生成，包装 HTML 按折叠状态缓存。
+
+    每个代码块包装为单格表格，在文档中对应一个 QTextTable；代码每行是一个 QTextBlock，
+    折叠/展开只切换这些行的可见性并改写工具条文字，不重新解析 HTML。
+    """
+
+    __slots__ = ("index", "html", "lines", "collapsed", "_plain", "_cell_html")
+
+    PREVIEW_LINES = 8  # 折叠后显示的行数
+
+    def __init__(self, index: int, html: str, collapse_threshold: int):
+        self.index = index
+        self.html = html
+        self.lines = html.count('\n') + 1
+        self.collapsed = self.lines > collapse_threshold
+        self._plain: Optional[str] = None
+        self._cell_html: Optional[str] = None
+
+    @property
+    def plain(self) -> str:
+        if self._plain is None:
+            self._plain = html_mod.unescape(_TAG_RE.sub('', self.html))
+        return self._plain
+
+    @property
+    def label(self) -> str:
+        return "展开" if self.collapsed else "折叠"
+
+    def toggle(self):
+        self.collapsed = not self.collapsed
+        self._cell_html = None
+
+    def cell_html(self) -> str:
+        """单元格内容：工具条 + 代码（折叠时只保留前几行）。"""
+        if self._cell_html is None:
+            self._cell_html = (
+                f'<div class="code-tools">'
+                f'<a href="copy://{self.index}" class="copy-btn">复制</a> '
+                f'<a href="toggle://{self.index}" class="toggle-btn">{self.label}</a>'
+                f'</div>'
+                f'<div class="code-content{" collapsed" if self.collapsed else ""}"><pre>{self.html}</pre></div>'
+            )
+        return self._cell_html
+
+    def render(self) -> str:
+        return (
+            f'<table class="code-block-wrapper" width="100%" cellspacing="0" cellpadding="0" border="0">'
+            f'<tr><td>{self.cell_html()}</td></tr></table>'
+        )
+
+
 class ChatMessageWidget(QtWidgets.QFrame):
     """可渲染 Markdown 的聊天消息组件，自动根据内容调整高度。"""
 
@@ -24,10 +157,15 @@ class ChatMessageWidget(QtWidgets.QFrame):
         # 使用更低的最小宽度以支持超短消息紧凑显示
         self.max_width = max(80, max_width)  # 提高最小宽度到80，确保可读性
         # 代码块增强相关状态
-        self._code_blocks = []  # list[dict]: {'html': str, 'plain': str, 'lines': int, 'collapsed': bool}
-        self._base_html = ""  # 最近一次渲染的原始（未增强）HTML
-        self._enhanced_html = ""  # 包含工具与折叠包装后的HTML
+        self._code_blocks: List[_CodeBlock] = []
+        # 当前消息的结构化片段：普通 HTML 字符串与代码块交替，最终 HTML 由此拼接
+        self._segments: List[Union[str, _CodeBlock]] = []
         self._collapse_line_threshold = 20
+        # 高度缓存：(内容版本, 排版宽度) -> 文档高度；内容或样式变化时版本递增
+        self._content_version = 0
+        self._height_cache = {}
+        # 每次设置内容递增；后台渲染结果返回时据此丢弃过期结果
+        self._render_token = 0
         self.setFrameShape(QtWidgets.QFrame.NoFrame)
         # 去除自身背景，避免形成白色矩形遮挡
         self.setStyleSheet("QFrame{background:transparent;}")
@@ -50,31 +188,24 @@ class ChatMessageWidget(QtWidgets.QFrame):
             # 保持用户头像样式不变
             self.role_label.setStyleSheet("""QLabel {background-color:#3498db; border-radius:14px; color:white; font-weight:bold; font-size:12px;}""")
         else:
-            # AI 头像使用项目图标（Conduct.png），若找不到则回退到绿色背景的文字标签
-            try:
-                # message_widget.py is in src/ui/bubbles -> go up two levels to reach src/icons
-                icon_path = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'icons', 'Conduct.png'))
-                if os.path.exists(icon_path):
-                    pix = QtGui.QPixmap(icon_path)
-                    if not pix.isNull():
-                        # 适配尺寸并设置为标签图像
-                        keep_aspect = getattr(QtCore.Qt, 'KeepAspectRatio')
-                        smooth = getattr(QtCore.Qt, 'SmoothTransformation')
-                        scaled = pix.scaled(28, 28, keep_aspect, smooth)
-                        self.role_label.setPixmap(scaled)
-                        self.role_label.setScaledContents(True)
-                        # 透明背景，圆角由外层绘制实现
-                        self.role_label.setStyleSheet("QLabel{background:transparent;}")
-                    else:
-                        self.role_label.setStyleSheet("""QLabel {background-color:#27ae60; border-radius:14px; color:white; font-weight:bold; font-size:12px;}""")
-                else:
-                    self.role_label.setStyleSheet("""QLabel {background-color:#27ae60; border-radius:14px; color:white; font-weight:bold; font-size:12px;}""")
-            except Exception:
+            # AI 头像使用项目图标（Conduct.png，由 icon_cache 共享缓存），若找不到则回退到绿色背景的文字标签
+            avatar = icon_cache.pixmap('Conduct.png', 28, self.devicePixelRatioF())
+            if avatar is not None:
+                self.role_label.setPixmap(avatar)
+                self.role_label.setScaledContents(True)
+                # 透明背景，圆角由外层绘制实现
+                self.role_label.setStyleSheet("QLabel{background:transparent;}")
+            else:
                 self.role_label.setStyleSheet("""QLabel {background-color:#27ae60; border-radius:14px; color:white; font-weight:bold; font-size:12px;}""")
 
         # 内容部件使用 QTextBrowser 支持基础 HTML，Markdown 转换后展示
         self.content = QtWidgets.QTextBrowser()
         self.content.setOpenExternalLinks(True)
+        # 代码块工具条链接（copy:// / toggle://）由组件自行处理
+        self.content.setOpenLinks(False)
+        self.content.anchorClicked.connect(self._on_anchor_clicked)
+        # insertHtml 插入的片段不会继承文档内的 <style>，样式由文档默认样式表提供
+        self.content.document().setDefaultStyleSheet(_MESSAGE_CSS + _CODE_TOOLS_CSS)
         self.content.setFrameShape(QtWidgets.QFrame.NoFrame)
         self.content.setHorizontalScrollBarPolicy(getattr(QtCore.Qt, 'ScrollBarAlwaysOff'))
         self.content.setVerticalScrollBarPolicy(getattr(QtCore.Qt, 'ScrollBarAlwaysOff'))
@@ -86,13 +217,7 @@ class ChatMessageWidget(QtWidgets.QFrame):
         # 启用文本换行
         self.content.setWordWrapMode(QtGui.QTextOption.WrapAtWordBoundaryOrAnywhere)
         # 为内容区加上圆角并确保背景只在气泡内
-        base_style = (user_style if role == 'user' else ai_style)
-        # 如果用户传入的样式不包含 border-radius 或 background，则补齐一份默认值
-        if 'border-radius' not in base_style:
-            base_style = base_style.rstrip('}') + ' border-radius:18px;}'
-        if 'background' not in base_style and 'background-color' not in base_style:
-            base_style = base_style.rstrip('}') + ' background-color:rgba(255,255,255,0.9);}'
-        self.content.setStyleSheet(base_style + "\nQTextBrowser{border:0px solid transparent;}\n")
+        self.content.setStyleSheet(_bubble_style(user_style if role == 'user' else ai_style))
         # 初始设置内容 - 使用纯文本模式以便支持流式输出
         self.content.setPlainText("")
         self.raw_text = ""
@@ -133,110 +258,49 @@ class ChatMessageWidget(QtWidgets.QFrame):
             self.stream_text(text)
             return
             
-        if _markdown:
-            try:
-                # 使用完整的 Markdown 扩展路径并配置 codehilite，输出 HTML5
-                html = _markdown.markdown(
-                    text,
-                    extensions=[
-                        'markdown.extensions.fenced_code',
-                        'markdown.extensions.tables',
-                        'markdown.extensions.codehilite',
-                        'markdown.extensions.extra',
-                        'markdown.extensions.nl2br',
-                        'markdown.extensions.sane_lists',
-                    ],
-                    extension_configs={
-                        'markdown.extensions.codehilite': {'guess_lang': False}
-                    },
-                    output_format='html'
-                )
-            except Exception:
-                html = self._fallback_html(text)
-        else:
-            html = self._fallback_html(text)
-
-        # 如果包含代码围栏但未成功渲染为 <pre>，进行简易降级包装以避免水平滚动
-        if '```' in text and '<pre' not in html:
-            lines = text.split('\n')
-            collecting = False
-            buffer = []
-            code_segments = []
-            for line in lines:
-                if line.startswith('```') and not collecting:
-                    collecting = True
-                    buffer = []
-                    continue
-                if line.startswith('```') and collecting:
-                    collecting = False
-                    code_segments.append('\n'.join(buffer))
-                    buffer = []
-                    continue
-                if collecting:
-                    buffer.append(line)
-            # 如果解析到代码段但未渲染 <pre>，在末尾追加一个降级代码块，保证可见且可换行
-            for seg in code_segments:
-                escaped = seg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                html += f"<div><pre>{escaped}</pre></div>"
-
-        # 注入基础样式 + codehilite 样式（简化版）
-        style_block = (
-            "<style>"
-            "pre {background:#2d2d2d; color:#ccc; padding:8px 10px; border-radius:6px; font-size:12px; white-space:pre-wrap; word-break:break-word; overflow-wrap:anywhere; overflow:hidden;}"
-            "code {font-family:Consolas, monospace; white-space: pre-wrap; word-break: break-word;}"
-            ".codehilite pre {background:#2d2d2d; color:#ccc; padding:8px 10px; border-radius:6px; white-space:pre-wrap; word-break:break-word; overflow-wrap:anywhere;}"
-            ".codehilite .hll {background-color:#444}"
-            "p {white-space: pre-wrap; margin: 0 0 0.6em 0;}"  # 减小段落底部空白避免额外高度
-            "div {white-space: pre-wrap;}"
-            "ul, ol {margin: 0.5em 0; padding-left: 2em;}"
-            "li {margin: 0.2em 0;}"
-            "strong {font-weight: bold;}"
-            "em {font-style: italic;}"
-            "</style>"
-        )
-        wrapped = f'<div style="white-space:pre-wrap; word-wrap:break-word; background:transparent;">{style_block}{html}</div>'
         self.raw_text = text
-        self._base_html = wrapped
-        # 增强代码块（复制 / 折叠）
-        self._enhanced_html = self._enhance_code_blocks(wrapped)
-        self.content.setHtml(self._enhanced_html)
+        self._render_token += 1
+        if render_pool.should_offload(text):
+            # 大段文本先以纯文本占位，HTML 在子进程中渲染好后再替换
+            token = self._render_token
+            self._code_blocks.clear()
+            self._segments = []
+            self.content.setPlainText(text)
+            self._adjust_height()
+            request = render_pool.render(text)
+            request.finished.connect(lambda html: self._on_html_ready(token, text, html))
+            request.failed.connect(lambda _error: self._on_html_ready(token, text, None))
+            return
+        self._apply_html(self._render_markdown_html(text))
+
+    def _on_html_ready(self, token: int, text: str, html: Optional[str]):
+        try:
+            # 等待期间内容已变化（或开始了流式输出）则丢弃
+            if token != self._render_token or text != self.raw_text or self.is_streaming:
+                return
+            if html is None:
+                html = self._render_markdown_html(text)
+            self._apply_html(html)
+        except RuntimeError:
+            pass  # 组件已销毁
+
+    def _apply_html(self, html: str):
+        # 拆分代码块（复制 / 折叠），再拼接为完整 HTML
+        self._enhance_code_blocks(html)
+        self.content.setHtml(self._assemble_html())
+        self._apply_collapsed(self._code_blocks)
         self._adjust_height()
 
-    def _fallback_html(self, text: str) -> str:
-        # 简易转义并支持一小部分 Markdown 语法（粗体/斜体/行内代码）以做降级显示
-        import re
-        safe = (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
-        # 行内代码： `code` -> <code>code</code>
-        safe = re.sub(r'`([^`]+?)`', r'<code>\1</code>', safe)
-        # 粗体： **bold** 或 __bold__
-        safe = re.sub(r'\*\*([^\*]+?)\*\*', r'<strong>\1</strong>', safe)
-        safe = re.sub(r'__([^_]+?)__', r'<strong>\1</strong>', safe)
-        # 斜体： *italic* 或 _italic_
-        safe = re.sub(r'\*([^\*]+?)\*', r'<em>\1</em>', safe)
-        safe = re.sub(r'_([^_]+?)_', r'<em>\1</em>', safe)
-        # 换行
-        safe = safe.replace('\n', '<br/>')
-        return safe
+    def _render_markdown_html(self, text: str) -> str:
+        """Markdown 转 HTML（未包装样式），由共享引擎渲染并缓存。"""
+        return markdown_engine.render(text)
 
     def _adjust_height(self):
         """根据文档内容计算高度"""
-        doc = self.content.document()
-        if doc is None:
+        if self.content.document() is None:
             return
-            
-        # 使用实际可用宽度计算高度
-        available_width = self.max_width - 10  # 留出边距
-        doc.setTextWidth(available_width)
-        
-        # 获取文档的理想尺寸
-        doc_layout = doc.documentLayout()
-        if doc_layout is not None:
-            ideal_size = doc_layout.documentSize()
-            content_height = int(ideal_size.height())
-        else:
-            # 回退方案：使用默认方式计算高度
-            sz = doc.size()
-            content_height = int(sz.height())
+        # 使用实际可用宽度计算高度（留出边距）
+        content_height = self._document_height(self.max_width - 10)
         
         # 计算最终高度，包含适当的内边距
         final_height = content_height + 20  # 上下内边距
@@ -253,91 +317,60 @@ class ChatMessageWidget(QtWidgets.QFrame):
         # 更新布局
         self.updateGeometry()
 
+    def _document_height(self, width: int) -> int:
+        """文档在给定宽度下的排版高度，按 (内容版本, 宽度) 缓存，避免重复整篇排版。"""
+        key = (self._content_version, width)
+        height = self._height_cache.get(key)
+        if height is None:
+            height = self._layout_height(width)
+            if len(self._height_cache) >= 8:
+                self._height_cache.pop(next(iter(self._height_cache)))
+            self._height_cache[key] = height
+        return height
+
+    def _layout_height(self, width: int) -> int:
+        doc = self.content.document()
+        # 宽度不变时不重设，避免整篇文档重新排版（流式追加时只需排版新增部分）
+        if doc.textWidth() != width:
+            doc.setTextWidth(width)
+        doc_layout = doc.documentLayout()
+        if doc_layout is not None:
+            return int(doc_layout.documentSize().height())
+        # 回退方案：使用默认方式计算高度
+        return int(doc.size().height())
+
+    def _invalidate_height(self):
+        self._content_version += 1
+        self._height_cache.clear()
+
     # ---------------- 代码块增强与交互 ----------------
-    def _enhance_code_blocks(self, html: str) -> str:
-        """扫描 <pre> 代码块并注入复制与折叠按钮包装。返回增强后的 HTML。"""
-        import re, html as html_mod
-        self._code_blocks.clear()
-        # 匹配 <pre>...</pre>（允许内部含任何内容）
-        pattern = re.compile(r'<pre>(.*?)</pre>', re.DOTALL)
-        idx = 0
-        def repl(m):
-            nonlocal idx
-            inner = m.group(1)
-            # Plain 版本：去除多余标签（简单方式）
-            plain = re.sub(r'<[^>]+>', '', inner)
-            # 反转义 HTML 实体
-            plain_unescaped = html_mod.unescape(plain)
-            line_count = plain_unescaped.count('\n') + 1
-            collapsed = line_count > self._collapse_line_threshold
-            self._code_blocks.append({
-                'html': inner,
-                'plain': plain_unescaped,
-                'lines': line_count,
-                'collapsed': collapsed
-            })
-            tools_html = (
-                f'<div class="code-tools">'
-                f'<a href="copy://{idx}" class="copy-btn">复制</a>'
-                f'<a href="toggle://{idx}" class="toggle-btn">{"展开" if collapsed else "折叠"}</a>'
-                f'</div>'
-            )
-            content_div = (
-                f'<div class="code-content{" collapsed" if collapsed else ""}"><pre>{inner}</pre></div>'
-            )
-            wrapper = f'<div class="code-block-wrapper" data-idx="{idx}">{tools_html}{content_div}</div>'
-            idx += 1
-            return wrapper
-        enhanced = pattern.sub(repl, html)
-        # 若未捕获任何 <pre> 但原始文本包含 fenced code，则构造单一代码块包装（降级模式）
-        if len(self._code_blocks) == 0 and '```' in self.raw_text:
-            # 提取 fenced 内容
-            raw = self.raw_text
-            start = raw.find('```')
-            lang_line_end = raw.find('\n', start + 3)
-            if lang_line_end == -1:
-                lang_line_end = start
-            end = raw.rfind('```')
-            code_body = raw[lang_line_end + 1:end].strip() if end > lang_line_end else ''
-            lines = code_body.count('\n') + 1 if code_body else 1
-            collapsed = lines > self._collapse_line_threshold
-            self._code_blocks.append({'html': code_body.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'),
-                                      'plain': code_body,
-                                      'lines': lines,
-                                      'collapsed': collapsed})
-            tools_html = (
-                f'<div class="code-tools">'
-                f'<a href="copy://0" class="copy-btn">复制</a>'
-                f'<a href="toggle://0" class="toggle-btn">{"展开" if collapsed else "折叠"}</a>'
-                f'</div>'
-            )
-            content_div = f'<div class="code-content{" collapsed" if collapsed else ""}"><pre>{self._code_blocks[0]["html"]}</pre></div>'
-            wrapper = f'<div class="code-block-wrapper" data-idx="0">{tools_html}{content_div}</div>'
-            enhanced += wrapper
-        # 注入附加样式
-        style_inject = (
-            '<style>'
-            '.code-block-wrapper{position:relative; margin:8px 0;}'
-            '.code-tools{position:absolute; top:4px; right:8px; font-size:11px;}'
-            '.code-tools a{color:#fff; background:rgba(0,0,0,0.35); padding:2px 6px; border-radius:4px; text-decoration:none; margin-left:4px;}'
-            '.code-tools a:hover{background:rgba(0,0,0,0.55);}'
-            '.code-content.collapsed{max-height:140px; overflow:hidden; position:relative;}'
-            '.code-content.collapsed:after{content:""; position:absolute; left:0; right:0; bottom:0; height:32px; background:linear-gradient(to bottom, rgba(45,45,45,0), rgba(45,45,45,0.85));}'
-            '</style>'
+    def _enhance_code_blocks(self, html: str, append: bool = False) -> str:
+        """把渲染结果拆分为普通片段与代码块（只扫描一次），返回这部分的增强 HTML。
+
+        append=True 用于流式渲染的增量片段：代码块编号接续已有块。
+        """
+        if not append:
+            self._code_blocks.clear()
+            self._segments = []
+        segments: List[Union[str, _CodeBlock]] = []
+        pos = 0
+        for m in _PRE_RE.finditer(html):
+            segments.append(html[pos:m.start()])
+            block = _CodeBlock(len(self._code_blocks), m.group(1), self._collapse_line_threshold)
+            self._code_blocks.append(block)
+            segments.append(block)
+            pos = m.end()
+        segments.append(html[pos:])
+        self._segments.extend(segments)
+        return ''.join(seg if isinstance(seg, str) else seg.render() for seg in segments)
+
+    def _assemble_html(self) -> str:
+        """由缓存的片段拼接完整 HTML（注入基础样式 + codehilite 样式与代码块工具样式）。"""
+        body = ''.join(seg if isinstance(seg, str) else seg.render() for seg in self._segments)
+        return (
+            f'<div style="white-space:pre-wrap; word-wrap:break-word; background:transparent;">'
+            f'<style>{_MESSAGE_CSS}{_CODE_TOOLS_CSS}</style>{body}</div>'
         )
-        if '</style>' in enhanced:
-            # 在原样式后附加（粗略方式）
-            enhanced = enhanced.replace('</style>', '</style>' + style_inject, 1)
-        else:
-            enhanced = style_inject + enhanced
-        # 连接交互信号
-        self.content.setOpenLinks(False)
-        try:
-            self.content.anchorClicked.disconnect(self._on_anchor_clicked)
-        except Exception:
-            pass
-        self.content.anchorClicked.connect(self._on_anchor_clicked)
-        return enhanced
 
     def _on_anchor_clicked(self, url: QtCore.QUrl):  # type: ignore
         href = url.toString()
@@ -355,69 +388,83 @@ class ChatMessageWidget(QtWidgets.QFrame):
             block = self._code_blocks[idx]
             clipboard = QtWidgets.QApplication.clipboard()
             if clipboard is not None:
-                clipboard.setText(block['plain'])
+                clipboard.setText(block.plain)
 
     def _toggle_code_block(self, idx: int):
+        # 流式输出期间文档由增量渲染维护（尾部位置会变化），不处理
+        if self.is_streaming:
+            return
         if 0 <= idx < len(self._code_blocks):
-            self._code_blocks[idx]['collapsed'] = not self._code_blocks[idx]['collapsed']
-            # 重建增强 HTML
-            rebuilt = self._rebuild_enhanced_html()
-            self._enhanced_html = rebuilt
-            self.content.setHtml(rebuilt)
+            block = self._code_blocks[idx]
+            block.toggle()
+            table = self._code_tables().get(idx)
+            if table is None:
+                self.content.setHtml(self._assemble_html())
+                self._apply_collapsed(self._code_blocks)
+            else:
+                self._update_code_table(table, block)
+            self._invalidate_height()
             self._adjust_height()
 
-    def _rebuild_enhanced_html(self) -> str:
-        """根据当前 _code_blocks 折叠状态在 _base_html 基础上重建增强 HTML。"""
-        import re
-        pattern = re.compile(r'<pre>(.*?)</pre>', re.DOTALL)
-        idx = 0
-        def repl(m):
-            nonlocal idx
-            if idx >= len(self._code_blocks):
-                return m.group(0)
-            b = self._code_blocks[idx]
-            inner = b['html']
-            collapsed = b['collapsed']
-            tools_html = (
-                f'<div class="code-tools">'
-                f'<a href="copy://{idx}" class="copy-btn">复制</a>'
-                f'<a href="toggle://{idx}" class="toggle-btn">{"展开" if collapsed else "折叠"}</a>'
-                f'</div>'
-            )
-            content_div = f'<div class="code-content{" collapsed" if collapsed else ""}"><pre>{inner}</pre></div>'
-            wrapper = f'<div class="code-block-wrapper" data-idx="{idx}">{tools_html}{content_div}</div>'
-            idx += 1
-            return wrapper
-        rebuilt = pattern.sub(repl, self._base_html)
-        # 若无 <pre> 模式，采用降级包装重建
-        if '```' in self.raw_text and '<pre' not in self._base_html and len(self._code_blocks) == 1:
-            b = self._code_blocks[0]
-            collapsed = b['collapsed']
-            tools_html = (
-                f'<div class="code-tools">'
-                f'<a href="copy://0" class="copy-btn">复制</a>'
-                f'<a href="toggle://0" class="toggle-btn">{"展开" if collapsed else "折叠"}</a>'
-                f'</div>'
-            )
-            content_div = f'<div class="code-content{" collapsed" if collapsed else ""}"><pre>{b["html"]}</pre></div>'
-            wrapper = f'<div class="code-block-wrapper" data-idx="0">{tools_html}{content_div}</div>'
-            rebuilt = self._base_html + wrapper
-        # 注入样式（若未存在）
-        if 'code-block-wrapper' not in rebuilt:
-            style_inject = (
-                '<style>'
-                '.code-block-wrapper{position:relative; margin:8px 0;}'
-                '.code-tools{position:absolute; top:4px; right:8px; font-size:11px;}'
-                '.code-tools a{color:#fff; background:rgba(0,0,0,0.35); padding:2px 6px; border-radius:4px; text-decoration:none; margin-left:4px;}'
-                '.code-tools a:hover{background:rgba(0,0,0,0.55);}'
-                '.code-content.collapsed{max-height:140px; overflow:hidden; position:relative;}'
-                '.code-content.collapsed:after{content:""; position:absolute; left:0; right:0; bottom:0; height:32px; background:linear-gradient(to bottom, rgba(45,45,45,0), rgba(45,45,45,0.85));}'
-                '</style>'
-            )
-            rebuilt = style_inject + rebuilt
-        return rebuilt
+    def _code_tables(self) -> Dict[int, QtGui.QTextTable]:
+        """文档中代码块编号 -> 对应表格（以单元格开头的复制链接识别）。"""
+        tables = {}
+        frames = list(self.content.document().rootFrame().childFrames())
+        while frames:
+            frame = frames.pop()
+            if isinstance(frame, QtGui.QTextTable):
+                cursor = frame.cellAt(0, 0).firstCursorPosition()
+                cursor.movePosition(QtGui.QTextCursor.NextCharacter)
+                href = cursor.charFormat().anchorHref()
+                if href.startswith('copy://') and href[7:].isdigit():
+                    tables[int(href[7:])] = frame
+            frames.extend(frame.childFrames())
+        return tables
+
+    def _apply_collapsed(self, blocks: List[_CodeBlock]):
+        """隐藏刚插入文档的折叠代码块中预览行之外的行。"""
+        collapsed = [b for b in blocks if b.collapsed]
+        if not collapsed:
+            return
+        tables = self._code_tables()
+        for block in collapsed:
+            table = tables.get(block.index)
+            if table is not None:
+                self._set_lines_visible(table, block)
+
+    def _update_code_table(self, table: QtGui.QTextTable, block: _CodeBlock):
+        """只改写工具条上的折叠/展开文字，并切换代码行可见性。"""
+        tools = table.cellAt(0, 0).firstCursorPosition().block()
+        it = tools.begin()
+        while not it.atEnd():
+            fragment = it.fragment()
+            if fragment.charFormat().anchorHref().startswith('toggle://'):
+                cursor = QtGui.QTextCursor(self.content.document())
+                cursor.setPosition(fragment.position())
+                cursor.setPosition(fragment.position() + fragment.length(), QtGui.QTextCursor.KeepAnchor)
+                cursor.insertText(block.label, fragment.charFormat())
+                break
+            it += 1
+        self._set_lines_visible(table, block)
+
+    def _set_lines_visible(self, table: QtGui.QTextTable, block: _CodeBlock):
+        cell = table.cellAt(0, 0)
+        end = cell.lastCursorPosition().position()
+        line = cell.firstCursorPosition().block().next()  # 第一行是工具条
+        start = line.position()
+        n = 0
+        while line.isValid() and line.position() <= end:
+            line.setVisible(not block.collapsed or n < block.PREVIEW_LINES)
+            n += 1
+            line = line.next()
+        # 可见性变化不会触发重新排版，需显式标记
+        self.content.document().markContentsDirty(start, end - start)
 
     def _on_contents_changed(self):
+        self._invalidate_height()
+        # 流式输出时由每次刷新统一调整一次高度
+        if self.is_streaming:
+            return
         # 文本变化后刷新尺寸并通知父 QListWidgetItem（若已绑定）
         self._adjust_height()
         if hasattr(self, '_bound_item') and self._bound_item is not None:
@@ -435,15 +482,7 @@ class ChatMessageWidget(QtWidgets.QFrame):
             content_width = self.max_width
         
         # 计算高度
-        doc.setTextWidth(content_width - 20)
-        doc_layout = doc.documentLayout()
-        if doc_layout is not None:
-            ideal_size = doc_layout.documentSize()
-            content_height = int(ideal_size.height()) + 25
-        else:
-            # 回退方案
-            sz = doc.size()
-            content_height = int(sz.height()) + 25
+        content_height = self._document_height(content_width - 20) + 25
         
         # 计算总宽度（包含角色标签）
         layout = self.layout()
@@ -455,10 +494,17 @@ class ChatMessageWidget(QtWidgets.QFrame):
         
         return QtCore.QSize(total_width, total_height)
 
+    def preferred_width(self) -> int:
+        """整行宽度：气泡最大宽度加头像与间距。"""
+        return self.max_width + self._side_extra
+
     def update_width(self, new_max_width: int):
         """更新最大宽度限制"""
         # 确保合理的宽度范围
-        self.max_width = max(120, min(new_max_width, 800))
+        new_max_width = max(120, min(new_max_width, 800))
+        if new_max_width == self.max_width:
+            return
+        self.max_width = new_max_width
         self.content.setMaximumWidth(self.max_width)
         self.content.setMinimumWidth(min(100, self.max_width // 2))
         
@@ -471,10 +517,20 @@ class ChatMessageWidget(QtWidgets.QFrame):
             self._bound_item.setSizeHint(self.sizeHint())
 
     # ---------- 流式输出支持 ----------
+    # 增量渲染：raw_text[:_stream_closed] 是已闭合的 Markdown 块，已逐块转为 HTML 追加到文档；
+    # 其后仍在变化的尾部以纯文本显示在文档末尾（从 _tail_pos 开始）。每次刷新只追加新文本，
+    # 有块闭合时才替换尾部，单次刷新的开销与当前块长度相关，而不是与整个回答长度相关。
     def start_streaming(self):
         """开始流式输出模式"""
         self.is_streaming = True
+        self._render_token += 1
         self.stream_buffer = ""
+        self._stream_closed = 0
+        self._code_blocks.clear()
+        self._segments = []
+        self.content.setPlainText(self.raw_text)
+        self._tail_pos = 0
+        self._scroll_target = self._find_scroll_target()
         self.stream_timer.start()
 
     def stream_text(self, text_chunk: str):
@@ -482,72 +538,82 @@ class ChatMessageWidget(QtWidgets.QFrame):
         if self.is_streaming:
             self.stream_buffer += text_chunk
 
+    def _find_scroll_target(self):
+        parent = self.parent()
+        while parent:
+            scroll_method = getattr(parent, 'scrollToBottom', None)
+            if scroll_method and callable(scroll_method):
+                return scroll_method
+            parent = parent.parent()
+        return None
+
     def _flush_stream_buffer(self):
-        """刷新流缓冲区到显示"""
-        if self.stream_buffer:
-            # 每次添加一小段文本以实现打字机效果
-            text_to_add = self.stream_buffer
-            self.stream_buffer = ""
-            
-            # 累积完整文本
-            self.raw_text += text_to_add
-            
-            # 更新内容
-            self.content.setPlainText(self.raw_text)
-            
-            # 滚动到底部
-            cursor = self.content.textCursor()
+        """刷新流缓冲区到显示：只追加新文本，闭合的块渲染为 Markdown。"""
+        if not self.stream_buffer:
+            return
+        text_to_add = self.stream_buffer
+        self.stream_buffer = ""
+        self.raw_text += text_to_add
+
+        closed = self._stream_closed + closed_block_prefix(self.raw_text[self._stream_closed:])
+        cursor = QtGui.QTextCursor(self.content.document())
+        if closed > self._stream_closed:
+            block = self.raw_text[self._stream_closed:closed]
+            self._stream_closed = closed
+            self._replace_tail(cursor, block)
+            cursor.insertText(self.raw_text[closed:], QtGui.QTextCharFormat())
+        else:
             cursor.movePosition(QtGui.QTextCursor.End)
-            self.content.setTextCursor(cursor)
-            
-            # 确保父级聊天历史区域也滚动到底部
-            parent = self.parent()
-            while parent:
-                scroll_method = getattr(parent, 'scrollToBottom', None)
-                if scroll_method and callable(scroll_method):
-                    scroll_method()
-                    break
-                parent = parent.parent()
-            
-            # 节流高度刷新
-            QtCore.QTimer.singleShot(30, self._adjust_height)
+            cursor.insertText(text_to_add, QtGui.QTextCharFormat())
+
+        self._adjust_height()
+        # 确保父级聊天历史区域也滚动到底部
+        if self._scroll_target is None:
+            self._scroll_target = self._find_scroll_target()
+        if self._scroll_target is not None:
+            self._scroll_target()
+
+    def _replace_tail(self, cursor: QtGui.QTextCursor, block: str):
+        """删除尾部纯文本，插入刚闭合块的 HTML，并在其后开启新的空段落作为新尾部。"""
+        cursor.setPosition(self._tail_pos)
+        cursor.movePosition(QtGui.QTextCursor.End, QtGui.QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        html = self._render_markdown_html(block)
+        first_new = len(self._code_blocks)
+        fragment = self._enhance_code_blocks(html, append=True)
+        cursor.insertHtml(fragment)
+        cursor.insertBlock(QtGui.QTextBlockFormat(), QtGui.QTextCharFormat())
+        self._tail_pos = cursor.position()
+        self._apply_collapsed(self._code_blocks[first_new:])
 
     def end_streaming(self):
-        """流式输出结束，确保所有内容都已刷新。"""
+        """流式输出结束：渲染剩余尾部，不再整体重新解析全文。"""
         # 停止定时器并确保缓冲区中的任何剩余内容都被刷新
         self._flush_stream_buffer()
         self.stream_timer.stop()
-        self.is_streaming = False
-        # 确保流结束后，完整内容被作为 Markdown 渲染
-        final_text = self.raw_text
         self.stream_buffer = ""  # 清空缓冲区
-        self.set_markdown(final_text)
+        if self.is_streaming:
+            cursor = QtGui.QTextCursor(self.content.document())
+            tail = self.raw_text[self._stream_closed:]
+            if tail.strip():
+                self._stream_closed = len(self.raw_text)
+                self._replace_tail(cursor, tail)
+            # 去掉末尾为尾部预留的空段落
+            cursor.setPosition(max(0, self._tail_pos - 1))
+            cursor.movePosition(QtGui.QTextCursor.End, QtGui.QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        self.is_streaming = False
         self._adjust_height()
 
     def apply_theme(self, user_style: str, ai_style: str):
-        """应用主题样式"""
-        base_style = (user_style if self.role == 'user' else ai_style)
-        # 如果用户传入的样式不包含 border-radius 或 background，则补齐一份默认值
-        if 'border-radius' not in base_style:
-            base_style = base_style.rstrip('}') + ' border-radius:18px;}'
-        if 'background' not in base_style and 'background-color' not in base_style:
-            base_style = base_style.rstrip('}') + ' background-color:rgba(255,255,255,0.9);}'
-        self.content.setStyleSheet(base_style + "\nQTextBrowser{border:0px solid transparent;}\n")
-        
-        # 重新应用内容以确保样式正确更新
-        if hasattr(self, 'raw_text') and self.raw_text:
-            self.set_markdown(self.raw_text)
-        # 更新 AI 头像（如果是 AI 消息且图标存在）
-        if self.role == 'ai':
-            try:
-                icon_path = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'icons', 'Conduct.png'))
-                if os.path.exists(icon_path):
-                    pix = QtGui.QPixmap(icon_path)
-                    if not pix.isNull():
-                        keep_aspect = getattr(QtCore.Qt, 'KeepAspectRatio')
-                        smooth = getattr(QtCore.Qt, 'SmoothTransformation')
-                        scaled = pix.scaled(28, 28, keep_aspect, smooth)
-                        self.role_label.setPixmap(scaled)
-                        self.role_label.setStyleSheet("QLabel{background:transparent;}")
-            except Exception:
-                pass
+        """应用主题样式：只替换气泡样式表，不重新解析 Markdown、不重新加载头像。
+
+        正文未指定颜色的文字取自控件调色板，随样式表更新；代码块配色与主题无关。
+        """
+        style = _bubble_style(user_style if self.role == 'user' else ai_style)
+        if style == self.content.styleSheet():
+            return
+        self.content.setStyleSheet(style)
+        # 字体等可能随主题变化，只需重新排版
+        self._invalidate_height()
+        self._adjust_height()
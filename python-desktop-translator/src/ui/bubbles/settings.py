@@ -1,6 +1,6 @@
-from PyQt5 import QtWidgets, QtCore, QtGui
-import os
+from PyQt5 import QtWidgets, QtCore
 import sys
+from ui.icon_cache import icon_cache
 
 
 class SettingsBubble(QtWidgets.QWidget):
@@ -19,16 +19,12 @@ class SettingsBubble(QtWidgets.QWidget):
             pass
         
         # 设置窗口图标
-        try:
-            # 使用正确的相对路径
-            icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons", "settings.png")
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QtGui.QIcon(icon_path))
-            else:
-                # 调试信息
-                print(f"设置图标未找到: {icon_path}")
-        except Exception as e:
-            print(f"设置图标时出错: {e}")
+        icon = icon_cache.icon("settings.png")
+        if not icon.isNull():
+            self.setWindowIcon(icon)
+        else:
+            # 调试信息
+            print(f"设置图标未找到: {icon_cache.icons_dir}/settings.png")
         
         self.setup_modern_ui()
         self._load_config_values()
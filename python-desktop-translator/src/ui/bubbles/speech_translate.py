@@ -1,16 +1,18 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-import os
 import sys
-from services.ai_client import AIClientError
+from core.ai_engine import ai_engine
+from ui.icon_cache import icon_cache
 from ui.theme_manager import theme_manager
 from ui.bubbles.chat_history_area import ChatHistoryArea
 
 
 class SpeechTranslateBubble(QtWidgets.QWidget):
-    def __init__(self, config, client):
+    def __init__(self, config, client, store=None):
         super().__init__()
         self.config = config
         self.client = client
+        self.pipeline = None  # 实时听写流水线，开始听写时创建
+        self._live_messages = {}  # 句子序号 -> 译文消息
         self.setWindowTitle("Speech Translation")
         self.setGeometry(200, 200, 500, 600)
         # 关闭该窗口不退出主程序
@@ -20,18 +22,17 @@ class SpeechTranslateBubble(QtWidgets.QWidget):
             pass
         
         # 设置窗口图标
-        try:
-            # 使用正确的相对路径
-            icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons", "speech_translate.png")
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QtGui.QIcon(icon_path))
-            else:
-                # 调试信息
-                print(f"语音翻译图标未找到: {icon_path}")
-        except Exception as e:
-            print(f"设置语音翻译图标时出错: {e}")
+        icon = icon_cache.icon("speech_translate.png")
+        if not icon.isNull():
+            self.setWindowIcon(icon)
+        else:
+            # 调试信息
+            print(f"语音翻译图标未找到: {icon_cache.icons_dir}/speech_translate.png")
         
         self.setup_chat_ui()
+        # 绑定持久化会话：恢复最近消息，向上滚动时分页加载更早记录
+        if store is not None:
+            self.history.bind_store(store, 'speech')
 
     def setup_chat_ui(self):
         """设置聊天界面UI"""
@@ -125,6 +126,11 @@ class SpeechTranslateBubble(QtWidgets.QWidget):
         self.translate_button.clicked.connect(self._translate_current)
         pointing_hand_cursor = getattr(QtCore.Qt, 'PointingHandCursor')
         self.translate_button.setCursor(QtGui.QCursor(pointing_hand_cursor))
+        self.listen_button = QtWidgets.QPushButton("Start Listening")
+        self.listen_button.setCheckable(True)
+        self.listen_button.toggled.connect(self._toggle_listening)
+        self.listen_button.setCursor(QtGui.QCursor(pointing_hand_cursor))
+        button_layout.addWidget(self.listen_button)
         button_layout.addStretch()
         button_layout.addWidget(self.translate_button)
         
@@ -159,6 +165,14 @@ class SpeechTranslateBubble(QtWidgets.QWidget):
         theme_manager.theme_changed.connect(self._on_theme_changed)
 
     def closeEvent(self, event):
+        if self.pipeline is not None:
+            # 停止采集并取消进行中的翻译，不再向已隐藏的窗口输出
+            self.pipeline.cancel()
+            for ai_message in self._live_messages.values():
+                ai_message.end_streaming()
+            self._live_messages.clear()
+        if self.listen_button.isChecked():
+            self.listen_button.setChecked(False)
         event.accept()
 
     def _on_theme_changed(self, theme_name: str):
@@ -174,6 +188,7 @@ class SpeechTranslateBubble(QtWidgets.QWidget):
             
         # 添加用户消息到对话历史
         self.add_message("user", recognized)
+        self.history.record("user", recognized)
         
         # 清空输入框
         self.input_text.clear()
@@ -181,29 +196,98 @@ class SpeechTranslateBubble(QtWidgets.QWidget):
         # 禁用按钮并显示正在处理状态
         self.translate_button.setEnabled(False)
         self.translate_button.setText("Translating...")
-        QtWidgets.QApplication.processEvents()
         
-        try:
-            # 创建AI消息气泡但暂时不设置内容
-            ai_message = self.add_message("ai", "")
-            ai_message.start_streaming()
-            
-            # 构造请求参数
-            payload = self.config.build_speech_translation_prompt(recognized)
-            
-            # 流式获取AI响应
-            for chunk in self.client.chat_stream(payload):
-                ai_message.stream_text(chunk)
-                QtWidgets.QApplication.processEvents()  # 保持UI响应
-            
-            # 结束流式输出
-            ai_message.end_streaming()
-        except AIClientError as e:
-            # 添加错误消息到对话历史
-            self.add_message("ai", f"Error: {str(e)}")
-        finally:
-            self.translate_button.setEnabled(True)
-            self.translate_button.setText("Translate Speech")
+        # 创建AI消息气泡但暂时不设置内容
+        ai_message = self.add_message("ai", "")
+        ai_message.start_streaming()
+        
+        # 构造请求参数，交给后台引擎流式获取AI响应
+        payload = self.config.build_speech_translation_prompt(recognized)
+        request = ai_engine.stream(self.client, payload)
+        request.chunk.connect(ai_message.stream_text)
+        request.finished.connect(lambda _text: self._on_translate_finished(ai_message))
+        request.aborted.connect(lambda _text: self._on_translate_finished(ai_message))
+        request.failed.connect(lambda error: self._on_translate_failed(ai_message, error))
             
         # 聚焦到输入框
         self.input_text.setFocus()
+
+    def _on_translate_finished(self, ai_message):
+        # 结束流式输出
+        ai_message.end_streaming()
+        self.history.record("ai", ai_message.raw_text)
+        self._reset_translate_button()
+
+    def _on_translate_failed(self, ai_message, error):
+        ai_message.end_streaming()
+        # 添加错误消息到对话历史
+        self.add_message("ai", f"Error: {str(error)}")
+        self._reset_translate_button()
+
+    def _reset_translate_button(self):
+        self.translate_button.setEnabled(True)
+        self.translate_button.setText("Translate Speech")
+
+    # ---------------- 实时听写 ----------------
+    def _toggle_listening(self, checked: bool):
+        if checked:
+            self._start_listening()
+        elif self.pipeline is not None:
+            self.pipeline.stop()
+            self.listen_button.setText("Stopping...")
+            self.listen_button.setEnabled(False)
+
+    def _start_listening(self):
+        from services.speech_pipeline import MicrophoneSource, SpeechPipeline, SpeechRecognitionBackend
+        try:
+            source = MicrophoneSource()
+            recognizer = SpeechRecognitionBackend(self.config.speech_recognition_language)
+        except RuntimeError as e:
+            QtWidgets.QMessageBox.warning(self, "Microphone Unavailable", str(e))
+            self.listen_button.setChecked(False)
+            return
+        self.pipeline = SpeechPipeline(source, recognizer, self.client,
+                                       self.config.build_speech_translation_prompt, parent=self)
+        self.pipeline.sentence_ready.connect(self._on_live_sentence)
+        self.pipeline.translation_chunk.connect(self._on_live_chunk)
+        self.pipeline.translated.connect(self._on_live_translated)
+        self.pipeline.translation_failed.connect(self._on_live_failed)
+        self.pipeline.failed.connect(lambda error: self.add_message("ai", f"Error: {str(error)}"))
+        self.pipeline.stopped.connect(self._on_listening_stopped)
+        self.pipeline.start()
+        self.listen_button.setText("Stop Listening")
+
+    def _on_live_sentence(self, sentence):
+        # 原文与译文消息成对出现；多句的翻译并发进行，按序号各自更新
+        self.add_message("user", sentence.text)
+        self.history.record("user", sentence.text)
+        ai_message = self.add_message("ai", "")
+        ai_message.start_streaming()
+        self._live_messages[sentence.index] = ai_message
+
+    def _on_live_chunk(self, sentence, piece: str):
+        ai_message = self._live_messages.get(sentence.index)
+        if ai_message is not None:
+            ai_message.stream_text(piece)
+
+    def _on_live_translated(self, sentence):
+        ai_message = self._live_messages.pop(sentence.index, None)
+        if ai_message is not None:
+            ai_message.end_streaming()
+            self.history.record("ai", ai_message.raw_text)
+
+    def _on_live_failed(self, sentence, error):
+        ai_message = self._live_messages.pop(sentence.index, None)
+        if ai_message is not None:
+            ai_message.end_streaming()
+        self.add_message("ai", f"Error: {str(error)}")
+
+    def _on_listening_stopped(self):
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.delete_when_idle()
+        self.listen_button.blockSignals(True)
+        self.listen_button.setChecked(False)
+        self.listen_button.blockSignals(False)
+        self.listen_button.setEnabled(True)
+        self.listen_button.setText("Start Listening")
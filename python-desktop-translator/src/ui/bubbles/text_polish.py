@@ -1,13 +1,14 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-import os
 import sys
-from services.ai_client import AIClientError
+from core.ai_engine import ai_engine
+from services.polish_edits import EditScriptError, apply_edits, highlight_changes_html, parse_edit_script
+from ui.icon_cache import icon_cache
 from ui.theme_manager import theme_manager
 from ui.bubbles.chat_history_area import ChatHistoryArea
 
 
 class TextPolishBubble(QtWidgets.QWidget):
-    def __init__(self, config, client):
+    def __init__(self, config, client, store=None):
         super().__init__()
         self.config = config
         self.client = client
@@ -20,18 +21,17 @@ class TextPolishBubble(QtWidgets.QWidget):
             pass
         
         # 设置窗口图标
-        try:
-            # 使用正确的相对路径
-            icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons", "text_polish.png")
-            if os.path.exists(icon_path):
-                self.setWindowIcon(QtGui.QIcon(icon_path))
-            else:
-                # 调试信息
-                print(f"文本润色图标未找到: {icon_path}")
-        except Exception as e:
-            print(f"设置文本润色图标时出错: {e}")
+        icon = icon_cache.icon("text_polish.png")
+        if not icon.isNull():
+            self.setWindowIcon(icon)
+        else:
+            # 调试信息
+            print(f"文本润色图标未找到: {icon_cache.icons_dir}/text_polish.png")
         
         self.setup_chat_ui()
+        # 绑定持久化会话：恢复最近消息，向上滚动时分页加载更早记录
+        if store is not None:
+            self.history.bind_store(store, 'polish')
 
     def setup_chat_ui(self):
         """设置聊天界面UI"""
@@ -125,6 +125,12 @@ class TextPolishBubble(QtWidgets.QWidget):
         self.polish_button.clicked.connect(self._do_polish)
         pointing_hand_cursor = getattr(QtCore.Qt, 'PointingHandCursor')
         self.polish_button.setCursor(QtGui.QCursor(pointing_hand_cursor))
+        # 编辑脚本模式：模型只返回替换片段，长文本润色显著减少输出 token
+        self.edit_mode_checkbox = QtWidgets.QCheckBox("Minimal edits")
+        self.edit_mode_checkbox.setToolTip("Model returns only the changed spans; changes are highlighted")
+        self.edit_mode_checkbox.setChecked(getattr(self.config, 'polish_mode', 'full') == 'edits')
+        self.edit_mode_checkbox.toggled.connect(self._on_edit_mode_toggled)
+        button_layout.addWidget(self.edit_mode_checkbox)
         button_layout.addStretch()
         button_layout.addWidget(self.polish_button)
         
@@ -174,6 +180,7 @@ class TextPolishBubble(QtWidgets.QWidget):
             
         # 添加用户消息到对话历史
         self.add_message("user", original)
+        self.history.record("user", original)
         
         # 清空输入框
         self.input_text.clear()
@@ -181,29 +188,70 @@ class TextPolishBubble(QtWidgets.QWidget):
         # 禁用按钮并显示正在处理状态
         self.polish_button.setEnabled(False)
         self.polish_button.setText("Polishing...")
-        QtWidgets.QApplication.processEvents()
         
-        try:
-            # 创建AI消息气泡但暂时不设置内容
-            ai_message = self.add_message("ai", "")
-            ai_message.start_streaming()
-            
-            # 构造请求参数
-            payload = self.config.build_polish_prompt(original)
-            
-            # 流式获取AI响应
-            for chunk in self.client.chat_stream(payload):
-                ai_message.stream_text(chunk)
-                QtWidgets.QApplication.processEvents()  # 保持UI响应
-            
-            # 结束流式输出
-            ai_message.end_streaming()
-        except AIClientError as e:
-            # 添加错误消息到对话历史
-            self.add_message("ai", f"Error: {str(e)}")
-        finally:
-            self.polish_button.setEnabled(True)
-            self.polish_button.setText("Polish Text")
+        if self.edit_mode_checkbox.isChecked():
+            self._polish_with_edits(original)
+        else:
+            self._polish_full(original)
             
         # 聚焦到输入框
         self.input_text.setFocus()
+
+    def _on_edit_mode_toggled(self, checked: bool):
+        self.config.polish_mode = 'edits' if checked else 'full'
+        # 由 ConfigStore 接管时为合并后的后台写入，不阻塞界面
+        self.config.save_config()
+
+    def _polish_full(self, original: str):
+        """完整输出模式：流式显示模型重写后的全文。"""
+        # 创建AI消息气泡但暂时不设置内容
+        ai_message = self.add_message("ai", "")
+        ai_message.start_streaming()
+        
+        # 构造请求参数，交给后台引擎流式获取AI响应
+        payload = self.config.build_polish_prompt(original)
+        request = ai_engine.stream(self.client, payload)
+        request.chunk.connect(ai_message.stream_text)
+        request.finished.connect(lambda _text: self._on_full_polish_finished(ai_message))
+        request.aborted.connect(lambda _text: self._on_full_polish_finished(ai_message))
+        request.failed.connect(lambda error: self._on_polish_failed(ai_message, error))
+
+    def _on_full_polish_finished(self, ai_message):
+        # 结束流式输出
+        ai_message.end_streaming()
+        self.history.record("ai", ai_message.raw_text)
+        self._reset_polish_button()
+
+    def _polish_with_edits(self, original: str):
+        """编辑脚本模式：请求替换片段，收齐后在本地应用。"""
+        payload = self.config.build_polish_edit_prompt(original)
+        request = ai_engine.stream(self.client, payload)
+        request.finished.connect(lambda script: self._on_edit_script_ready(original, script))
+        # 不完整的编辑脚本无法应用
+        request.aborted.connect(lambda _script: self._reset_polish_button())
+        request.failed.connect(lambda error: self._on_polish_failed(None, error))
+
+    def _on_edit_script_ready(self, original: str, script: str):
+        try:
+            edits = parse_edit_script(script)
+            polished, spans = apply_edits(original, edits)
+        except EditScriptError as e:
+            # 脚本无效时回退完整输出
+            print(f"[TextPolish] 编辑脚本无效，回退完整输出: {e}")
+            self._polish_full(original)
+            return
+        self.add_message("ai", highlight_changes_html(polished, spans))
+        # 持久化纯文本结果，而非高亮 HTML
+        self.history.record("ai", polished)
+        self._reset_polish_button()
+
+    def _on_polish_failed(self, ai_message, error):
+        if ai_message is not None:
+            ai_message.end_streaming()
+        # 添加错误消息到对话历史
+        self.add_message("ai", f"Error: {str(error)}")
+        self._reset_polish_button()
+
+    def _reset_polish_button(self):
+        self.polish_button.setEnabled(True)
+        self.polish_button.setText("Polish Text")
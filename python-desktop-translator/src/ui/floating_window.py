@@ -1,28 +1,38 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
-from PyQt5.QtSvg import QSvgRenderer
 import sys
 import math
 import os
+import time
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from services.ai_client import AIClient, AIClientError
-from ui.bubbles.ai_translate import AITranslateBubble
-from ui.bubbles.text_polish import TextPolishBubble
-from ui.bubbles.ai_qa import AIQAWidget
-from ui.bubbles.speech_translate import SpeechTranslateBubble
-from ui.bubbles.settings import SettingsBubble
+# 各气泡模块（尤其是依赖 QtWebEngine 的问答页）在首次打开时才导入，缩短冷启动
 from core.hotkeys import HotkeyManager
+from core.prewarm import PrewarmScheduler
+from ui.bubble_lifecycle import BubbleLifecycle
+from ui.frame_budget import frame_stats, ring_damage_region
+from ui.icon_cache import icon_cache
+from ui.selection_translate import SelectionTranslator
 from ui.theme_manager import theme_manager
 
 
 class FloatingWindow(QtWidgets.QWidget):
-    def __init__(self, config, client: AIClient, translation_service):
+    RIPPLE_PEN_WIDTH = 2
+
+    def __init__(self, config, client: AIClient, translation_service, store=None, kb_index_provider=None,
+                 answer_cache_provider=None):
         super().__init__()
         self.config = config
         self.client = client
         self.translation_service = translation_service
+        # 会话持久化存储（可选），传递给各聊天气泡
+        self.store = store
+        # 内部知识库检索索引与问答相似问题缓存的获取函数（可选），传递给问答气泡；
+        # 首次调用时才加载，启动时不导入 numpy
+        self.kb_index_provider = kb_index_provider
+        self.answer_cache_provider = answer_cache_provider
         
         # 设置窗口属性
         stay_on_top_flag = getattr(QtCore.Qt, 'WindowStaysOnTopHint')
@@ -51,22 +61,12 @@ class FloatingWindow(QtWidgets.QWidget):
         self.setMouseTracking(True)
         self.is_hovered = False
 
-        # --- 中心图标（根据状态变化） ---
-        icons_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'icons'))
-        self.icon_paths = {
-            'idle': os.path.join(icons_dir, 'Wait.png'),
-            'active': os.path.join(icons_dir, 'Conduct.png'),
-            'complete': os.path.join(icons_dir, 'Complete.png')
+        # --- 中心图标（根据状态变化），由 icon_cache 解码并缓存缩放结果 ---
+        self.icon_names = {
+            'idle': 'Wait.png',
+            'active': 'Conduct.png',
+            'complete': 'Complete.png'
         }
-        self.icon_pixmaps = {}
-        for k, p in self.icon_paths.items():
-            try:
-                if os.path.exists(p):
-                    self.icon_pixmaps[k] = QtGui.QPixmap(p)
-                else:
-                    self.icon_pixmaps[k] = None
-            except Exception:
-                self.icon_pixmaps[k] = None
 
         # 状态： 'active' | 'idle' | 'complete'
         self._status = 'active'
@@ -75,7 +75,14 @@ class FloatingWindow(QtWidgets.QWidget):
         self._idle_timer = QtCore.QTimer(self)
         self._idle_timer.setSingleShot(True)
         self._idle_timer.setInterval(30000)  # 30秒
-        self._idle_timer.timeout.connect(lambda: self._set_status('idle'))
+        self._idle_timer.timeout.connect(self._on_idle)
+        # 空闲预热（idle 与悬停时启动）
+        self._setup_prewarm()
+        # 长时间隐藏的气泡休眠释放内存，再次打开时重建
+        self.lifecycle = BubbleLifecycle(
+            self.BUBBLE_ATTRS, release=self._release_bubble, store=self.store,
+            hibernate_after_s=getattr(self.config, 'bubble_hibernate_minutes', 10) * 60, parent=self,
+        )
         # 启动初始倒计时
         self._start_idle_timer()
         
@@ -93,16 +100,27 @@ class FloatingWindow(QtWidgets.QWidget):
         self.ripple_animation.setEndValue(40)
         self.ripple_animation.valueChanged.connect(self._on_ripple_value_changed)
         self.ripple_animation.finished.connect(self.reset_ripple)
+        frame_stats.track('floating', self.ripple_animation)
         
-        # 气泡动画相关
+        # 气泡动画相关：所有气泡的动画放进同一个动画组，由一个计时驱动（依次出现靠组内的 pause）
         self.bubble_animations = []
+        self.bubble_group = QtCore.QParallelAnimationGroup(self)
+        frame_stats.track('bubbles', self.bubble_group)
+        self._retracting = False
         
         # 拖动状态
         self.is_dragging = False
 
         # 热键管理：注册切换主题快捷键 Ctrl+Alt+T
-        self.hotkeys = HotkeyManager()
+        self.hotkeys = HotkeyManager(self)
         self.hotkeys.register_hotkey('ctrl+alt+t', self._toggle_theme_hotkey)
+        # 划词翻译：弹窗在此预先创建，热键触发时直接复用
+        self.selection_translator = None
+        if translation_service is not None:
+            self.selection_translator = SelectionTranslator(translation_service, client, config, parent=self)
+            self.hotkeys.register_hotkey(
+                getattr(config, 'translate_selection_hotkey', 'ctrl+alt+d'), self._translate_selection_hotkey
+            )
 
         # 订阅全局 AI 完成信号以切换为 complete 图标
         try:
@@ -112,18 +130,7 @@ class FloatingWindow(QtWidgets.QWidget):
 
         # --- 系统托盘图标（出现在任务栏右侧系统托盘） ---
         try:
-            tray_icon = None
-            # 优先使用加载的 active pixmap
-            pix = self.icon_pixmaps.get('active')
-            if pix and not pix.isNull():
-                tray_icon = QtGui.QIcon(pix)
-            else:
-                # fallback to path
-                active_path = self.icon_paths.get('active')
-                if active_path and os.path.exists(active_path):
-                    tray_icon = QtGui.QIcon(active_path)
-            if tray_icon is None:
-                tray_icon = QtGui.QIcon()
+            tray_icon = icon_cache.icon(self.icon_names['active'])
 
             self.tray = QtWidgets.QSystemTrayIcon(tray_icon, self)
             self.tray.setToolTip('AI助手')
@@ -131,6 +138,8 @@ class FloatingWindow(QtWidgets.QWidget):
             # 构建菜单
             tray_menu = QtWidgets.QMenu()
             action_settings = tray_menu.addAction('设置')
+            action_memory = tray_menu.addAction('内存占用')
+            action_memory.triggered.connect(self._show_memory_report)  # type: ignore
             action_exit = tray_menu.addAction('退出')
             action_settings.triggered.connect(self.open_settings) # type: ignore
             # 修复：避免 Pylance 报告 OptionalMemberAccess 错误
@@ -163,13 +172,22 @@ class FloatingWindow(QtWidgets.QWidget):
     def _toggle_theme_hotkey(self):
         theme_manager.toggle_theme()
 
+    def _translate_selection_hotkey(self):
+        self.selection_translator.trigger(self.hotkeys.last_pressed_at or None)
+
     def _on_ripple_value_changed(self, value):
-        """波纹动画值变化时的处理"""
+        """波纹动画值变化时的处理：只重绘新旧圆环覆盖的区域"""
+        old_radius = self.ripple_radius
         self.ripple_radius = value
-        self.update()
+        if old_radius != value:
+            self.update(ring_damage_region(self.rect().center(), old_radius, value, self.RIPPLE_PEN_WIDTH))
 
     def paintEvent(self, event):
         """绘制圆形悬浮窗"""
+        with frame_stats.frame('floating'):
+            self._paint(event)
+
+    def _paint(self, event):
         painter = QtGui.QPainter(self)
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         
@@ -177,7 +195,7 @@ class FloatingWindow(QtWidgets.QWidget):
         if self.is_hovered:
             # 绘制波纹效果
             if self.ripple_radius > 0:
-                ripple_pen = QtGui.QPen(QtGui.QColor(255, 255, 255, 100), 2)
+                ripple_pen = QtGui.QPen(QtGui.QColor(255, 255, 255, 100), self.RIPPLE_PEN_WIDTH)
                 painter.setPen(ripple_pen)
                 painter.drawEllipse(
                     int(self.width() / 2 - self.ripple_radius),
@@ -191,17 +209,14 @@ class FloatingWindow(QtWidgets.QWidget):
             painter.drawEllipse(2, 2, self.width() - 4, self.height() - 4)
         
         # 绘制中心图标（根据状态显示对应 PNG）
-        icon = self.icon_pixmaps.get(self._status)
-        if icon and not icon.isNull():
-            # 缩放图标以适配更大的内圈（减小边距以放大图标）
-            inner_rect = QtCore.QRect(10, 10, self.width() - 20, self.height() - 20)
-            icon_size = min(inner_rect.width(), inner_rect.height())
-            keep_aspect = getattr(QtCore.Qt, 'KeepAspectRatio')
-            smooth = getattr(QtCore.Qt, 'SmoothTransformation')
-            scaled = icon.scaled(icon_size, icon_size, keep_aspect, smooth)
-            x = (self.width() - scaled.width()) // 2
-            y = (self.height() - scaled.height()) // 2
-            painter.drawPixmap(x, y, scaled)
+        # 适配更大的内圈（减小边距以放大图标）；缩放结果按尺寸缓存，重绘时不再缩放
+        icon_size = min(self.width(), self.height()) - 20
+        icon = icon_cache.pixmap(self.icon_names.get(self._status, ''), icon_size, self.devicePixelRatioF())
+        if icon is not None:
+            dpr = icon.devicePixelRatio()
+            x = int((self.width() - icon.width() / dpr) // 2)
+            y = int((self.height() - icon.height() / dpr) // 2)
+            painter.drawPixmap(x, y, icon)
         else:
             # 回退到文字显示
             painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255), 3))
@@ -251,6 +266,9 @@ class FloatingWindow(QtWidgets.QWidget):
             self.show_bubbles()
         self.hide_timer.stop()
         
+        # 悬停后很可能点击气泡：立即预连服务器，气泡弹出动画结束后再预热气泡
+        self.prewarm.start(delay_ms=1000)
+
         # 启动波纹动画
         self.ripple_animation.stop()
         self.ripple_radius = 0
@@ -267,8 +285,10 @@ class FloatingWindow(QtWidgets.QWidget):
 
     def reset_ripple(self):
         """重置波纹效果"""
+        old_radius = self.ripple_radius
         self.ripple_radius = 0
-        self.update()
+        if old_radius:
+            self.update(ring_damage_region(self.rect().center(), old_radius, 0, self.RIPPLE_PEN_WIDTH))
 
     def show_bubbles(self):
         """显示子气泡窗口"""
@@ -289,9 +309,6 @@ class FloatingWindow(QtWidgets.QWidget):
         radius = 65  # 气泡距离中心的距离
         bubble_size = 40  # 气泡大小
         
-        # 清空旧的动画
-        self.bubble_animations.clear()
-        
         for i, (name, create_func) in enumerate(bubble_configs):
             # 计算气泡最终位置（顺时针排列）
             angle = (i * (360 / len(bubble_configs)) - 90) * 3.14159 / 180  # 从顶部开始，顺时针
@@ -306,37 +323,40 @@ class FloatingWindow(QtWidgets.QWidget):
             bubble.show()
             self.bubble_windows.append(bubble)
             
-            # 创建动画
-            animation = QtCore.QPropertyAnimation(bubble, b"geometry")
+            # 尺寸不变，只移动位置（pos 动画不会触发气泡重绘）
+            animation = QtCore.QPropertyAnimation(bubble, b"pos")
             animation.setDuration(500)
-            animation.setStartValue(QtCore.QRect(center_bubble_x, center_bubble_y, bubble_size, bubble_size))
-            animation.setEndValue(QtCore.QRect(bubble_x, bubble_y, bubble_size, bubble_size))
+            animation.setStartValue(QtCore.QPoint(center_bubble_x, center_bubble_y))
+            animation.setEndValue(QtCore.QPoint(bubble_x, bubble_y))
             animation.setEasingCurve(QtCore.QEasingCurve.OutBack)
             
-            # 添加延迟，实现顺时针依次出现的效果
-            QtCore.QTimer.singleShot(i * 100, animation.start)
-            self.bubble_animations.append(animation)
+            # 组内延迟，实现顺时针依次出现的效果
+            self._add_staggered(animation, delay=i * 100)
+        self.bubble_group.start()
+
+    def _add_staggered(self, *animations, delay=0):
+        """把动画按 delay 毫秒延迟加入气泡动画组"""
+        sequence = QtCore.QSequentialAnimationGroup()
+        if delay:
+            sequence.addPause(delay)
+        if len(animations) == 1:
+            sequence.addAnimation(animations[0])
+        else:
+            parallel = QtCore.QParallelAnimationGroup()
+            for animation in animations:
+                parallel.addAnimation(animation)
+            sequence.addAnimation(parallel)
+        self.bubble_group.addAnimation(sequence)
+        self.bubble_animations.extend(animations)
 
     def retract_bubbles(self):
         """缩回子气泡到中心并添加渐隐效果"""
-        # 创建一个定时器来更新气泡位置到悬浮窗实时中心位置
-        self.retract_timer = QtCore.QTimer(self)
-        self.retract_timer.timeout.connect(self._update_bubble_target_positions)
-        self.retract_timer.start(10)  # 每10毫秒更新一次位置
-        
-        # 设置动画结束后停止定时器
-        QtCore.QTimer.singleShot(150, self._stop_retract_timer)
+        self._stop_bubble_group()
+        if not self.bubble_windows:
+            return
         
         # 计算当前窗口实时中心位置
-        center_x = self.x() + self.width() // 2
-        center_y = self.y() + self.height() // 2
-        bubble_size = 60
-        
-        center_bubble_x = int(center_x - bubble_size // 2)
-        center_bubble_y = int(center_y - bubble_size // 2)
-        
-        # 清空旧的动画
-        self.bubble_animations.clear()
+        center_bubble = self._retract_target()
         
         # 为每个气泡创建返回中心的动画（更快的速度）
         for i, bubble in enumerate(self.bubble_windows):
@@ -344,7 +364,7 @@ class FloatingWindow(QtWidgets.QWidget):
             pos_animation = QtCore.QPropertyAnimation(bubble, b"geometry")
             pos_animation.setDuration(150)  # 更快的动画速度（原来是300ms，现在是150ms）
             pos_animation.setStartValue(bubble.geometry())
-            pos_animation.setEndValue(QtCore.QRect(center_bubble_x, center_bubble_y, bubble_size, bubble_size))
+            pos_animation.setEndValue(center_bubble)
             pos_animation.setEasingCurve(QtCore.QEasingCurve.InBack)
             
             # 渐隐动画
@@ -356,45 +376,66 @@ class FloatingWindow(QtWidgets.QWidget):
             opacity_animation.setEndValue(0.0)
             opacity_animation.setEasingCurve(QtCore.QEasingCurve.InQuad)
             
-            # 添加延迟，实现顺时针依次收回的效果（更短的延迟）
-            QtCore.QTimer.singleShot(i * 25, pos_animation.start)
-            QtCore.QTimer.singleShot(i * 25, opacity_animation.start)
-            
-            self.bubble_animations.append(pos_animation)
-            self.bubble_animations.append(opacity_animation)
-
-    def _update_bubble_target_positions(self):
-        """更新气泡目标位置到悬浮窗实时中心位置"""
-        # 计算当前窗口实时中心位置
+            # 组内延迟，实现顺时针依次收回的效果（更短的延迟）
+            self._add_staggered(pos_animation, opacity_animation, delay=i * 25)
+        # 动画组结束后隐藏气泡；拖动过程中由 moveEvent 更新目标位置，不再轮询
+        self._retracting = True
+        self.bubble_group.finished.connect(self.hide_bubbles)
+        self.bubble_group.start()
+
+    def _retract_target(self) -> QtCore.QRect:
+        """收回动画的目标矩形：悬浮窗实时中心"""
         center_x = self.x() + self.width() // 2
         center_y = self.y() + self.height() // 2
         bubble_size = 60
-        
-        center_bubble_x = int(center_x - bubble_size // 2)
-        center_bubble_y = int(center_y - bubble_size // 2)
-        
-        # 更新所有正在进行的位置动画的目标位置
-        running_state = getattr(QtCore.QAbstractAnimation, 'Running')
+        return QtCore.QRect(int(center_x - bubble_size // 2), int(center_y - bubble_size // 2), bubble_size, bubble_size)
+
+    def _update_bubble_target_positions(self):
+        """更新气泡目标位置到悬浮窗实时中心位置"""
+        target = self._retract_target()
+        # 只更新位置动画的目标位置，不更新透明度动画
         for animation in self.bubble_animations:
-            # 只更新位置动画的目标位置，不更新透明度动画
-            if (animation.state() == running_state and 
-                animation.propertyName() == b"geometry"):
-                animation.setEndValue(QtCore.QRect(center_bubble_x, center_bubble_y, bubble_size, bubble_size))
-
-    def _stop_retract_timer(self):
-        """停止位置更新定时器"""
-        if hasattr(self, 'retract_timer'):
-            self.retract_timer.stop()
-            
-        # 动画结束后隐藏气泡
-        QtCore.QTimer.singleShot(150 + (len(self.bubble_windows) - 1) * 25, self.hide_bubbles)
+            if animation.propertyName() == b"geometry":
+                animation.setEndValue(target)
+
+    def _stop_bubble_group(self):
+        """停止并清空气泡动画组"""
+        if self._retracting:
+            self._retracting = False
+            try:
+                self.bubble_group.finished.disconnect(self.hide_bubbles)
+            except TypeError:
+                pass
+        self.bubble_group.stop()
+        self.bubble_group.clear()
+        self.bubble_animations.clear()
 
     def hide_bubbles(self):
         """隐藏所有气泡窗口"""
+        self._stop_bubble_group()
         for bubble in self.bubble_windows:
             bubble.close()
         self.bubble_windows.clear()
-        self.bubble_animations.clear()
+
+    def moveEvent(self, event):
+        """拖动悬浮窗时让正在收回的气泡跟随实时中心"""
+        super().moveEvent(event)
+        if self._retracting:
+            self._update_bubble_target_positions()
+
+    def hideEvent(self, event):
+        """窗口隐藏时停止所有动画，不再占用定时器"""
+        super().hideEvent(event)
+        self.ripple_animation.stop()
+        self.ripple_radius = 0
+        self.hide_timer.stop()
+        self.hide_bubbles()
+        self._idle_timer.stop()
+        self.prewarm.pause()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._start_idle_timer()
 
     # ---------------- 状态与空闲检测 ----------------
     def _start_idle_timer(self):
@@ -403,6 +444,10 @@ class FloatingWindow(QtWidgets.QWidget):
         except Exception:
             pass
 
+    def _on_idle(self):
+        self._set_status('idle')
+        self.prewarm.start()
+
     def _on_user_activity(self):
         """用户发生交互时调用：将状态设为 active 并重启空闲计时器"""
         # 若之前处于 complete 状态，不自动切回 active，除非显式调用
@@ -422,8 +467,8 @@ class FloatingWindow(QtWidgets.QWidget):
         if self._status == status:
             return
         self._status = status
-        # 如果是 complete 状态，确保动画停止
-        if status == 'complete':
+        # complete / idle 状态下停止波纹动画，空闲时不再逐帧重绘
+        if status in ('complete', 'idle'):
             try:
                 self.ripple_animation.stop()
             except Exception:
@@ -432,35 +477,106 @@ class FloatingWindow(QtWidgets.QWidget):
         self.update()
 
     # --------- 打开各气泡窗口 ---------
-    def open_ai_translate(self):
+    # 气泡名 -> 实例属性；实例在首次打开或空闲预热时创建
+    BUBBLE_ATTRS = {
+        'translate': '_translate_bubble',
+        'qa': '_qa_bubble',
+        'polish': '_polish_bubble',
+        'speech': '_speech_bubble',
+        'settings': '_settings_bubble',
+    }
+
+    def _create_bubble(self, name: str):
+        # 各气泡模块在这里才导入，缩短冷启动
+        if name == 'translate':
+            from ui.bubbles.ai_translate import AITranslateBubble
+            return AITranslateBubble(self.config, self.client, store=self.store)
+        if name == 'polish':
+            from ui.bubbles.text_polish import TextPolishBubble
+            return TextPolishBubble(self.config, self.client, store=self.store)
+        if name == 'qa':
+            from ui.bubbles.ai_qa import AIQAWidget
+            return AIQAWidget(
+                self.config, self.client, store=self.store, kb_index_provider=self.kb_index_provider,
+                answer_cache_provider=self.answer_cache_provider,
+            )
+        if name == 'speech':
+            from ui.bubbles.speech_translate import SpeechTranslateBubble
+            return SpeechTranslateBubble(self.config, self.client, store=self.store)
+        from ui.bubbles.settings import SettingsBubble
+        return SettingsBubble(self.config)
+
+    def _ensure_bubble(self, name: str):
+        attr = self.BUBBLE_ATTRS[name]
+        bubble = getattr(self, attr)
+        if bubble is None:
+            bubble = self._create_bubble(name)
+            setattr(self, attr, bubble)
+            self.lifecycle.watch(name, bubble)
+        return bubble
+
+    def _release_bubble(self, name: str):
+        """气泡休眠后丢弃引用，下次打开时重建"""
+        setattr(self, self.BUBBLE_ATTRS[name], None)
+        self._opened_bubbles.discard(name)
+
+    def _show_memory_report(self):
+        QtWidgets.QMessageBox.information(None, '内存占用', self.lifecycle.report())
+
+    def _prewarm_bubble(self, name: str):
+        """预热：创建隐藏的气泡并提前完成样式表解析与布局"""
+        bubble = self._ensure_bubble(name)
+        bubble.ensurePolished()
+        layout = bubble.layout()
+        if layout is not None:
+            layout.activate()
+
+    def _setup_prewarm(self):
+        self.prewarm = PrewarmScheduler(
+            memory_budget_mb=getattr(self.config, 'prewarm_memory_mb', 80),
+            cpu_busy_percent=getattr(self.config, 'prewarm_cpu_percent', 70),
+            max_foreground=getattr(self.config, 'prewarm_max_bubbles', 2),
+            parent=self,
+        )
+        self._opened_bubbles = set()
+        if not getattr(self.config, 'prewarm_enabled', True):
+            return
+        if hasattr(self.client, 'warm_up'):
+            self.prewarm.add_task('network', self.client.warm_up, background=True)
+        # 在后台线程导入 numpy 并加载知识库索引与问答缓存，首次提问时无需等待
+        if self.kb_index_provider is not None:
+            self.prewarm.add_task('kb_index', self.kb_index_provider, background=True)
+        if self.answer_cache_provider is not None:
+            self.prewarm.add_task('answer_cache', self.answer_cache_provider, background=True)
+        for name in self.BUBBLE_ATTRS:
+            self.prewarm.add_task(name, lambda n=name: self._prewarm_bubble(n))
+
+    def _open_bubble(self, name: str):
         self.hide_bubbles()
-        if self._translate_bubble is None:
-            self._translate_bubble = AITranslateBubble(self.config, self.client)
-        self._translate_bubble.show()
+        started = time.perf_counter()
+        prewarmed = getattr(self, self.BUBBLE_ATTRS[name]) is not None
+        bubble = self._ensure_bubble(name)
+        bubble.show()
+        first_open_ms = None
+        if name not in self._opened_bubbles:
+            self._opened_bubbles.add(name)
+            first_open_ms = (time.perf_counter() - started) * 1000
+        self.prewarm.record_open(name, first_open_ms, prewarmed)
+
+    def open_ai_translate(self):
+        self._open_bubble('translate')
 
     def open_text_polish(self):
-        self.hide_bubbles()
-        if self._polish_bubble is None:
-            self._polish_bubble = TextPolishBubble(self.config, self.client)
-        self._polish_bubble.show()
+        self._open_bubble('polish')
 
     def open_ai_qa(self):
-        self.hide_bubbles()
-        if self._qa_bubble is None:
-            self._qa_bubble = AIQAWidget(self.config, self.client)
-        self._qa_bubble.show()
+        self._open_bubble('qa')
 
     def open_speech_translate(self):
-        self.hide_bubbles()
-        if self._speech_bubble is None:
-            self._speech_bubble = SpeechTranslateBubble(self.config, self.client)
-        self._speech_bubble.show()
+        self._open_bubble('speech')
 
     def open_settings(self):
-        self.hide_bubbles()
-        if self._settings_bubble is None:
-            self._settings_bubble = SettingsBubble(self.config)
-        self._settings_bubble.show()
+        self._open_bubble('settings')
 
 
 class BubbleWidget(QtWidgets.QWidget):
@@ -485,26 +601,22 @@ class BubbleWidget(QtWidgets.QWidget):
         # 设置鼠标跟踪
         self.setMouseTracking(True)
         
-        # 根据文本设置对应的图标路径
+        # 根据文本设置对应的图标（所有气泡共享 icon_cache 中的解码与缩放结果）
         icon_map = {
-            "AI翻译": os.path.join(os.path.dirname(__file__), "..", "icons", "ai_translate.png"),
-            "文本润色": os.path.join(os.path.dirname(__file__), "..", "icons", "text_polish.png"),
-            "AI问答": os.path.join(os.path.dirname(__file__), "..", "icons", "ai_qa.png"),
-            "语音翻译": os.path.join(os.path.dirname(__file__), "..", "icons", "speech_translate.png"),
-            "设置": os.path.join(os.path.dirname(__file__), "..", "icons", "settings.png")
+            "AI翻译": "ai_translate.png",
+            "文本润色": "text_polish.png",
+            "AI问答": "ai_qa.png",
+            "语音翻译": "speech_translate.png",
+            "设置": "settings.png"
         }
-        self.icon_path = icon_map.get(text, "")
-        self.icon_pixmap = None
-        if self.icon_path and os.path.exists(self.icon_path):
-            # 尝试加载图标
-            try:
-                self.icon_pixmap = QtGui.QPixmap(self.icon_path)
-            except Exception as e:
-                print(f"无法加载图标 {self.icon_path}: {e}")
-                self.icon_pixmap = None
+        self.icon_name = icon_map.get(text, "")
 
     def paintEvent(self, event):
         """绘制气泡"""
+        with frame_stats.frame('bubbles'):
+            self._paint(event)
+
+    def _paint(self, event):
         painter = QtGui.QPainter(self)
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         
@@ -520,21 +632,13 @@ class BubbleWidget(QtWidgets.QWidget):
         painter.drawEllipse(1, 1, self.width() - 2, self.height() - 2)
         
         # 绘制图标或文字
-        if self.icon_pixmap and not self.icon_pixmap.isNull():
-            # 绘制PNG图标
-            icon_size = min(self.width(), self.height()) * 0.6
+        icon_size = int(min(self.width(), self.height()) * 0.6)
+        icon = icon_cache.pixmap(self.icon_name, icon_size, self.devicePixelRatioF()) if self.icon_name else None
+        if icon is not None:
+            # 绘制缓存中已缩放的图标
             icon_x = (self.width() - icon_size) / 2
             icon_y = (self.height() - icon_size) / 2
-            # 缩放图标以适应指定大小
-            keep_aspect_ratio = getattr(QtCore.Qt, 'KeepAspectRatio')
-            smooth_transformation = getattr(QtCore.Qt, 'SmoothTransformation')
-            scaled_pixmap = self.icon_pixmap.scaled(
-                int(icon_size), 
-                int(icon_size), 
-                keep_aspect_ratio, 
-                smooth_transformation
-            )
-            painter.drawPixmap(int(icon_x), int(icon_y), scaled_pixmap)
+            painter.drawPixmap(int(icon_x), int(icon_y), icon)
         else:
             # 如果图标加载失败，则绘制文字
             painter.setPen(QtGui.QColor(30, 30, 30))
@@ -0,0 +1,123 @@
+"""悬浮窗动画的帧预算工具：波纹的局部重绘区域与按动画统计的绘制耗时。
+
+波纹动画每帧只需要重绘新旧两个圆环覆盖的环形区域，而不是整个窗口：
+
+    region = ring_damage_region(self.rect().center(), old_radius, new_radius, pen_width=2)
+    self.update(region)
+
+设置环境变量 XIAOKAI_FRAME_STATS=1 后，frame_stats 记录每个动画运行的时长与期间的绘制耗时，
+退出时打印「每动画秒的绘制 CPU 毫秒数」，用于对比优化前后：
+
+    frame_stats.track('ripple', self.ripple_animation)
+    with frame_stats.frame('floating'):
+        ...  # paintEvent 主体
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from PyQt5 import QtCore, QtGui
+
+FRAME_STATS_ENV = 'XIAOKAI_FRAME_STATS'
+
+
+def ring_damage_region(center: QtCore.QPoint, old_radius: float, new_radius: float,
+                       pen_width: float = 2.0) -> QtGui.QRegion:
+    """覆盖半径从 old_radius 变为 new_radius 的圆环所需的重绘区域。
+
+    外边界取较大半径的外接正方形，再挖去较小半径圆内接的正方形（该部分不受圆环影响）。
+    """
+    margin = pen_width / 2 + 1  # 抗锯齿多出的 1px
+    outer = max(old_radius, new_radius) + margin
+    region = QtGui.QRegion(_square(center, outer))
+    inner = (min(old_radius, new_radius) - margin) / math.sqrt(2)
+    if inner >= 1:
+        region = region.subtracted(QtGui.QRegion(_square(center, inner, grow=False)))
+    return region
+
+
+def _square(center: QtCore.QPoint, half: float, grow: bool = True) -> QtCore.QRect:
+    half = math.ceil(half) if grow else math.floor(half)
+    return QtCore.QRect(center.x() - half, center.y() - half, 2 * half + 1, 2 * half + 1)
+
+
+class FrameStats:
+    """按名称统计动画运行秒数与同名 paintEvent 的 CPU 耗时（仅在 GUI 线程使用）。"""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get(FRAME_STATS_ENV, '') not in ('', '0')
+        self.enabled = enabled
+        self._frames: Dict[str, int] = {}
+        self._paint_s: Dict[str, float] = {}
+        self._anim_s: Dict[str, float] = {}
+        self._running: Dict[str, float] = {}
+
+    def track(self, name: str, animation: QtCore.QAbstractAnimation):
+        """把动画运行的时长计入 name（未启用时不连接任何信号）。"""
+        if not self.enabled:
+            return
+        running = QtCore.QAbstractAnimation.Running
+
+        def _on_state(new_state, _old_state):
+            if new_state == running:
+                self.animation_started(name)
+            else:
+                self.animation_stopped(name)
+        animation.stateChanged.connect(_on_state)
+
+    def animation_started(self, name: str):
+        self._running.setdefault(name, time.perf_counter())
+
+    def animation_stopped(self, name: str):
+        started = self._running.pop(name, None)
+        if started is not None:
+            self._anim_s[name] = self._anim_s.get(name, 0.0) + time.perf_counter() - started
+
+    @contextmanager
+    def frame(self, name: str) -> Iterator[None]:
+        """统计一次绘制的 CPU 时间（process_time，不含等待合成器的时间）。"""
+        if not self.enabled:
+            yield
+            return
+        started = time.process_time()
+        try:
+            yield
+        finally:
+            self._paint_s[name] = self._paint_s.get(name, 0.0) + time.process_time() - started
+            self._frames[name] = self._frames.get(name, 0) + 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """{name: {frames, paint_ms, anim_s, cpu_ms_per_anim_s}}；动画仍在运行时计到当前时刻。"""
+        now = time.perf_counter()
+        out = {}
+        for name in set(self._frames) | set(self._anim_s) | set(self._running):
+            anim_s = self._anim_s.get(name, 0.0)
+            if name in self._running:
+                anim_s += now - self._running[name]
+            paint_ms = self._paint_s.get(name, 0.0) * 1000
+            out[name] = {
+                'frames': self._frames.get(name, 0),
+                'paint_ms': round(paint_ms, 2),
+                'anim_s': round(anim_s, 3),
+                'cpu_ms_per_anim_s': round(paint_ms / anim_s, 2) if anim_s > 0 else 0.0,
+            }
+        return out
+
+    def dump(self):
+        if self.enabled:
+            print(f"[Frame Stats] {self.report()}")
+
+    def reset(self):
+        self._frames.clear()
+        self._paint_s.clear()
+        self._anim_s.clear()
+        self._running.clear()
+
+
+frame_stats = FrameStats()
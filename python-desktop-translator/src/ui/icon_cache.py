@@ -0,0 +1,135 @@
+"""应用级图标缓存：每个图标文件只解码一次，按 (尺寸, 设备像素比) 缓存缩放好的版本。
+
+悬浮窗与气泡的 paintEvent 以前每次重绘（包括波纹动画的每一帧）都对原始 PNG 做平滑缩放，
+各气泡窗口也各自从磁盘读取图标。现在统一通过 icon_cache 获取：
+
+    pix = icon_cache.pixmap('Conduct.png', 56, self.devicePixelRatioF())
+    painter.drawPixmap(x, y, pix)          # pix 已设置 devicePixelRatio，按逻辑尺寸绘制
+    self.setWindowIcon(icon_cache.icon('ai_qa.png'))
+
+名称不带扩展名时优先使用同名 SVG（经 QSvgRenderer 按目标尺寸栅格化），否则使用 PNG。
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Optional, Tuple
+
+from PyQt5 import QtCore, QtGui
+
+try:
+    from PyQt5.QtSvg import QSvgRenderer
+except ImportError:  # 未安装 QtSvg 时只支持位图图标
+    QSvgRenderer = None
+
+ICONS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'icons'))
+
+
+class IconCache:
+    """解码后的图标与缩放版本缓存（仅在 GUI 线程使用）。"""
+
+    def __init__(self, icons_dir: str = ICONS_DIR):
+        self.icons_dir = icons_dir
+        self._paths: Dict[str, Optional[str]] = {}
+        self._sources: Dict[str, Optional[QtGui.QPixmap]] = {}
+        self._renderers: Dict[str, Optional["QSvgRenderer"]] = {}
+        self._scaled: Dict[Tuple[str, int, int, float], Optional[QtGui.QPixmap]] = {}
+        self._icons: Dict[str, QtGui.QIcon] = {}
+        self.decodes = 0  # 实际读取磁盘解码的次数
+
+    def path(self, name: str) -> Optional[str]:
+        """图标文件路径；不存在时返回 None。"""
+        if name not in self._paths:
+            candidates = [name] if os.path.splitext(name)[1] else [name + '.svg', name + '.png']
+            found = None
+            for candidate in candidates:
+                full = os.path.join(self.icons_dir, candidate)
+                if os.path.isfile(full) and (QSvgRenderer is not None or not full.endswith('.svg')):
+                    found = full
+                    break
+            self._paths[name] = found
+        return self._paths[name]
+
+    def source(self, name: str) -> Optional[QtGui.QPixmap]:
+        """原始尺寸的位图（SVG 按默认尺寸栅格化）；缺失或无法解码时返回 None。"""
+        if name not in self._sources:
+            path = self.path(name)
+            pix = None
+            if path is not None and path.endswith('.svg'):
+                renderer = self._renderer(name, path)
+                if renderer is not None:
+                    size = renderer.defaultSize()
+                    pix = self._rasterize(renderer, size.width(), size.height(), 1.0)
+            elif path is not None:
+                self.decodes += 1
+                pix = QtGui.QPixmap(path)
+                if pix.isNull():
+                    pix = None
+            self._sources[name] = pix
+        return self._sources[name]
+
+    def pixmap(self, name: str, width: int, dpr: float = 1.0, height: Optional[int] = None) -> Optional[QtGui.QPixmap]:
+        """按逻辑尺寸 (width, height) 保持比例缩放后的图标，已设置 devicePixelRatio。"""
+        height = width if height is None else height
+        key = (name, int(width), int(height), float(dpr))
+        if key not in self._scaled:
+            self._scaled[key] = self._make_scaled(name, int(width), int(height), float(dpr))
+        return self._scaled[key]
+
+    def _make_scaled(self, name: str, width: int, height: int, dpr: float) -> Optional[QtGui.QPixmap]:
+        if width <= 0 or height <= 0:
+            return None
+        path = self.path(name)
+        if path is not None and path.endswith('.svg'):
+            renderer = self._renderer(name, path)
+            if renderer is None:
+                return None
+            size = renderer.defaultSize()
+            size.scale(width, height, QtCore.Qt.KeepAspectRatio)
+            return self._rasterize(renderer, size.width(), size.height(), dpr)
+        source = self.source(name)
+        if source is None:
+            return None
+        scaled = source.scaled(
+            int(round(width * dpr)), int(round(height * dpr)),
+            QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation,
+        )
+        scaled.setDevicePixelRatio(dpr)
+        return scaled
+
+    def _renderer(self, name: str, path: str) -> Optional["QSvgRenderer"]:
+        if name not in self._renderers:
+            self.decodes += 1
+            renderer = QSvgRenderer(path)
+            self._renderers[name] = renderer if renderer.isValid() else None
+        return self._renderers[name]
+
+    @staticmethod
+    def _rasterize(renderer: "QSvgRenderer", width: int, height: int, dpr: float) -> Optional[QtGui.QPixmap]:
+        if width <= 0 or height <= 0:
+            return None
+        image = QtGui.QImage(int(round(width * dpr)), int(round(height * dpr)), QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(image)
+        renderer.render(painter)
+        painter.end()
+        pix = QtGui.QPixmap.fromImage(image)
+        pix.setDevicePixelRatio(dpr)
+        return pix
+
+    def icon(self, name: str) -> QtGui.QIcon:
+        """窗口/托盘用 QIcon（共享同一解码结果）；缺失时为空图标。"""
+        if name not in self._icons:
+            source = self.source(name)
+            self._icons[name] = QtGui.QIcon(source) if source is not None else QtGui.QIcon()
+        return self._icons[name]
+
+    def clear(self):
+        self._paths.clear()
+        self._sources.clear()
+        self._renderers.clear()
+        self._scaled.clear()
+        self._icons.clear()
+
+
+icon_cache = IconCache()
@@ -0,0 +1,287 @@
+"""划词翻译：全局热键复制当前选中文本，在光标旁的轻量弹窗中流式显示译文。
+
+流程与各阶段计时（均从按下热键开始计）：
+
+    hotkey       热键线程 -> Qt 主线程派发，弹窗立即显示占位
+    capture      后台线程模拟复制（utils.clipboard.capture_selection），GUI 线程保存并恢复原剪贴板
+    detect       本地语言检测，决定目标语言
+    cache        查询 TranslationService 的译文缓存
+    first_glyph  译文（缓存命中或第一个流式片段）在弹窗中完成首次绘制
+
+命中缓存时按键到首字的目标是 FIRST_GLYPH_BUDGET_MS 以内，超出时打印警告。
+弹窗为启动时预先创建的单个组件，反复复用，不会构造完整的翻译气泡。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from core.ai_engine import ai_engine
+from ui.theme_manager import theme_manager
+
+FIRST_GLYPH_BUDGET_MS = 300
+
+
+def _capture_selection() -> str:
+    from utils.clipboard import capture_selection  # pyperclip / pynput 仅在使用时导入
+    # pyperclip 只能恢复纯文本，原剪贴板由 SelectionTranslator 在 GUI 线程完整恢复
+    return capture_selection(restore=False)
+
+
+def _snapshot_clipboard():
+    """复制系统剪贴板的全部 MIME 数据（图片、文件列表、富文本等），须在 GUI 线程调用。"""
+    mime = QtWidgets.QApplication.clipboard().mimeData()
+    if mime is None:
+        return [], None
+    items = [(fmt, bytes(mime.data(fmt))) for fmt in mime.formats()]
+    image = mime.imageData() if mime.hasImage() else None
+    return items, image
+
+
+def _restore_clipboard(snapshot):
+    """恢复 _snapshot_clipboard() 保存的内容，须在 GUI 线程调用。"""
+    clipboard = QtWidgets.QApplication.clipboard()
+    items, image = snapshot
+    if not items and image is None:
+        clipboard.clear()
+        return
+    mime = QtCore.QMimeData()
+    for fmt, data in items:
+        mime.setData(fmt, QtCore.QByteArray(data))
+    if image is not None:
+        mime.setImageData(image)
+    clipboard.setMimeData(mime)
+
+
+class StageTimer:
+    """记录各阶段相对起点的累计耗时（毫秒）。"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.stages: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> float:
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.stages.append((stage, elapsed))
+        return elapsed
+
+    def summary(self) -> str:
+        return " | ".join(f"{name} {ms:.1f} ms" for name, ms in self.stages)
+
+
+class TranslatePopup(QtWidgets.QFrame):
+    """光标旁的译文弹窗：不抢焦点，点击关闭，鼠标离开后自动隐藏。"""
+
+    painted = QtCore.pyqtSignal()
+
+    MAX_WIDTH = 420
+    AUTO_HIDE_MS = 12000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("translatePopup")
+        self.setWindowFlags(
+            QtCore.Qt.Tool | QtCore.Qt.FramelessWindowHint | QtCore.Qt.WindowStaysOnTopHint
+            | QtCore.Qt.WindowDoesNotAcceptFocus
+        )
+        self.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)
+        self.setAttribute(QtCore.Qt.WA_QuitOnClose, False)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(12, 8, 12, 8)
+        self.label = QtWidgets.QLabel(self)
+        self.label.setWordWrap(True)
+        self.label.setMaximumWidth(self.MAX_WIDTH)
+        self.label.setTextFormat(QtCore.Qt.PlainText)
+        layout.addWidget(self.label)
+        self._hide_timer = QtCore.QTimer(self)
+        self._hide_timer.setSingleShot(True)
+        self._hide_timer.setInterval(self.AUTO_HIDE_MS)
+        self._hide_timer.timeout.connect(self.hide)
+        self.apply_theme()
+        theme_manager.theme_changed.connect(lambda _name: self.apply_theme())
+        # 预先完成样式解析与布局，首次弹出时不再付出这部分开销
+        self.ensurePolished()
+        layout.activate()
+
+    def apply_theme(self):
+        self.setStyleSheet(theme_manager.style_for('translate_popup'))
+
+    def show_at(self, pos: QtCore.QPoint, text: str):
+        self.set_text(text)
+        self._place_near(pos)
+        self.show()
+        self.raise_()
+
+    def set_text(self, text: str):
+        self.label.setText(text)
+        self._refit()
+
+    def append_text(self, piece: str):
+        self.label.setText(self.label.text() + piece)
+        self._refit()
+
+    def text(self) -> str:
+        return self.label.text()
+
+    def _refit(self):
+        self.adjustSize()
+        if not self.underMouse():
+            self._hide_timer.start()
+
+    def _place_near(self, pos: QtCore.QPoint):
+        self.adjustSize()
+        target = QtCore.QPoint(pos.x() + 12, pos.y() + 16)
+        screen = QtWidgets.QApplication.screenAt(pos) or QtWidgets.QApplication.primaryScreen()
+        if screen is not None:
+            area = screen.availableGeometry()
+            target.setX(max(area.left(), min(target.x(), area.right() - self.width())))
+            if target.y() + self.height() > area.bottom():
+                target.setY(pos.y() - self.height() - 8)
+        self.move(target)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.painted.emit()
+
+    def mousePressEvent(self, event):
+        self.hide()
+
+    def enterEvent(self, event):
+        self._hide_timer.stop()
+
+    def leaveEvent(self, event):
+        self._hide_timer.start()
+
+
+class SelectionTranslator(QtCore.QObject):
+    """划词翻译流程控制（仅在 GUI 线程使用）。"""
+
+    finished = QtCore.pyqtSignal(object)  # StageTimer
+    _captured = QtCore.pyqtSignal(int, str)  # (序号, 选中文本)，由后台线程发射
+
+    def __init__(self, translation_service, client, config, popup: Optional[TranslatePopup] = None,
+                 capture: Callable[[], str] = _capture_selection, parent=None):
+        super().__init__(parent)
+        self.translation_service = translation_service
+        self.client = client
+        self.config = config
+        self.popup = popup or TranslatePopup()
+        self._capture = capture
+        self._seq = 0
+        self._timer: Optional[StageTimer] = None
+        self._awaiting_glyph: Optional[str] = None  # 等待首次绘制的来源：'cache' / 'stream'
+        self._request = None
+        self._streamed = False
+        # 进行中的复制次数与复制前的剪贴板；连续触发时沿用第一次保存的内容（之后剪贴板里是复制哨兵）
+        self._captures_in_flight = 0
+        self._saved_clipboard = None
+        self.history: List[StageTimer] = []
+        self._captured.connect(self._on_captured, QtCore.Qt.QueuedConnection)
+        self.popup.painted.connect(self._on_popup_painted)
+
+    def trigger(self, pressed_at: Optional[float] = None):
+        """热键回调：pressed_at 为按键时刻（perf_counter），缺省为现在。"""
+        self._seq += 1
+        seq = self._seq
+        self._cancel_request()
+        self._awaiting_glyph = None
+        self._streamed = False
+        self._timer = StageTimer(pressed_at if pressed_at is not None else time.perf_counter())
+        self._timer.mark("hotkey")
+        self.popup.show_at(QtGui.QCursor.pos(), "…")
+        if self._captures_in_flight == 0:
+            self._saved_clipboard = _snapshot_clipboard()
+        self._captures_in_flight += 1
+
+        def _job():
+            try:
+                text = self._capture()
+            except Exception as e:  # noqa: BLE001 - 剪贴板不可用时按未选中处理
+                print(f"[SelectionTranslate] 读取选中文本失败: {e}")
+                text = ""
+            self._captured.emit(seq, text or "")
+        QtCore.QThreadPool.globalInstance().start(_job)
+
+    def _on_captured(self, seq: int, text: str):
+        self._captures_in_flight -= 1
+        if self._captures_in_flight == 0:
+            _restore_clipboard(self._saved_clipboard)
+            self._saved_clipboard = None
+        if seq != self._seq:
+            return  # 已被更新的一次触发取代
+        timer = self._timer
+        timer.mark("capture")
+        text = text.strip()
+        if not text:
+            self.popup.set_text("未检测到选中的文本")
+            self._finish()
+            return
+        target = self.translation_service.target_for(text)
+        timer.mark("detect")
+        hit = self.translation_service.cached(text, target)
+        timer.mark("cache")
+        if hit is not None:
+            self._awaiting_glyph = "cache"
+            self.popup.set_text(hit)
+            return
+        payload = self.config.build_translation_prompt(text, target)
+        request = ai_engine.stream(self.client, payload)
+        request.chunk.connect(lambda piece, s=seq: self._on_chunk(s, piece))
+        request.finished.connect(lambda full, s=seq: self._on_stream_finished(s, text, target, full))
+        request.failed.connect(lambda error, s=seq: self._on_stream_failed(s, error))
+        self._request = request
+
+    def _on_chunk(self, seq: int, piece: str):
+        if seq != self._seq:
+            return
+        if self._streamed:
+            self.popup.append_text(piece)
+            return
+        self._streamed = True
+        self._timer.mark("first_chunk")
+        self._awaiting_glyph = "stream"
+        self.popup.set_text(piece)
+
+    def _on_stream_finished(self, seq: int, text: str, target: str, translation: str):
+        if seq != self._seq:
+            return
+        self._request = None
+        self.translation_service.remember(text, translation, target)
+        if not translation:
+            self.popup.set_text("未获得译文")
+            self._finish()
+
+    def _on_stream_failed(self, seq: int, error):
+        if seq != self._seq:
+            return
+        self._request = None
+        self.popup.set_text(f"翻译失败：{error}")
+        self._finish()
+
+    def _on_popup_painted(self):
+        if self._awaiting_glyph is None or self._timer is None:
+            return
+        source, self._awaiting_glyph = self._awaiting_glyph, None
+        elapsed = self._timer.mark("first_glyph")
+        note = "命中缓存" if source == "cache" else "流式"
+        print(f"[SelectionTranslate] {self._timer.summary()}（{note}）")
+        if source == "cache" and elapsed > FIRST_GLYPH_BUDGET_MS:
+            print(f"[SelectionTranslate] 警告：命中缓存时按键到首字 {elapsed:.0f} ms，超出 {FIRST_GLYPH_BUDGET_MS} ms 预算")
+        self._finish()
+
+    def _finish(self):
+        if self._timer is not None:
+            self.history.append(self._timer)
+            del self.history[:-50]
+            self.finished.emit(self._timer)
+
+    def _cancel_request(self):
+        if self._request is not None:
+            try:
+                self._request.cancel()
+            except RuntimeError:  # 请求对象已被释放
+                pass
+            self._request = None
@@ -21,13 +21,15 @@ class ThemeManager(QtCore.QObject):
     LIGHT_STYLES = {
         'message_user': "QTextBrowser {background-color:#e3f2fd; border-radius:18px; padding:10px 10px; font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#222;}",
         'message_ai': "QTextBrowser {background-color:#f0f8ff; border-radius:18px; padding:10px 10px; font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#222;}",
-        'window_bg': "QWidget {background:#ffffff;}"
+        'window_bg': "QWidget {background:#ffffff;}",
+        'translate_popup': "QFrame#translatePopup {background-color:#f0f8ff; border:1px solid #90caf9; border-radius:10px;} QLabel {font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#222;}"
     }
 
     DARK_STYLES = {
         'message_user': "QTextBrowser {background-color:#1e3a56; border-radius:18px; padding:10px 10px; font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#ddd;}",
         'message_ai': "QTextBrowser {background-color:#1f2f3a; border-radius:18px; padding:10px 10px; font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#ddd;}",
-        'window_bg': "QWidget {background:#111b24;}"
+        'window_bg': "QWidget {background:#111b24;}",
+        'translate_popup': "QFrame#translatePopup {background-color:#1f2f3a; border:1px solid #35506a; border-radius:10px;} QLabel {font-family: 'Segoe UI', 'Microsoft YaHei', 'SimHei', sans-serif; font-size:13px; color:#ddd;}"
     }
 
     def __new__(cls, *args, **kwargs):
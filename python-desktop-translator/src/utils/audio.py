@@ -1,34 +1,340 @@
-from pydub import AudioSegment
+"""音频工具：只读文件头获取时长，按窗口流式完成降混、重采样与响度归一化。
+
+WAV（16 位 PCM）的数据块逐窗口 np.memmap 映射，处理全部是向量化 NumPy 运算，内存占用与音频时长无关；
+其它格式交给 ffmpeg 分块解码（16 kHz 单声道），时长由 ffprobe 读取文件头，不解码。
+
+    probe('meeting.wav').duration_s                         # 不解码
+    for frame in iter_frames('meeting.wav', frame_ms=30):   # 16 kHz 单声道 int16 定长帧，供识别/VAD
+        ...
+    preprocess_wav('meeting.wav', 'meeting_16k.wav', target_dbfs=-20)
+"""
+
+from __future__ import annotations
+
+import math
 import os
+import shutil
+import struct
+import subprocess
+import wave
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+DECODE_SAMPLE_RATE = 16000  # ffmpeg 解码时统一重采样为 16 kHz 单声道
+
+
+class AudioInfo(NamedTuple):
+    sample_rate: int
+    channels: int
+    frames: int
+    duration_s: float
+    data_offset: Optional[int]  # WAV 数据块在文件中的偏移；非 WAV 为 None
+
+
+# ---------------------- 文件头 ----------------------
+def read_wav_header(path: str) -> AudioInfo:
+    """解析 RIFF 头（跳过 LIST 等元数据块）；不是 16 位 PCM WAV 时抛出 ValueError。"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"不是 WAV 文件: {path}")
+        channels = rate = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"WAV 缺少 data 块: {path}")
+            chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                body = f.read(size + (size & 1))
+                audio_format, channels, rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if audio_format not in (1, 0xFFFE) or bits != 16:
+                    raise ValueError(f"仅支持 16 位 PCM WAV: {path}")
+            elif chunk_id == b'data':
+                if channels is None:
+                    raise ValueError(f"WAV 缺少 fmt 块: {path}")
+                offset = f.tell()
+                # 边录边写的文件 data 长度可能未回填，以实际文件大小为准
+                size = min(size, os.path.getsize(path) - offset)
+                frames = size // (2 * channels)
+                return AudioInfo(rate, channels, frames, frames / rate, offset)
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+def probe(path: str) -> AudioInfo:
+    """读取采样率、声道与时长：WAV 解析文件头，其它格式用 ffprobe（同样只读文件头）。"""
+    try:
+        return read_wav_header(path)
+    except ValueError:
+        pass
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        raise RuntimeError(f"读取 {os.path.basename(path)} 需要 ffprobe，请安装 ffmpeg 后加入 PATH")
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-select_streams', 'a:0',
+         '-show_entries', 'stream=sample_rate,channels:format=duration', '-of', 'default=nw=1', path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
+    fields = dict(line.split('=', 1) for line in result.stdout.splitlines() if '=' in line)
+    rate = int(fields.get('sample_rate', 0) or 0)
+    duration = float(fields.get('duration', 0) or 0)
+    return AudioInfo(rate, int(fields.get('channels', 0) or 0), int(duration * rate), duration, None)
+
+
+# ---------------------- 分块读取 ----------------------
+def iter_wav_blocks(path: str, block_frames: int, info: Optional[AudioInfo] = None) -> Iterator[np.ndarray]:
+    """按 block_frames 依次产出 (帧数, 声道) 的 int16 数组。
+
+    每块单独映射、复制后立即解除映射：整文件映射时读过的页面会一直计入常驻内存。
+    """
+    info = info or read_wav_header(path)
+    channels = info.channels
+    for begin in range(0, info.frames, block_frames):
+        count = min(block_frames, info.frames - begin)
+        mapped = np.memmap(path, dtype='<i2', mode='r', offset=info.data_offset + begin * 2 * channels,
+                           shape=(count, channels))
+        block = np.array(mapped)
+        del mapped
+        yield block
+
+
+def downmix(block: np.ndarray) -> np.ndarray:
+    """(帧数, 声道) int16 -> 单声道 float32（满幅为 1.0）。"""
+    if block.ndim == 1:
+        block = block[:, None]
+    # 逐声道累加：比 mean(axis=1) 在只有两三列的短轴上归约快一个数量级
+    mono = block[:, 0].astype(np.float32)
+    for channel in range(1, block.shape[1]):
+        mono += block[:, channel]
+    mono *= np.float32(1.0 / (32768.0 * block.shape[1]))
+    return mono
+
+
+def iter_audio_windows(path: str, window_s: float = 30.0) -> Iterator[Tuple[np.ndarray, int]]:
+    """按固定窗口依次产出 (int16 单声道样本, 采样率)；每次只有一个窗口驻留内存。"""
+    try:
+        info = read_wav_header(path)
+    except ValueError:
+        yield from _ffmpeg_windows(path, window_s)
+        return
+    for block in iter_wav_blocks(path, max(1, int(window_s * info.sample_rate)), info):
+        if info.channels == 1:
+            yield block[:, 0], info.sample_rate
+        else:
+            yield block.mean(axis=1, dtype=np.float32).astype(np.int16), info.sample_rate
+
+
+def _iter_float_windows(path: str, window_s: float) -> Iterator[Tuple[np.ndarray, int]]:
+    """同 iter_audio_windows，但产出 float32；WAV 直接由多声道降混，不经过 int16 中间结果。"""
+    try:
+        info = read_wav_header(path)
+    except ValueError:
+        for window, rate in _ffmpeg_windows(path, window_s):
+            yield window.astype(np.float32) / 32768.0, rate
+        return
+    for block in iter_wav_blocks(path, max(1, int(window_s * info.sample_rate)), info):
+        yield downmix(block), info.sample_rate
+
+
+def _ffmpeg_windows(path: str, window_s: float) -> Iterator[Tuple[np.ndarray, int]]:
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError(f"解码 {os.path.basename(path)} 需要 ffmpeg，请安装后加入 PATH")
+    cmd = [ffmpeg, '-nostdin', '-v', 'error', '-i', path,
+           '-f', 's16le', '-ac', '1', '-ar', str(DECODE_SAMPLE_RATE), '-']
+    block = int(window_s * DECODE_SAMPLE_RATE) * 2
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        while True:
+            raw = proc.stdout.read(block)
+            if not raw:
+                break
+            yield np.frombuffer(raw[:len(raw) - len(raw) % 2], dtype='<i2'), DECODE_SAMPLE_RATE
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg 解码失败: {proc.stderr.read().decode('utf-8', 'replace').strip()}")
+
+
+# ---------------------- 重采样与响度 ----------------------
+class StreamResampler:
+    """分块重采样：降采样前用加窗 sinc 低通抗混叠，再线性插值；块与块之间保持相位连续。
 
+    输出与一次性处理整段音频的结果一致（滤波器群延迟已补偿）。
+    """
+
+    FFT_SIZE = 1 << 15  # 长块用重叠保留法做 FFT 卷积，短块直接卷积
+
+    def __init__(self, src_rate: int, dst_rate: int, taps: int = 63):
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.step = src_rate / dst_rate  # 每个输出样本前进的输入样本数
+        if dst_rate < src_rate:
+            cutoff = 0.5 * dst_rate / src_rate * 0.9  # 以输入采样率归一化，留 10% 过渡带
+            n = np.arange(taps) - (taps - 1) / 2
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(taps)
+            self._kernel = (kernel / kernel.sum()).astype(np.float32)
+            self._kernel_fft = np.fft.rfft(self._kernel, self.FFT_SIZE)
+        else:
+            self._kernel = None
+        delay = (taps - 1) // 2 if self._kernel is not None else 0
+        self._history = np.zeros(len(self._kernel) - 1 if self._kernel is not None else 0, dtype=np.float32)
+        self._skip = delay           # 尚需丢弃的滤波输出（群延迟）
+        self._flush_pad = delay
+        self._carry = np.zeros(0, dtype=np.float32)  # 上一块最后一个滤波后的样本
+        self._pos = 0.0              # 下一个输出样本相对 _carry 起点的位置
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        x = np.asarray(samples, dtype=np.float32)
+        if self._kernel is not None:
+            padded = np.concatenate((self._history, x))
+            self._history = padded[len(padded) - len(self._history):]
+            x = self._filter(padded)
+            if self._skip:
+                dropped = min(self._skip, len(x))
+                x = x[dropped:]
+                self._skip -= dropped
+        if self.src_rate == self.dst_rate:
+            return x
+        buf = np.concatenate((self._carry, x))
+        if len(buf) < 2:
+            self._carry = buf
+            return np.zeros(0, dtype=np.float32)
+        last = len(buf) - 1
+        count = int(math.floor((last - self._pos) / self.step)) + 1 if self._pos <= last else 0
+        positions = self._pos + np.arange(count) * self.step
+        index = positions.astype(np.int64)
+        np.minimum(index, last - 1, out=index)
+        frac = (positions - index).astype(np.float32)
+        left = buf[index]
+        out = left + frac * (buf[index + 1] - left)
+        self._pos = self._pos + count * self.step - last
+        self._carry = buf[last:]
+        return out
+
+    def _filter(self, padded: np.ndarray) -> np.ndarray:
+        """padded 的 'valid' 卷积（长度 len(padded) - taps + 1）。"""
+        taps = len(self._kernel)
+        count = len(padded) - taps + 1
+        if count < 4 * self.FFT_SIZE:
+            return np.convolve(padded, self._kernel, mode='valid').astype(np.float32)
+        step = self.FFT_SIZE - taps + 1
+        blocks = -(-count // step)
+        source = np.zeros((blocks - 1) * step + self.FFT_SIZE, dtype=np.float32)
+        source[:len(padded)] = padded
+        segments = np.lib.stride_tricks.as_strided(
+            source, shape=(blocks, self.FFT_SIZE), strides=(step * source.itemsize, source.itemsize))
+        filtered = np.fft.irfft(np.fft.rfft(segments, axis=1) * self._kernel_fft, self.FFT_SIZE, axis=1)
+        return filtered[:, taps - 1:].reshape(-1)[:count].astype(np.float32)
+
+    def flush(self) -> np.ndarray:
+        """送入补偿群延迟所需的尾部零样本，取出剩余输出。"""
+        pad, self._flush_pad = self._flush_pad, 0
+        return self.process(np.zeros(pad, dtype=np.float32)) if pad else np.zeros(0, dtype=np.float32)
+
+
+def rms_dbfs(path: str, window_s: float = 30.0) -> float:
+    """整段音频的 RMS 响度（dBFS），逐窗口累计平方和；静音返回 -inf。"""
+    total = 0.0
+    count = 0
+    for window, _rate in _iter_float_windows(path, window_s):
+        total += float(np.dot(window, window))
+        count += len(window)
+    if not count or total == 0:
+        return float('-inf')
+    return 10 * math.log10(total / count)
+
+
+def iter_frames(path: str, sample_rate: int = 16000, frame_ms: int = 30, target_dbfs: Optional[float] = None,
+                window_s: float = 10.0) -> Iterator[np.ndarray]:
+    """产出 sample_rate 单声道 int16 定长帧（末帧补零）；target_dbfs 非空时按整段 RMS 归一化响度。
+
+    归一化需要先完整读一遍测量响度，因此会读取文件两次。
+    """
+    gain = 1.0
+    if target_dbfs is not None:
+        measured = rms_dbfs(path)
+        if math.isfinite(measured):
+            gain = 10 ** ((target_dbfs - measured) / 20)
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    resampler = None
+    pending = np.zeros(0, dtype=np.float32)
+    for window, rate in _iter_float_windows(path, window_s):
+        if resampler is None:
+            resampler = StreamResampler(rate, sample_rate)
+        pending = np.concatenate((pending, resampler.process(window)))
+        usable = len(pending) - len(pending) % frame_len
+        if usable:
+            yield from _to_int16(pending[:usable], gain).reshape(-1, frame_len)
+            pending = pending[usable:]
+    if resampler is not None:
+        pending = np.concatenate((pending, resampler.flush()))
+    if len(pending):
+        padded = np.zeros(-(-len(pending) // frame_len) * frame_len, dtype=np.float32)
+        padded[:len(pending)] = pending
+        yield from _to_int16(padded, gain).reshape(-1, frame_len)
+
+
+def _to_int16(samples: np.ndarray, gain: float) -> np.ndarray:
+    scaled = samples * np.float32(gain * 32768.0)
+    return np.clip(scaled, -32768, 32767).astype(np.int16)
+
+
+def preprocess_wav(src: str, dst: str, sample_rate: int = 16000, target_dbfs: Optional[float] = -20.0,
+                   frame_ms: int = 1000) -> AudioInfo:
+    """流式转换为 sample_rate 单声道 16 位 WAV（可选响度归一化），返回输出文件信息。"""
+    with wave.open(dst, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for frame in iter_frames(src, sample_rate, frame_ms, target_dbfs):
+            out.writeframes(frame.tobytes())
+    return read_wav_header(dst)
+
+
+# ---------------------- 兼容旧接口 ----------------------
 class AudioProcessor:
     def __init__(self, audio_file):
         self.audio_file = audio_file
-        self.audio_segment = None
+        self.info: Optional[AudioInfo] = None
 
     def load_audio(self):
+        """只读取文件头，不解码音频。"""
         if os.path.exists(self.audio_file):
-            self.audio_segment = AudioSegment.from_file(self.audio_file)
+            self.info = probe(self.audio_file)
         else:
             raise FileNotFoundError(f"Audio file {self.audio_file} not found.")
 
-    def play_audio(self):
-        if self.audio_segment is not None:
-            play(self.audio_segment)
-        else:
+    def _require_loaded(self):
+        if self.info is None:
             raise ValueError("Audio segment is not loaded. Please load an audio file first.")
 
+    def play_audio(self):
+        """在当前线程播放（阻塞至播放结束）。"""
+        self._require_loaded()
+        from services.speech_service import AudioClip, default_output
+        with open(self.audio_file, 'rb') as f:
+            data = f.read()
+        fmt = os.path.splitext(self.audio_file)[1].lstrip('.').lower() or 'wav'
+        output = default_output()
+        output.play(output.prepare(AudioClip(data, fmt)))
+
     def convert_format(self, output_format):
-        if self.audio_segment is not None:
-            base = os.path.splitext(self.audio_file)[0]
-            output_file = f"{base}.{output_format}"
-            self.audio_segment.export(output_file, format=output_format)
-            return output_file
-        else:
-            raise ValueError("Audio segment is not loaded. Please load an audio file first.")
+        """转换容器格式：ffmpeg 逐块转码（不会把整段音频读进内存）。"""
+        self._require_loaded()
+        base = os.path.splitext(self.audio_file)[0]
+        output_file = f"{base}.{output_format}"
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            if output_format.lower() == 'wav' and self.info.data_offset is not None:
+                return output_file if os.path.abspath(output_file) == os.path.abspath(self.audio_file) \
+                    else shutil.copyfile(self.audio_file, output_file)
+            raise RuntimeError("格式转换需要 ffmpeg，请安装后加入 PATH")
+        subprocess.run([ffmpeg, '-nostdin', '-v', 'error', '-y', '-i', self.audio_file, output_file], check=True)
+        return output_file
+
+    def preprocess(self, output_file, sample_rate=16000, target_dbfs=-20.0):
+        """生成供识别使用的单声道 WAV（重采样 + 响度归一化）。"""
+        self._require_loaded()
+        return preprocess_wav(self.audio_file, output_file, sample_rate, target_dbfs)
 
     def get_duration(self):
-        if self.audio_segment is not None:
-            return len(self.audio_segment) / 1000  # duration in seconds
-        else:
-            raise ValueError("Audio segment is not loaded. Please load an audio file first.")
\ No newline at end of file
+        self._require_loaded()
+        return self.info.duration_s  # duration in seconds
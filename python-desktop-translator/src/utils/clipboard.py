@@ -1,5 +1,13 @@
+import sys
+import time
+
 import pyperclip
 
+try:
+    from pynput.keyboard import Controller, Key  # type: ignore
+except ImportError:  # 未安装 pynput 时无法模拟复制快捷键
+    Controller = Key = None
+
 def get_clipboard_text():
     """获取剪贴板中的文本"""
     return pyperclip.paste()
@@ -10,4 +18,35 @@ def set_clipboard_text(text):
 
 def clear_clipboard():
     """清空剪贴板"""
-    pyperclip.copy("")
\ No newline at end of file
+    pyperclip.copy("")
+
+def capture_selection(timeout=0.3, poll_interval=0.01, restore=True):
+    """模拟 Ctrl+C（macOS 为 Cmd+C）复制当前选中的文本并返回（阻塞，应在后台线程调用）。
+
+    没有选中文本、超时或无法模拟按键时返回空字符串。
+    restore=True 时随后用 pyperclip 恢复原剪贴板，但 pyperclip 只能读写纯文本：原内容不是文本
+    （图片、文件等）时跳过恢复，以免把它清空。需要完整恢复时传 restore=False，
+    并在 GUI 线程中通过 QClipboard 保存/恢复全部 MIME 数据（划词翻译即如此）。
+    """
+    if Controller is None:
+        return ""
+    saved = pyperclip.paste() if restore else ""
+    sentinel = f"__xiaokai_selection_{time.monotonic_ns()}__"
+    pyperclip.copy(sentinel)
+    controller = Controller()
+    # 触发热键时 Alt/Shift 可能仍按着，先松开，否则目标程序收到的是 Ctrl+Alt+C
+    for modifier in (Key.alt, Key.alt_gr, Key.shift):
+        controller.release(modifier)
+    with controller.pressed(Key.cmd if sys.platform == 'darwin' else Key.ctrl):
+        controller.tap('c')
+    text = ""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        current = pyperclip.paste()
+        if current != sentinel:
+            text = current
+            break
+        time.sleep(poll_interval)
+    if restore and saved:
+        pyperclip.copy(saved)
+    return text
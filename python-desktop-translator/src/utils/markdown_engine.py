@@ -0,0 +1,179 @@
+"""共享 Markdown 渲染引擎 + HTML 结果 LRU 缓存。
+
+markdown.markdown() 每次调用都会重新构造解析器并加载全部扩展；消息组件在换主题、
+结束流式输出、重新打开历史时都会重复渲染同一段文本。这里：
+1. 进程内复用同一个 markdown.Markdown 实例（每次转换前 reset），可通过 reset() 重建
+2. 以 (文本哈希, 主题, 渲染器版本) 为键缓存 HTML，按总字节数做 LRU 淘汰
+
+codehilite 输出的是 CSS 类名，HTML 本身与主题无关，消息组件使用默认主题键即可；
+主题参数留给需要内联颜色的渲染方式。本模块不依赖 Qt，可在子进程中使用
+（core.render_pool 在进程池中调用 render_html 处理大段文本）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+try:
+    import markdown as _markdown
+except ImportError:  # 运行环境尚未安装 markdown 包时的降级处理
+    _markdown = None
+
+# 渲染逻辑（扩展、降级处理）变化时递增，使旧缓存失效
+RENDERER_VERSION = 1
+
+_EXTENSIONS = [
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.codehilite',
+    'markdown.extensions.extra',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.sane_lists',
+]
+_EXTENSION_CONFIGS = {
+    'markdown.extensions.codehilite': {'guess_lang': False}
+}
+
+
+def fallback_html(text: str) -> str:
+    """简易转义并支持一小部分 Markdown 语法（粗体/斜体/行内代码）以做降级显示。"""
+    safe = (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+    # 行内代码： `code` -> <code>code</code>
+    safe = re.sub(r'`([^`]+?)`', r'<code>\1</code>', safe)
+    # 粗体： **bold** 或 __bold__
+    safe = re.sub(r'\*\*([^\*]+?)\*\*', r'<strong>\1</strong>', safe)
+    safe = re.sub(r'__([^_]+?)__', r'<strong>\1</strong>', safe)
+    # 斜体： *italic* 或 _italic_
+    safe = re.sub(r'\*([^\*]+?)\*', r'<em>\1</em>', safe)
+    safe = re.sub(r'_([^_]+?)_', r'<em>\1</em>', safe)
+    # 换行
+    return safe.replace('\n', '<br/>')
+
+
+def _append_fence_fallback(text: str, html: str) -> str:
+    """包含代码围栏但未渲染出 <pre> 时，在末尾追加降级代码块，保证可见且可换行。"""
+    if '```' not in text or '<pre' in html:
+        return html
+    collecting = False
+    buffer = []
+    code_segments = []
+    for line in text.split('\n'):
+        if line.startswith('```') and not collecting:
+            collecting = True
+            buffer = []
+            continue
+        if line.startswith('```') and collecting:
+            collecting = False
+            code_segments.append('\n'.join(buffer))
+            buffer = []
+            continue
+        if collecting:
+            buffer.append(line)
+    for seg in code_segments:
+        escaped = seg.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        html += f"<div><pre>{escaped}</pre></div>"
+    return html
+
+
+class MarkdownEngine:
+    """可复用的 Markdown 转换器，带按字节数限制的 LRU HTML 缓存（线程安全）。"""
+
+    def __init__(self, max_cache_bytes: int = 8 * 1024 * 1024):
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._md = None
+        self._cache: "OrderedDict[Tuple[bytes, str, int], str]" = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.conversions = 0
+
+    @staticmethod
+    def cache_key(text: str, theme: str = "default") -> Tuple[bytes, str, int]:
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        return digest, theme, RENDERER_VERSION
+
+    def render(self, text: str, theme: str = "default") -> str:
+        """返回 Markdown 对应的 HTML 片段（未包装样式）；命中缓存时不解析。"""
+        key = self.cache_key(text, theme)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+            html = _append_fence_fallback(text, self._convert(text))
+            self._store(key, html)
+        return html
+
+    def cached(self, text: str, theme: str = "default"):
+        """只查缓存，不解析；未命中返回 None。"""
+        key = self.cache_key(text, theme)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+            return html
+
+    def put(self, text: str, html: str, theme: str = "default") -> None:
+        """写入在别处（如子进程）渲染好的结果。"""
+        key = self.cache_key(text, theme)
+        with self._lock:
+            if key not in self._cache:
+                self._store(key, html)
+
+    def _convert(self, text: str) -> str:
+        if _markdown is None:
+            return fallback_html(text)
+        try:
+            if self._md is None:
+                self._md = _markdown.Markdown(
+                    extensions=_EXTENSIONS, extension_configs=_EXTENSION_CONFIGS, output_format='html'
+                )
+            self.conversions += 1
+            return self._md.reset().convert(text)
+        except Exception:
+            # 解析器内部状态可能已损坏，下次重建
+            self._md = None
+            return fallback_html(text)
+
+    def _store(self, key, html: str) -> None:
+        size = len(html.encode('utf-8'))
+        if size > self.max_cache_bytes:
+            return
+        self._cache[key] = html
+        self._cache_bytes += size
+        while self._cache_bytes > self.max_cache_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= len(old.encode('utf-8'))
+
+    def reset(self, clear_cache: bool = False) -> None:
+        """丢弃当前解析器（下次渲染时重建），可选同时清空缓存。"""
+        with self._lock:
+            self._md = None
+            if clear_cache:
+                self._cache.clear()
+                self._cache_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._cache),
+            "bytes": self._cache_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "conversions": self.conversions,
+        }
+
+
+markdown_engine = MarkdownEngine()
+
+
+def render_html(text: str, theme: str = "default") -> str:
+    """进程池任务入口（须为模块级函数以便 pickle），使用子进程自己的引擎实例。"""
+    return markdown_engine.render(text, theme)
+
@@ -12,6 +12,69 @@ def get_system_info():
     
     return system_info
 
+def process_rss_mb():
+    """当前进程常驻内存（MB）；无法获取时返回 None。
+
+    依次尝试 psutil（可选依赖）、Linux 的 /proc/self/statm、Windows 的 GetProcessMemoryInfo。
+    不回退到 ru_maxrss：它是峰值，释放内存后不会下降，见 process_peak_rss_mb。
+    """
+    import os
+    import sys
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if get_info(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / (1024 * 1024)
+        except (AttributeError, OSError):
+            pass
+        return None
+    return None
+
+def process_peak_rss_mb():
+    """进程常驻内存峰值（MB），来自 ru_maxrss；无法获取时返回 None。"""
+    import os
+
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux 为 KB，macOS 为字节
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
 def check_internet_connection():
     import socket
 
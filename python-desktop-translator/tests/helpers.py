@@ -0,0 +1,46 @@
+"""测试共用的辅助函数：等待 Qt 事件循环中的异步结果、生成测试音频。"""
+
+import math
+import time
+import wave
+from typing import Optional
+
+import numpy as np
+
+RATE = 16000
+
+
+def wait_until(app, predicate, timeout=5.0, interval=0.005):
+    """处理 Qt 事件直到 predicate() 为真，超时返回 False。"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def tone(seconds, rate=RATE, amplitude=0.3, freq=220.0, dbfs: Optional[float] = None):
+    """16 位正弦波；给出 dbfs 时按目标响度换算幅度（正弦波 RMS = 峰值 / sqrt(2)）。"""
+    if dbfs is not None:
+        amplitude = 10 ** (dbfs / 20) * math.sqrt(2)
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def write_wav(path, samples, rate=RATE, channels=1, extra_chunk=False):
+    """写 16 位 PCM WAV；extra_chunk=True 时在 fmt 与 data 之间插入 LIST 块，模拟录音软件写出的元数据。"""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    if extra_chunk:
+        with open(path, 'rb') as f:
+            data = f.read()
+        chunk = b'LIST' + (6).to_bytes(4, 'little') + b'INFOab'
+        data = data[:36] + chunk + data[36:]
+        data = data[:4] + (len(data) - 8).to_bytes(4, 'little') + data[8:]
+        with open(path, 'wb') as f:
+            f.write(data)
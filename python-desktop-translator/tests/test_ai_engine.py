@@ -0,0 +1,170 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.app_config import AppConfig
+from core.ai_engine import ai_engine
+from services.ai_client import AIClientError
+from services.answer_cache import AnswerCache
+from ui.bubbles.ai_qa import AIQAWidget
+from ui.bubbles.ai_translate import AITranslateBubble
+
+
+class SlowStreamClient:
+    """模拟网络：建立连接较慢，之后逐片段返回。"""
+
+    def __init__(self, chunks, connect_delay=0.2, chunk_delay=0.02):
+        self.chunks = chunks
+        self.connect_delay = connect_delay
+        self.chunk_delay = chunk_delay
+        self.threads = set()
+
+    def chat_stream(self, payload):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.connect_delay)
+        for chunk in self.chunks:
+            time.sleep(self.chunk_delay)
+            yield chunk
+
+
+class FailingClient:
+    def chat_stream(self, payload):
+        raise AIClientError("boom")
+        yield  # pragma: no cover
+
+
+def run_until(predicate, timeout=10.0):
+    """运行事件循环直到条件满足，返回期间主线程两次定时器回调的最大间隔（毫秒）。"""
+    app = QApplication.instance()
+    gaps = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        gaps.append((now - last[0]) * 1000)
+        last[0] = now
+
+    timer = QtCore.QTimer()
+    timer.setInterval(1)
+    timer.timeout.connect(tick)
+    timer.start()
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+    timer.stop()
+    return max(gaps) if gaps else 0.0
+
+
+class TestAIEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_stream_delivers_chunks_on_main_thread(self):
+        client = SlowStreamClient(['Hel', 'lo', ' world'], connect_delay=0.05)
+        received, done, slot_threads = [], [], set()
+
+        def on_chunk(text):
+            slot_threads.add(threading.get_ident())
+            received.append(text)
+
+        request = ai_engine.stream(client, {'messages': []})
+        request.chunk.connect(on_chunk)
+        request.finished.connect(done.append)
+        run_until(lambda: done)
+        self.assertEqual(received, ['Hel', 'lo', ' world'])
+        self.assertEqual(done, ['Hello world'])
+        self.assertEqual(slot_threads, {threading.get_ident()})
+        self.assertNotIn(threading.get_ident(), client.threads)
+
+    def test_concurrent_streams(self):
+        results = {}
+        for name in ('a', 'b', 'c'):
+            client = SlowStreamClient([name] * 5, connect_delay=0.3, chunk_delay=0.01)
+            request = ai_engine.stream(client, lambda: {'messages': []})
+            request.finished.connect(lambda text, n=name: results.__setitem__(n, text))
+        start = time.perf_counter()
+        run_until(lambda: len(results) == 3)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(results, {'a': 'aaaaa', 'b': 'bbbbb', 'c': 'ccccc'})
+        # 三个请求并行等待连接，总耗时明显小于串行的 3 × 0.35 秒
+        self.assertLess(elapsed, 0.8)
+
+    def test_cancel_emits_aborted_instead_of_finished(self):
+        client = SlowStreamClient(['a'] * 50, connect_delay=0.0, chunk_delay=0.01)
+        done, aborted = [], []
+        request = ai_engine.stream(client, {'messages': []})
+        request.finished.connect(done.append)
+        request.aborted.connect(aborted.append)
+        request.chunk.connect(lambda _piece: request.cancel())
+        run_until(lambda: aborted)
+        self.assertEqual(done, [])
+        self.assertTrue(0 < len(aborted[0]) < 50)
+
+    def test_failure_is_reported(self):
+        errors = []
+        request = ai_engine.stream(FailingClient(), {'messages': []})
+        request.failed.connect(errors.append)
+        run_until(lambda: errors)
+        self.assertIsInstance(errors[0], AIClientError)
+
+    def test_bubble_keeps_main_thread_responsive(self):
+        client = SlowStreamClient(['token '] * 60, connect_delay=0.3, chunk_delay=0.01)
+        bubble = AITranslateBubble(AppConfig(), client)
+        bubble.show()
+        run_until(lambda: False, timeout=0.3)  # 等待窗口初始布局完成
+        bubble.input_text.setPlainText('hello')
+        bubble.translate_text()
+        self.assertFalse(bubble.translate_button.isEnabled())
+        max_gap = run_until(lambda: bubble.translate_button.isEnabled())
+        self.assertTrue(bubble.translate_button.isEnabled())
+        self.assertEqual(bubble.history.get_messages()[-1].raw_text, 'token ' * 60)
+        self.assertLess(max_gap, 16)
+        bubble.close()
+
+
+
+class TestAIQACachedAnswer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_refreshed_answer_is_recorded_once(self):
+        config = AppConfig()
+        config.qa_cache_refresh = True
+        cache = AnswerCache()
+        cache.put('How to reset VPN?', 'old answer', config.model)
+        client = SlowStreamClient(['new ', 'answer'], connect_delay=0.05, chunk_delay=0.0)
+        widget = AIQAWidget(config, client, answer_cache_provider=lambda: cache)
+        recorded = []
+        widget.history.record = lambda role, content: recorded.append((role, content))
+
+        widget.question_input.setPlainText('reset vpn')
+        widget._ask()
+        handle = widget.history.message_handle(-1)
+        self.assertEqual(handle.content, 'old answer')
+        # 缓存标记在消息记录上，组件被回收重建后仍在
+        self.assertTrue(handle.tooltip.startswith('缓存答案'))
+        self.assertEqual(recorded, [('user', 'reset vpn')])
+
+        run_until(lambda: len(recorded) == 2)
+        self.assertEqual(recorded, [('user', 'reset vpn'), ('ai', 'new answer')])
+        self.assertEqual(handle.content, 'new answer')
+        self.assertEqual(handle.tooltip, '')
+        self.assertEqual(cache.lookup('reset vpn', config.model).answer, 'new answer')
+        widget.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.answer_cache import AnswerCache, normalize_question
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_normalize(self):
+        self.assertEqual(normalize_question('  How to RESET   the VPN?? '), 'how to reset the vpn')
+
+    def test_near_duplicate_hits(self):
+        cache = AnswerCache()
+        cache.put('How to reset VPN?', 'Open the portal.', 'gpt')
+        hit = cache.lookup('VPN reset steps', 'gpt')
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.answer, 'Open the portal.')
+        self.assertGreaterEqual(hit.similarity, cache.threshold)
+
+    def test_chinese_near_duplicate(self):
+        cache = AnswerCache()
+        cache.put('如何重置公司VPN密码？', '在门户中点击重置。', 'gpt')
+        self.assertIsNotNone(cache.lookup('公司VPN密码怎么重置', 'gpt'))
+
+    def test_unrelated_question_misses(self):
+        cache = AnswerCache()
+        cache.put('How to reset VPN?', 'Open the portal.', 'gpt')
+        self.assertIsNone(cache.lookup('How do I book a meeting room?', 'gpt'))
+        self.assertIsNone(cache.lookup('reset email password', 'gpt'))
+
+    def test_different_version_numbers_miss(self):
+        cache = AnswerCache()
+        cache.put('install python 3.8', 'Use the 3.8 installer.', 'gpt')
+        self.assertIsNone(cache.lookup('install python 3.9', 'gpt'))
+        self.assertIsNone(cache.lookup('install python', 'gpt'))
+        self.assertEqual(cache.lookup('How to install Python 3.8?', 'gpt').answer, 'Use the 3.8 installer.')
+        # 版本号不同的问题各自缓存，互不覆盖
+        cache.put('install python 3.9', 'Use the 3.9 installer.', 'gpt')
+        self.assertEqual(cache.lookup('install python 3.9', 'gpt').answer, 'Use the 3.9 installer.')
+        self.assertEqual(cache.lookup('install python 3.8', 'gpt').answer, 'Use the 3.8 installer.')
+
+    def test_model_isolation_and_invalidation(self):
+        cache = AnswerCache()
+        cache.put('How to reset VPN?', 'A', 'model-a')
+        cache.put('How to reset VPN?', 'B', 'model-b')
+        self.assertEqual(cache.lookup('reset vpn', 'model-b').answer, 'B')
+        self.assertEqual(cache.invalidate_model('model-a'), 1)
+        self.assertIsNone(cache.lookup('reset vpn', 'model-a'))
+        self.assertEqual(cache.lookup('reset vpn', 'model-b').answer, 'B')
+
+    def test_lru_eviction(self):
+        cache = AnswerCache(capacity=2)
+        cache.put('first question about printers', '1', 'm', last_used=1.0)
+        cache.put('second question about wifi', '2', 'm', last_used=2.0)
+        cache.lookup('first question about printers', 'm')  # 刷新使用时间
+        cache.put('third question about payroll', '3', 'm')
+        self.assertIsNone(cache.lookup('second question about wifi', 'm'))
+        self.assertIsNotNone(cache.lookup('first question about printers', 'm'))
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_stats(self):
+        cache = AnswerCache()
+        cache.put('How to reset VPN?', 'A', 'm')
+        cache.lookup('how to reset vpn', 'm')
+        cache.lookup('unrelated office lunch menu', 'm')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.5)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmpdir, 'answer_cache.json')
+        cache = AnswerCache(path=path)
+        cache.put('How to reset VPN?', 'Open the portal.', 'gpt')
+        cache.save()
+        reloaded = AnswerCache(path=path)
+        self.assertEqual(reloaded.lookup('reset the vpn', 'gpt').answer, 'Open the portal.')
+
+
+if __name__ == '__main__':
+    unittest.main()
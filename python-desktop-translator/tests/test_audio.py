@@ -0,0 +1,66 @@
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.audio import AudioProcessor, StreamResampler, iter_frames, preprocess_wav, probe, rms_dbfs
+from tests.helpers import tone, write_wav
+
+
+class TestAudioUtils(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        left = tone(1.0, 44100, dbfs=-30, freq=440.0)
+        self.stereo = os.path.join(self.tmp.name, 'stereo.wav')
+        write_wav(self.stereo, np.column_stack([left, left]).ravel(), 44100, channels=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_probe_reads_header_only(self):
+        info = probe(self.stereo)
+        self.assertEqual((info.sample_rate, info.channels, info.frames), (44100, 2, 44100))
+        self.assertAlmostEqual(info.duration_s, 1.0)
+
+    def test_frames_are_fixed_size_16k_mono(self):
+        frames = list(iter_frames(self.stereo, sample_rate=16000, frame_ms=30, window_s=0.25))
+        self.assertEqual(len(frames), math.ceil(16000 / 480))
+        self.assertTrue(all(f.shape == (480,) and f.dtype == np.int16 for f in frames))
+
+    def test_loudness_normalization(self):
+        self.assertAlmostEqual(rms_dbfs(self.stereo), -30, delta=0.1)
+        out = os.path.join(self.tmp.name, 'out.wav')
+        info = preprocess_wav(self.stereo, out, sample_rate=16000, target_dbfs=-20)
+        self.assertEqual((info.sample_rate, info.channels), (16000, 1))
+        self.assertAlmostEqual(info.duration_s, 1.0, delta=0.01)
+        self.assertAlmostEqual(rms_dbfs(out), -20, delta=0.2)
+
+    def test_chunked_resampling_matches_single_pass(self):
+        x = np.random.default_rng(0).standard_normal(44100).astype(np.float32) * 0.1
+        whole = StreamResampler(44100, 16000)
+        expected = np.concatenate([whole.process(x), whole.flush()])
+        chunked = StreamResampler(44100, 16000)
+        parts = [chunked.process(x[i:i + 1234]) for i in range(0, len(x), 1234)] + [chunked.flush()]
+        np.testing.assert_allclose(np.concatenate(parts), expected, atol=1e-6)
+        self.assertEqual(len(expected), 16000)
+
+    def test_audio_processor(self):
+        processor = AudioProcessor(self.stereo)
+        with self.assertRaises(ValueError):
+            processor.get_duration()
+        processor.load_audio()
+        self.assertAlmostEqual(processor.get_duration(), 1.0)
+        with self.assertRaises(FileNotFoundError):
+            AudioProcessor(os.path.join(self.tmp.name, 'missing.wav')).load_audio()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.batch_transcribe import BatchTranscriber, format_srt_time, iter_audio_windows
+from tests.helpers import tone, write_wav
+
+RATE = 16000
+
+
+class DurationRecognizer:
+    """按语音段时长给出「识别结果」，可在子进程中构造。"""
+
+    def recognize(self, audio, sample_rate):
+        return f"tone {len(audio) / sample_rate:.1f}"
+
+
+class _UpperTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text, target_language=None):
+        self.calls.append((text, target_language))
+        return text.upper()
+
+
+class _SlowTranslator(_UpperTranslator):
+    def translate(self, text, target_language=None):
+        time.sleep(0.2)
+        return super().translate(text, target_language)
+
+
+class TestBatchTranscribe(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        gap = np.zeros(RATE, dtype=np.int16)
+        # 三段语音：1.0s / 2.0s / 0.5s，各以 1 秒静音分隔
+        self.audio = np.concatenate([gap, tone(1.0), gap, tone(2.0), gap, tone(0.5), gap])
+        self.path = os.path.join(self.dir, 'meeting.wav')
+        write_wav(self.path, self.audio)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_windows_cover_file_and_mix_stereo(self):
+        stereo_path = os.path.join(self.dir, 'stereo.wav')
+        left = self.audio
+        right = np.zeros_like(left)
+        write_wav(stereo_path, np.column_stack([left, right]).ravel(), channels=2, extra_chunk=True)
+        windows = list(iter_audio_windows(stereo_path, window_s=0.7))
+        self.assertTrue(all(rate == RATE for _, rate in windows))
+        self.assertEqual(max(len(w) for w, _ in windows), int(0.7 * RATE))
+        mixed = np.concatenate([w for w, _ in windows])
+        np.testing.assert_array_equal(mixed, (left.astype(np.float64) / 2).astype(np.int16))
+
+    def test_transcribe_with_process_pool(self):
+        translator = _UpperTranslator()
+        transcriber = BatchTranscriber(DurationRecognizer, translator, target_language='en',
+                                       workers=2, window_s=0.5, max_pending=2)
+        stats = transcriber.run(self.path, out_dir=self.dir)
+        self.assertEqual(stats['segments'], 3)
+        with open(os.path.join(self.dir, 'meeting.jsonl'), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r['index'] for r in records], [0, 1, 2])
+        self.assertEqual([round(r['start'], 1) for r in records], [0.8, 2.8, 5.8])
+        self.assertEqual([r['translation'] for r in records], [r['text'].upper() for r in records])
+        self.assertTrue(all(target == 'en' for _, target in translator.calls))
+        with open(os.path.join(self.dir, 'meeting.srt'), encoding='utf-8') as f:
+            blocks = f.read().strip().split("\n\n")
+        self.assertEqual(len(blocks), 3)
+        first = blocks[0].splitlines()
+        self.assertEqual(first[0], "1")
+        self.assertEqual(first[1], f"{format_srt_time(records[0]['start'])} --> {format_srt_time(records[0]['end'])}")
+        self.assertEqual(first[2:], [records[0]['text'], records[0]['translation']])
+
+    def test_in_process_without_translation(self):
+        transcriber = BatchTranscriber(DurationRecognizer, workers=0, window_s=10)
+        segments = list(transcriber.transcribe(self.path))
+        self.assertEqual([s.translation for s in segments], ["", "", ""])
+        self.assertLess(segments[0].end_s, segments[1].start_s)
+
+    def test_early_exit_cancels_pending_segments(self):
+        transcriber = BatchTranscriber(DurationRecognizer, _SlowTranslator(), workers=0, window_s=10, max_pending=8)
+        with mock.patch('concurrent.futures._base.LOGGER') as logger:
+            segments = transcriber.transcribe(self.path)
+            first = next(segments)
+            segments.close()  # 调用方提前停止迭代
+            time.sleep(0.5)
+        self.assertEqual(first.translation, first.text.upper())
+        # 被取消的段落不会在回调中再设置结果（否则 InvalidStateError 会被记录到日志）
+        logger.exception.assert_not_called()
+
+    def test_format_srt_time(self):
+        self.assertEqual(format_srt_time(3725.0456), "01:02:05,046")
+
+
+if __name__ == '__main__':
+    unittest.main()
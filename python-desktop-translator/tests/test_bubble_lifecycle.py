@@ -0,0 +1,86 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtWidgets
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.conversation_store import ConversationStore
+from ui.bubble_lifecycle import BubbleLifecycle
+
+
+class _Bubble(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+        self.input_text = QtWidgets.QTextEdit(self)
+
+
+class TestBubbleLifecycle(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ConversationStore(os.path.join(self.tmpdir, 'history.db'), batch_interval=0.01)
+        self.released = []
+        self.lifecycle = BubbleLifecycle(
+            ['translate', 'qa'], release=self.released.append, store=self.store, hibernate_after_s=60,
+        )
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_hidden_bubble_hibernates_and_restores(self):
+        bubble = _Bubble()
+        self.lifecycle.watch('translate', bubble)
+        bubble.setGeometry(120, 130, 420, 380)
+        bubble.input_text.setPlainText('未发送的草稿')
+        bubble.show()
+        bubble.hide()
+        # 未到时间不休眠
+        self.assertEqual(self.lifecycle.check(), [])
+        self.assertEqual(self.lifecycle.check(now=time.monotonic() + 61), ['translate'])
+        self.assertEqual(self.released, ['translate'])
+        self.assertIn('translate：已休眠', self.lifecycle.report())
+
+        restored = _Bubble()
+        self.lifecycle.watch('translate', restored)
+        self.assertEqual(restored.input_text.toPlainText(), '未发送的草稿')
+        self.assertEqual(restored.geometry().getRect(), (120, 130, 420, 380))
+        self.assertNotIn('已休眠', self.lifecycle.report())
+
+    def test_visible_bubble_is_kept(self):
+        bubble = _Bubble()
+        bubble.show()
+        self.lifecycle.watch('qa', bubble)
+        self.assertEqual(self.lifecycle.check(now=time.monotonic() + 3600), [])
+        self.assertEqual(self.released, [])
+        bubble.close()
+
+    def test_disabled_without_store(self):
+        lifecycle = BubbleLifecycle(['qa'], release=self.released.append, store=None)
+        lifecycle.watch('qa', _Bubble())
+        self.assertEqual(lifecycle.check(now=time.monotonic() + 3600), [])
+
+    def test_report_labels_fallback_as_peak(self):
+        with mock.patch('ui.bubble_lifecycle.process_rss_mb', return_value=None), \
+                mock.patch('ui.bubble_lifecycle.process_peak_rss_mb', return_value=321.0):
+            self.assertIn('进程内存峰值：321.0 MB', self.lifecycle.report())
+        with mock.patch('ui.bubble_lifecycle.process_rss_mb', return_value=123.0):
+            self.assertTrue(self.lifecycle.report().startswith('进程内存：123.0 MB'))
+
+
+if __name__ == '__main__':
+    unittest.main()
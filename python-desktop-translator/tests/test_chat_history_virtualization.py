@@ -0,0 +1,213 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.conversation_store import ConversationStore
+from ui.bubbles.chat_history_area import ChatHistoryArea
+
+USER_STYLE = 'QTextBrowser {background:#fff;}'
+AI_STYLE = 'QTextBrowser {background:#eee;}'
+
+
+def settle(app, rounds=3):
+    for _ in range(rounds):
+        time.sleep(0.12)
+        app.processEvents()
+
+
+class TestChatHistoryVirtualization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def _area_with(self, count):
+        area = ChatHistoryArea()
+        area.resize(500, 400)
+        area.show()
+        self._app.processEvents()
+        area.add_messages(
+            (('user' if i % 2 else 'ai', f'message {i} ' + 'word ' * (i % 40)) for i in range(count)),
+            USER_STYLE, AI_STYLE,
+        )
+        settle(self._app)
+        return area
+
+    def test_only_visible_rows_are_realized(self):
+        area = self._area_with(10000)
+        bar = area.verticalScrollBar()
+        self.assertEqual(area.message_count(), 10000)
+        self.assertEqual(bar.value(), bar.maximum())
+        self.assertLess(len(area.get_messages()), 30)
+
+        timings, max_realized = [], 0
+        for step in range(200):
+            t = time.perf_counter()
+            bar.setValue(step * 300)
+            self._app.processEvents()
+            timings.append(time.perf_counter() - t)
+            max_realized = max(max_realized, len(area.get_messages()))
+        timings.sort()
+        self.assertLess(max_realized, 30)
+        self.assertLess(timings[int(len(timings) * 0.95)], 0.05)
+        area.close()
+
+    def test_streaming_message_is_kept_while_scrolled_away(self):
+        area = self._area_with(500)
+        msg = area.add_message('ai', '', USER_STYLE, AI_STYLE)
+        msg.start_streaming()
+        settle(self._app)
+        area.verticalScrollBar().setValue(0)
+        self._app.processEvents()
+        self.assertIn(msg, area.get_messages())
+        msg.stream_text('still streaming')
+        msg.end_streaming()
+        self.assertEqual(msg.raw_text, 'still streaming')
+        area.close()
+
+    def test_user_rows_are_right_aligned(self):
+        area = self._area_with(20)
+        right_edge = area.viewport().width() - area.MARGIN_X
+        messages = area.get_messages()
+        self.assertTrue({m.role for m in messages} >= {'user', 'ai'})
+        for msg in messages:
+            geo = msg.geometry()
+            if msg.role == 'user':
+                self.assertEqual(geo.right() + 1, right_edge)
+                # 气泡紧贴头像，不留多余空白
+                gap = msg.role_label.x() - (msg.content.x() + msg.content.width())
+                self.assertLessEqual(gap, msg.layout().spacing())
+            else:
+                self.assertEqual(geo.x(), area.MARGIN_X)
+        area.close()
+
+    def test_update_unrealized_message(self):
+        area = self._area_with(1000)
+        area.update_message(area.message_handle(0), 'replaced first message')
+        self.assertEqual(area._records[0].content, 'replaced first message')
+        area.verticalScrollBar().setValue(0)
+        self._app.processEvents()
+        self.assertEqual(area.get_messages()[0].raw_text, 'replaced first message')
+        area.close()
+
+    def test_tooltip_survives_recycling(self):
+        area = self._area_with(1000)
+        area.set_message_tooltip(area.message_handle(-1), 'cached answer')
+        self.assertEqual(area.get_messages()[-1].toolTip(), 'cached answer')
+        area.verticalScrollBar().setValue(0)
+        self._app.processEvents()
+        area.scrollToBottom()
+        self._app.processEvents()
+        self.assertEqual(area.get_messages()[-1].toolTip(), 'cached answer')
+        area.close()
+
+
+class TestChatHistoryResize(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_resize_events_are_coalesced(self):
+        area = ChatHistoryArea()
+        area.resize(500, 400)
+        area.show()
+        area.add_messages(((('user' if i % 2 else 'ai'), f'message {i} ' + 'word ' * 30) for i in range(300)),
+                          USER_STYLE, AI_STYLE)
+        settle(self._app)
+        calls = []
+        original = area._reflow_widths
+        area._reflow_timer.timeout.disconnect()
+        area._reflow_timer.timeout.connect(lambda: calls.append(1) or original())
+        for w in range(500, 700, 2):
+            area.resize(w, 400)
+        settle(self._app, rounds=1)
+        self.assertEqual(len(calls), 1)
+        bubble_w = area._compute_bubble_width(area._view_width())
+        for msg in area.get_messages():
+            self.assertEqual(msg.max_width, bubble_w)
+        area.close()
+
+    def test_drag_resize_stays_interactive(self):
+        area = ChatHistoryArea()
+        area.resize(500, 400)
+        area.show()
+        area.add_messages(((('user' if i % 2 else 'ai'), f'message {i} ' + 'word ' * (i % 60)) for i in range(300)),
+                          USER_STYLE, AI_STYLE)
+        settle(self._app)
+        timings = []
+        for step in range(60):
+            t = time.perf_counter()
+            area.resize(500 + (step % 20) * 10, 400)
+            time.sleep(area.REFLOW_INTERVAL_MS / 1000)
+            self._app.processEvents()
+            timings.append(time.perf_counter() - t - area.REFLOW_INTERVAL_MS / 1000)
+        timings.sort()
+        self.assertLess(timings[int(len(timings) * 0.95)], 0.05)
+        bar = area.verticalScrollBar()
+        self.assertEqual(bar.value(), bar.maximum())
+        area.close()
+
+
+class TestChatHistoryPaging(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ConversationStore(os.path.join(self.tmpdir, 'history.db'), batch_interval=0.01)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_loading_older_page_keeps_position(self):
+        for i in range(100):
+            self.store.append('qa', 'user' if i % 2 else 'ai', f'stored message {i}')
+        self.assertTrue(self.store.flush(timeout=5))
+        area = ChatHistoryArea()
+        area.resize(500, 400)
+        area.show()
+        area.bind_store(self.store, 'qa', initial_limit=30, page_size=30)
+        settle(self._app)
+        self.assertEqual(area.message_count(), 30)
+        bar = area.verticalScrollBar()
+        bar.setValue(0)
+        self._app.processEvents()
+        self.assertEqual(area.message_count(), 60)
+        # 原来位于顶部的消息仍在视口顶部附近
+        top_index = area._records.index(next(r for r in area._records if r.content == 'stored message 70'))
+        self.assertLessEqual(abs(area._tops[top_index] - bar.value()), 60)
+        area.close()
+
+    def test_handle_survives_loading_older_page(self):
+        for i in range(100):
+            self.store.append('qa', 'user' if i % 2 else 'ai', f'stored message {i}')
+        self.assertTrue(self.store.flush(timeout=5))
+        area = ChatHistoryArea()
+        area.resize(500, 400)
+        area.show()
+        area.bind_store(self.store, 'qa', initial_limit=30, page_size=30)
+        settle(self._app)
+        handle = area.message_handle(-1)
+        area.verticalScrollBar().setValue(0)
+        self._app.processEvents()
+        self.assertEqual(area.message_count(), 60)
+        area.update_message(handle, 'refreshed answer')
+        self.assertEqual(area._records[-1].content, 'refreshed answer')
+        self.assertEqual(area._records[29].content, 'stored message 69')  # 原序号处的消息未被覆盖
+        area.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
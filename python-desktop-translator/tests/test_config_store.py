@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.app_config import AppConfig
+from config.config_store import ConfigStore
+from services.ai_client import AIClient
+from tests.helpers import wait_until
+
+
+class ConfigStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(os.environ, {"APPDATA": self.tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = AppConfig()
+        self.config.write_config(self.config.to_dict())
+        self.store = ConfigStore(self.config, debounce_ms=50, reload_delay_ms=20)
+        self.events = []
+        self.store.changed.connect(self.events.append)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.store.close)
+
+    def _read(self):
+        with open(self.config.config_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_write_is_atomic(self):
+        self.config.set_saver(None)
+        self.config.model = "m-direct"
+        self.config.save_config()
+        self.assertEqual(self._read()["model"], "m-direct")
+        self.assertEqual(os.listdir(self.config.data_dir), ["config.json"])
+        # 写临时文件失败时原文件保持不变
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            self.config.model = "m-lost"
+            self.assertIsNone(self.config.write_config(self.config.to_dict()))
+        self.assertEqual(self._read()["model"], "m-direct")
+
+    def test_rapid_saves_coalesce_into_one_write(self):
+        for i in range(20):
+            self.config.kb_top_k = i + 1
+            self.config.save_config()
+        self.assertEqual(self.store.writes, 0)  # 保存不阻塞调用方
+        self.assertTrue(wait_until(self.app, lambda: self.store.writes == 1))
+        wait_until(self.app, lambda: False, timeout=0.2)  # 再等一会，确认没有第二次写入
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(self._read()["kb_top_k"], 20)
+        self.assertEqual(len(self.events), 20)
+        self.assertEqual(self.events[-1], {"kb_top_k": (19, 20)})
+
+    def test_flush_writes_pending_changes(self):
+        self.config.target_language = "vi"
+        self.config.save_config()
+        self.assertTrue(self.store.flush())
+        self.assertEqual(self._read()["target_language"], "vi")
+
+    def test_external_edit_is_applied_and_own_writes_ignored(self):
+        self.config.auto_start = True
+        self.config.save_config()
+        self.store.flush()
+        wait_until(self.app, lambda: False, timeout=0.2)
+        self.assertEqual(self.events, [{"auto_start": (False, True)}])
+
+        data = self._read()
+        data["ai_server"] = "http://new-host:3000/v1/chat/completions"
+        data["api_key"] = "Bearer sk-new"
+        with open(self.config.config_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self.assertTrue(wait_until(self.app, lambda: len(self.events) == 2))
+        self.assertEqual(set(self.events[-1]), {"ai_server", "api_key"})
+        self.assertEqual(self.config.ai_server, "http://new-host:3000/v1/chat/completions")
+
+    def test_invalid_external_json_is_ignored(self):
+        with open(self.config.config_path, "w", encoding="utf-8") as f:
+            f.write('{"model": ')
+        self.assertEqual(self.store.reload(), {})
+        self.assertEqual(self.config.model, "qwen3-coder")
+        self.assertEqual(self.events, [])
+
+
+class AIClientReconfigureTests(unittest.TestCase):
+    def test_reconfigure_swaps_server_and_key(self):
+        client = AIClient("http://old/v1/chat/completions/", "Bearer sk-old")
+        session = client._session
+        client.reconfigure(api_key="Bearer sk-new")
+        self.assertEqual(client.api_key, "sk-new")
+        self.assertIs(client._session, session)
+        client.reconfigure("http://new/v1/chat/completions", "sk-new")
+        self.assertEqual(client.server_url, "http://new/v1/chat/completions")
+        self.assertIsNot(client._session, session)
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
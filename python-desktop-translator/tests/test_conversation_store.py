@@ -0,0 +1,104 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.conversation_store import ConversationStore
+
+
+class TestConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ConversationStore(os.path.join(self.tmpdir, 'history.db'), batch_interval=0.01)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_recent_and_paging(self):
+        for i in range(10):
+            self.store.append('qa', 'user', f'question {i}')
+        self.store.append('translate', 'user', 'other conversation')
+        self.assertTrue(self.store.flush(timeout=5))
+
+        recent = self.store.recent('qa', limit=4)
+        self.assertEqual([m.content for m in recent], [f'question {i}' for i in range(6, 10)])
+        older = self.store.page_before('qa', recent[0].id, limit=4)
+        self.assertEqual([m.content for m in older], [f'question {i}' for i in range(2, 6)])
+        self.assertEqual(self.store.count('qa'), 10)
+
+    def test_wal_mode(self):
+        mode = self.store._reader().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode.lower(), 'wal')
+
+    def test_full_text_search(self):
+        self.store.append('qa', 'user', '如何重置公司 VPN 密码')
+        self.store.append('qa', 'ai', 'Open the portal and click reset password')
+        self.store.append('polish', 'user', 'VPN reset steps')
+        self.assertTrue(self.store.flush(timeout=5))
+
+        hits = self.store.search('重置公司')
+        self.assertEqual(len(hits), 1)
+        self.assertIn('VPN', hits[0].content)
+        hits = self.store.search('reset', conversation='qa')
+        self.assertEqual([h.role for h in hits], ['ai'])
+        # 短于三个字符的词走 LIKE 回退
+        self.assertEqual(len(self.store.search('VP')), 2)
+
+    def test_search_is_fast_on_large_history(self):
+        for i in range(20000):
+            self.store.append('qa', 'ai', f'answer number {i} about topic{i % 97} and details')
+        self.store.append('qa', 'ai', 'the unique needle answer')
+        self.assertTrue(self.store.flush(timeout=60))
+        start = time.perf_counter()
+        hits = self.store.search('needle')
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(hits), 1)
+        self.assertLess(elapsed, 0.05)
+
+    def test_ui_state_roundtrip(self):
+        self.assertIsNone(self.store.load_state('bubble:qa'))
+        self.store.save_state('bubble:qa', {'draft': '草稿', 'geometry': [1, 2, 3, 4]})
+        self.store.save_state('bubble:qa', {'draft': '新草稿'})
+        self.assertTrue(self.store.flush(timeout=5))
+        self.assertEqual(self.store.load_state('bubble:qa'), {'draft': '新草稿'})
+
+    def test_writes_survive_reopen(self):
+        self.store.append('speech', 'user', 'persisted text')
+        self.store.close()
+        reopened = ConversationStore(os.path.join(self.tmpdir, 'history.db'))
+        try:
+            self.assertEqual([m.content for m in reopened.recent('speech')], ['persisted text'])
+        finally:
+            reopened.close()
+
+    def test_close_closes_readers_of_all_threads(self):
+        self.store.append('qa', 'user', 'hello')
+        self.assertTrue(self.store.flush(timeout=5))
+        connections = []
+
+        def _read():
+            self.store.recent('qa')
+            connections.append(self.store._reader())
+        worker = threading.Thread(target=_read)
+        worker.start()
+        worker.join()
+        connections.append(self.store._reader())
+        self.assertEqual(len(set(map(id, connections))), 2)
+        self.store.close()
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from ui.frame_budget import FrameStats, ring_damage_region
+
+
+class TestRingDamageRegion(unittest.TestCase):
+    def test_region_covers_ring_only(self):
+        center = QtCore.QPoint(40, 40)
+        region = ring_damage_region(center, 20, 24, pen_width=2)
+        # 新旧圆环上的点都在重绘区域内
+        for radius in (20, 24):
+            self.assertTrue(region.contains(QtCore.QPoint(40 + radius, 40)))
+            self.assertTrue(region.contains(QtCore.QPoint(40, 40 - radius)))
+        # 圆心附近不受影响
+        self.assertFalse(region.contains(center))
+        # 面积明显小于整个 80x80 窗口
+        area = sum(r.width() * r.height() for r in region.rects())
+        self.assertLess(area, 80 * 80 // 2)
+
+    def test_small_radius_is_full_square(self):
+        region = ring_damage_region(QtCore.QPoint(40, 40), 0, 1)
+        self.assertTrue(region.contains(QtCore.QPoint(40, 40)))
+
+
+class TestFrameStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_disabled_records_nothing(self):
+        stats = FrameStats(enabled=False)
+        with stats.frame('floating'):
+            pass
+        self.assertEqual(stats.report(), {})
+
+    def test_paint_time_per_animation_second(self):
+        stats = FrameStats(enabled=True)
+        animation = QtCore.QVariantAnimation()
+        animation.setDuration(100)
+        animation.setStartValue(0)
+        animation.setEndValue(10)
+        stats.track('ripple', animation)
+        animation.start()
+        with stats.frame('ripple'):
+            sum(range(10000))
+        deadline = time.monotonic() + 5
+        while animation.state() == QtCore.QAbstractAnimation.Running and time.monotonic() < deadline:
+            self._app.processEvents()
+        report = stats.report()['ripple']
+        self.assertEqual(report['frames'], 1)
+        self.assertGreaterEqual(report['anim_s'], 0.09)
+        self.assertGreater(report['cpu_ms_per_anim_s'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.hotkeys import HotkeyManager, LatencyHistogram
+
+
+class _Key:
+    """模拟 pynput 的按键对象：字符键带 char，特殊键 str() 为 'Key.xxx'。"""
+
+    def __init__(self, char=None, name=None):
+        self.char = char
+        self.name = name
+
+    def __str__(self):
+        return f"Key.{self.name}" if self.name else repr(self.char)
+
+
+CTRL, ALT, T = _Key(name='ctrl_l'), _Key(name='alt_gr'), _Key(char='t')
+
+
+class TestHotkeyManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.calls = []
+        self.manager = HotkeyManager()
+        self.manager.register_hotkey('Ctrl + Alt + T', lambda: self.calls.append(threading.current_thread()))
+
+    def _drain(self):
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            self._app.processEvents()
+            time.sleep(0.005)
+
+    def _press(self, *keys, repeat=1):
+        # 在非主线程模拟 pynput 监听线程
+        def run():
+            for key in keys:
+                for _ in range(repeat):
+                    self.manager._on_press(key)
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join()
+
+    def test_callback_runs_on_main_thread_once_while_held(self):
+        self._press(CTRL, ALT, T, repeat=5)
+        self._drain()
+        self.assertEqual(self.calls, [threading.main_thread()])
+        # 松开后再次按下才会再次触发
+        self.manager._on_release(T)
+        self._press(T)
+        self._drain()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_control_char_and_partial_combo(self):
+        self._press(CTRL, T)
+        self._drain()
+        self.assertEqual(self.calls, [])
+        self.manager._on_release(T)
+        self._press(ALT, _Key(char='\x14'))  # Ctrl+T 在部分平台上报为控制字符
+        self._drain()
+        self.assertEqual(len(self.calls), 1)
+
+    def test_latency_histograms(self):
+        self._press(CTRL, ALT, T)
+        self._drain()
+        report = self.manager.latency_report()
+        self.assertEqual(report['press']['count'], 3)
+        self.assertEqual(report['dispatch']['count'], 1)
+
+    def test_histogram_percentile(self):
+        hist = LatencyHistogram()
+        for ms in (0.01, 0.02, 0.3, 3, 400):
+            hist.add(ms)
+        self.assertEqual(hist.percentile(50), 0.5)
+        self.assertEqual(hist.percentile(100), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
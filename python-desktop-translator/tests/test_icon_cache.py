@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from ui.icon_cache import IconCache, QSvgRenderer
+
+_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="10">'
+    '<rect width="20" height="10" fill="#ff0000"/></svg>'
+)
+
+
+class TestIconCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        image = QtGui.QImage(100, 50, QtGui.QImage.Format_ARGB32)
+        image.fill(QtGui.QColor('#00ff00'))
+        image.save(os.path.join(self.tmpdir, 'wide.png'))
+        with open(os.path.join(self.tmpdir, 'shape.svg'), 'w', encoding='utf-8') as f:
+            f.write(_SVG)
+        self.cache = IconCache(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_decoded_once_and_scaled_variants_cached(self):
+        a = self.cache.pixmap('wide.png', 40)
+        b = self.cache.pixmap('wide.png', 40)
+        self.assertIs(a, b)
+        self.assertEqual((a.width(), a.height()), (40, 20))
+        self.cache.pixmap('wide.png', 60)
+        self.cache.icon('wide.png')
+        self.assertEqual(self.cache.decodes, 1)
+
+    def test_device_pixel_ratio_variant(self):
+        pix = self.cache.pixmap('wide.png', 40, dpr=2.0)
+        self.assertEqual((pix.width(), pix.height()), (80, 40))
+        self.assertEqual(pix.devicePixelRatio(), 2.0)
+        self.assertIsNot(pix, self.cache.pixmap('wide.png', 40, dpr=1.0))
+
+    @unittest.skipIf(QSvgRenderer is None, 'QtSvg 不可用')
+    def test_svg_rasterized_at_target_size(self):
+        pix = self.cache.pixmap('shape', 40, dpr=2.0)
+        self.assertEqual((pix.width(), pix.height()), (80, 40))
+        color = pix.toImage().pixelColor(40, 20)
+        self.assertEqual((color.red(), color.green(), color.blue()), (255, 0, 0))
+
+    def test_missing_icon(self):
+        self.assertIsNone(self.cache.pixmap('missing.png', 32))
+        self.assertTrue(self.cache.icon('missing.png').isNull())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.kb_index import KnowledgeBaseIndex, split_passages, tokenize
+
+
+class TestKnowledgeBaseIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.export = os.path.join(self.tmpdir, 'export')
+        os.makedirs(self.export)
+        self._write('vpn.md', '# VPN 指南\n\n重置 VPN 密码：登录自助门户，点击重置密码。\n\nVPN client download link.')
+        self._write('printer.html', '<html><head><title>打印机</title><style>p{}</style></head>'
+                                    '<body><p>添加网络打印机需要先安装驱动。</p></body></html>')
+        self.index = KnowledgeBaseIndex(os.path.join(self.tmpdir, 'index'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, name, text):
+        with open(os.path.join(self.export, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_tokenize_mixed_text(self):
+        self.assertEqual(tokenize('重置VPN密码'), ['重置', 'vpn', '密码'])
+
+    def test_split_passages_merges_short_paragraphs(self):
+        passages = split_passages('a\n\nb\n\n' + 'x' * 30, max_chars=20)
+        self.assertEqual(passages, ['a b', 'x' * 20, 'x' * 10])
+
+    def test_search_ranks_relevant_passage(self):
+        stats = self.index.ingest_directory(self.export)
+        self.assertEqual(stats['added'], 2)
+        hits = self.index.search('怎么重置密码', k=2)
+        self.assertTrue(hits)
+        self.assertEqual(hits[0].title, 'VPN 指南')
+        self.assertIn('自助门户', hits[0].text)
+        hits = self.index.search('打印机驱动')
+        self.assertEqual(hits[0].title, '打印机')
+        self.assertNotIn('p{}', hits[0].text)
+
+    def test_incremental_update_and_removal(self):
+        self.index.ingest_directory(self.export)
+        stats = self.index.ingest_directory(self.export)
+        self.assertEqual(stats['unchanged'], 2)
+        self._write('printer.html', '<p>打印机已下线，请使用复印中心。</p>')
+        stats = self.index.ingest_directory(self.export)
+        self.assertEqual(stats['updated'], 1)
+        self.assertFalse(any('驱动' in h.text for h in self.index.search('驱动')))
+        os.remove(os.path.join(self.export, 'vpn.md'))
+        stats = self.index.ingest_directory(self.export)
+        self.assertEqual(stats['removed'], 1)
+        self.assertEqual(self.index.search('VPN'), [])
+
+    def test_index_reopens_after_compaction(self):
+        self.index.ingest_directory(self.export)
+        self.index.compact()
+        self.index.close()
+        self.index = KnowledgeBaseIndex(os.path.join(self.tmpdir, 'index'))
+        self.assertEqual(self.index.search('VPN')[0].title, 'VPN 指南')
+
+    def test_deleted_passages_do_not_count_towards_idf(self):
+        self.index.max_deleted_ratio = 1.0  # 不自动合并，检验删除后、合并前的得分
+        for i in range(6):
+            self._write(f'vpn_{i}.md', f'# VPN 笔记 {i}\n\nVPN 连接第 {i} 步。')
+        self.index.ingest_directory(self.export)
+        for i in range(6):
+            os.remove(os.path.join(self.export, f'vpn_{i}.md'))
+        self.index.ingest_directory(self.export)
+        before = [(h.title, round(h.score, 4)) for h in self.index.search('VPN 密码')]
+        self.index.compact()
+        after = [(h.title, round(h.score, 4)) for h in self.index.search('VPN 密码')]
+        self.assertEqual(before, after)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.markdown_engine import MarkdownEngine, markdown_engine
+from ui.bubbles.message_widget import ChatMessageWidget
+
+
+class TestMarkdownEngine(unittest.TestCase):
+    def test_render_and_cache_hit(self):
+        engine = MarkdownEngine()
+        html = engine.render('Hello **World**')
+        self.assertIn('<strong>World</strong>', html)
+        self.assertEqual(engine.render('Hello **World**'), html)
+        stats = engine.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['conversions']), (1, 1, 1))
+
+    def test_theme_is_part_of_key(self):
+        engine = MarkdownEngine()
+        engine.render('text', theme='light')
+        engine.render('text', theme='dark')
+        self.assertEqual(engine.stats()['misses'], 2)
+
+    def test_parser_is_reused_and_reset(self):
+        engine = MarkdownEngine()
+        engine.render('[link]: http://a\n\nfirst')
+        parser = engine._md
+        # 上一次转换的引用定义不会泄漏到下一次
+        self.assertNotIn('href', engine.render('[link]'))
+        self.assertIs(engine._md, parser)
+        engine.reset()
+        engine.render('third')
+        self.assertIsNot(engine._md, parser)
+
+    def test_cache_bounded_by_bytes(self):
+        engine = MarkdownEngine(max_cache_bytes=2000)
+        for i in range(50):
+            engine.render(f'paragraph {i} ' + 'x' * 100)
+        stats = engine.stats()
+        self.assertLessEqual(stats['bytes'], 2000)
+        self.assertLess(stats['entries'], 50)
+        # 最早的条目已被淘汰，重新渲染会再次解析
+        before = engine.stats()['conversions']
+        engine.render('paragraph 0 ' + 'x' * 100)
+        self.assertEqual(engine.stats()['conversions'], before + 1)
+
+
+class TestRethemeWithoutReparse(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def test_retheme_500_messages(self):
+        widgets = [
+            ChatMessageWidget('ai', f'Answer {i}\n\n```python\nprint({i})\n```', 400,
+                              'QTextBrowser {background:#fff;}', 'QTextBrowser {background:#eee;}')
+            for i in range(500)
+        ]
+        before = markdown_engine.stats()['conversions']
+        for w in widgets:
+            w.apply_theme('QTextBrowser {background:#000;}', 'QTextBrowser {background:#111;}')
+        self.assertEqual(markdown_engine.stats()['conversions'], before)
+        for w in widgets:
+            w.deleteLater()
+
+
+if __name__ == '__main__':
+    unittest.main()
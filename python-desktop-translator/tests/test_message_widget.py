@@ -2,9 +2,18 @@ import unittest
 import os
 import pathlib
 import site
+import sys
 from PyQt5.QtWidgets import QApplication
 from PyQt5 import QtCore
-from src.ui.bubbles.message_widget import ChatMessageWidget
+
+# 注入 src 到 sys.path，消息组件内部使用 'utils.' 前缀导入
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from src.ui.bubbles.message_widget import ChatMessageWidget, closed_block_prefix
+from utils.markdown_engine import markdown_engine
 
 def _ensure_qt_plugin_path_for_test():
     """简化版本：确保 qwindows.dll 插件路径已设置。"""
@@ -96,10 +105,10 @@ class TestChatMessageWidget(unittest.TestCase):
         # 使用内部状态而非 HTML 结构（Qt 可能重写标签导致类丢失）
         self.assertGreater(len(w._code_blocks), 0, '代码块未被识别')
         # 初始应折叠
-        self.assertTrue(w._code_blocks[0]['collapsed'])
+        self.assertTrue(w._code_blocks[0].collapsed)
         # 展开（直接调用内部方法避免信号差异）
         w._toggle_code_block(0)
-        self.assertFalse(w._code_blocks[0]['collapsed'])
+        self.assertFalse(w._code_blocks[0].collapsed)
         # 复制
         w._copy_code_block(0)
         clipboard = QApplication.clipboard()
@@ -107,6 +116,141 @@ class TestChatMessageWidget(unittest.TestCase):
         if clipboard is not None:
             self.assertIn('print(0)', clipboard.text())
 
+    def test_closed_block_prefix(self):
+        # 最后一段尚未闭合
+        self.assertEqual(closed_block_prefix('para one\n\npara'), 0)
+        self.assertEqual(closed_block_prefix('para one\n\npara two\n'), len('para one\n\n'))
+        # 围栏内的空行不切分，闭合行之后立即切分
+        text = '```\na\n\nb\n```\nrest'
+        self.assertEqual(closed_block_prefix(text), len('```\na\n\nb\n```\n'))
+        self.assertEqual(closed_block_prefix('```\na\n\nb\n'), 0)
+        # 松散列表与缩进续行不切分
+        self.assertEqual(closed_block_prefix('1. a\n\n2. b\n'), 0)
+        self.assertEqual(closed_block_prefix('- a\n\n    more\n'), 0)
+
+    def test_streaming_renders_blocks_incrementally(self):
+        w = ChatMessageWidget(
+            role='ai',
+            raw_text='',
+            max_width=400,
+            user_style='QTextBrowser {background:#fff;}',
+            ai_style='QTextBrowser {background:#eee;}'
+        )
+        w.start_streaming()
+        text = "Intro **bold**\n\n```python\nprint(1)\n```\nTail *text*"
+        for i in range(0, len(text), 5):
+            w.stream_text(text[i:i + 5])
+            w._flush_stream_buffer()
+        # 已闭合的段落与代码块已渲染为 Markdown，尾部仍是纯文本
+        self.assertEqual(len(w._code_blocks), 1)
+        self.assertIn('Tail *text*', w.content.toPlainText())
+        self.assertNotIn('**bold**', w.content.toPlainText())
+        w.end_streaming()
+        self.assertEqual(w.raw_text, text)
+        plain = w.content.toPlainText()
+        self.assertIn('Tail text', plain)
+        self.assertIn('print(1)', plain)
+        # 结束后折叠/复制仍基于完整 HTML 工作
+        w._toggle_code_block(0)
+        self.assertTrue(w._code_blocks[0].collapsed)
+
+    def test_toggle_updates_only_affected_block(self):
+        code = "\n".join(f"value_{i} = compute({i})" for i in range(2000))
+        text = f"Intro\n\n```python\n{code}\n```\n\nBetween\n\n```python\nprint('second')\n```"
+        markdown_engine.render(text)  # 预先缓存，使组件同步渲染而不走后台进程池
+        w = ChatMessageWidget(
+            role='ai',
+            raw_text=text,
+            max_width=500,
+            user_style='QTextBrowser {background:#fff;}',
+            ai_style='QTextBrowser {background:#eee;}'
+        )
+        self.assertEqual(len(w._code_blocks), 2)
+        first, second = w._code_blocks
+        # 超过阈值的代码块默认折叠，只显示前几行
+        self.assertTrue(first.collapsed)
+        collapsed_height = w.minimumHeight()
+        self.assertLess(collapsed_height, 600)
+        w._toggle_code_block(0)
+        self.assertFalse(first.collapsed)
+        self.assertGreater(w.minimumHeight(), collapsed_height * 10)
+        w.content.setHtml = None  # 折叠/展开不应整体重设文档
+        w._toggle_code_block(0)
+        self.assertTrue(first.collapsed)
+        self.assertEqual(w.minimumHeight(), collapsed_height)
+        plain = w.content.toPlainText()
+        self.assertIn('展开', plain)
+        self.assertIn("print('second')", plain)
+        self.assertIn('Between', plain)
+        # 复制始终是完整代码
+        w._copy_code_block(0)
+        self.assertIn('value_1999 = compute(1999)', QApplication.clipboard().text())
+
+    def test_streamed_code_block_can_be_toggled(self):
+        w = ChatMessageWidget(
+            role='ai',
+            raw_text='',
+            max_width=400,
+            user_style='QTextBrowser {background:#fff;}',
+            ai_style='QTextBrowser {background:#eee;}'
+        )
+        w.start_streaming()
+        code = "\n".join(f"line_{i}()" for i in range(30))
+        w.stream_text(f"Intro\n\n```python\n{code}\n```\nDone")
+        w.end_streaming()
+        self.assertTrue(w._code_blocks[0].collapsed)
+        collapsed_height = w.minimumHeight()
+        w._toggle_code_block(0)
+        self.assertGreater(w.minimumHeight(), collapsed_height)
+        plain = w.content.toPlainText()
+        self.assertIn('line_29()', plain)
+        self.assertIn('折叠', plain)
+        self.assertTrue(plain.rstrip().endswith('Done'))
+
+    def test_apply_theme_is_style_only(self):
+        widgets = [ChatMessageWidget(
+            role='ai',
+            raw_text='**answer** with `code`',
+            max_width=400,
+            user_style='QTextBrowser {background:#fff;}',
+            ai_style='QTextBrowser {background:#eee;}'
+        ) for _ in range(2)]
+        a, b = widgets
+        if a.role_label.pixmap() is not None:
+            # 所有 AI 消息共享同一份缩放好的头像
+            self.assertEqual(a.role_label.pixmap().cacheKey(), b.role_label.pixmap().cacheKey())
+        html = a.content.toHtml()
+        a.set_markdown = a.content.setHtml = None  # 换主题不应重新渲染内容
+        a.apply_theme('QTextBrowser {background:#000;}', 'QTextBrowser {background:#111;}')
+        self.assertIn('#111', a.content.styleSheet())
+        self.assertEqual(a.content.toHtml(), html)
+
+    def test_height_cached_per_width(self):
+        w = ChatMessageWidget(
+            role='ai',
+            raw_text='word ' * 200,
+            max_width=400,
+            user_style='QTextBrowser {background:#fff;}',
+            ai_style='QTextBrowser {background:#eee;}'
+        )
+        calls = []
+        original = w._layout_height
+        w._layout_height = lambda width: calls.append(width) or original(width)
+        narrow = w.minimumHeight()
+        w.update_width(600)
+        wide = w.minimumHeight()
+        self.assertLess(wide, narrow)
+        w.update_width(400)
+        w.update_width(600)
+        # 宽度来回切换时命中缓存，只在首次遇到新宽度时排版
+        self.assertEqual(calls, [590])
+        self.assertEqual(w.minimumHeight(), wide)
+        # 内容变化后缓存失效
+        w.set_markdown('short')
+        self.assertLess(w.minimumHeight(), wide)
+        self.assertEqual(calls[-1], 590)
+        self.assertEqual(len(calls), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.polish_edits import (
+    EditScriptError,
+    PolishEdit,
+    apply_edits,
+    highlight_changes_html,
+    parse_edit_script,
+)
+
+
+class TestPolishEdits(unittest.TestCase):
+    def test_parse_plain_and_fenced(self):
+        script = '[{"old": "teh", "new": "the"}]'
+        self.assertEqual(parse_edit_script(script), [PolishEdit('teh', 'the')])
+        fenced = '```json\n{"edits": [{"old": "a", "new": "b"}]}\n```'
+        self.assertEqual(parse_edit_script(fenced), [PolishEdit('a', 'b')])
+        self.assertEqual(parse_edit_script('[]'), [])
+
+    def test_parse_rejects_invalid(self):
+        for bad in ['not json', '{"x": 1}', '[{"old": "", "new": "x"}]', '[1]']:
+            with self.assertRaises(EditScriptError):
+                parse_edit_script(bad)
+
+    def test_apply_in_order_with_spans(self):
+        original = 'I has a apple and a apple pie.'
+        edits = [PolishEdit('has', 'have'), PolishEdit('a apple', 'an apple'), PolishEdit('a apple', 'an apple')]
+        final, spans = apply_edits(original, edits)
+        self.assertEqual(final, 'I have an apple and an apple pie.')
+        self.assertEqual([final[s:e] for s, e in spans], ['have', 'an apple', 'an apple'])
+
+    def test_apply_rejects_missing_or_out_of_order(self):
+        with self.assertRaises(EditScriptError):
+            apply_edits('hello world', [PolishEdit('planet', 'earth')])
+        with self.assertRaises(EditScriptError):
+            apply_edits('hello world', [PolishEdit('world', 'x'), PolishEdit('hello', 'y')])
+
+    def test_highlight_escapes_text(self):
+        html = highlight_changes_html('a <b> c', [(2, 5)])
+        self.assertIn('&lt;b&gt;</span>', html)
+        self.assertTrue(html.startswith('a <span'))
+
+
+if __name__ == '__main__':
+    unittest.main()
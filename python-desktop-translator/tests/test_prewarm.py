@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.prewarm import PrewarmScheduler
+from utils.system import process_peak_rss_mb, process_rss_mb
+from tests.helpers import wait_until
+
+
+class _Scheduler(PrewarmScheduler):
+    TICK_MS = 10
+    busy = False
+
+    def _system_busy(self):
+        return self.busy
+
+
+class TestPrewarmScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.ran = []
+        self.scheduler = _Scheduler(max_foreground=2)
+        for name in ('translate', 'qa', 'polish'):
+            self.scheduler.add_task(name, lambda n=name: self.ran.append(n))
+
+    def test_most_used_first_and_foreground_limit(self):
+        self.scheduler.record_open('polish')
+        self.scheduler.record_open('polish')
+        self.assertEqual(self.scheduler.pending(), ['translate', 'qa'])
+        self.scheduler._done.clear()
+        self.scheduler.start()
+        self.assertTrue(wait_until(self._app, lambda: len(self.ran) == 2))
+        self.assertEqual(self.ran, ['polish', 'translate'])
+        # 达到上限后不再构造，且停止调度
+        self.assertTrue(wait_until(self._app, lambda: not self.scheduler.active))
+        self.assertEqual(len(self.ran), 2)
+
+    def test_backs_off_while_busy(self):
+        self.scheduler.busy = True
+        self.scheduler.start()
+        self.assertTrue(wait_until(self._app, lambda: self.scheduler.backoffs >= 2))
+        self.assertEqual(self.ran, [])
+        self.assertGreater(self.scheduler._interval, self.scheduler.TICK_MS)
+        self.scheduler.busy = False
+        self.assertTrue(wait_until(self._app, lambda: self.ran, timeout=10))
+
+    def test_background_task_runs_off_main_thread(self):
+        threads = []
+        self.scheduler.add_task('network', lambda: threads.append(threading.current_thread()), background=True)
+        self.scheduler.start(delay_ms=10000)
+        self.assertTrue(wait_until(self._app, lambda: threads))
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertEqual(self.ran, [])
+        self.scheduler.pause()
+
+    def test_first_open_recorded(self):
+        self.scheduler.record_open('qa', 12.5, prewarmed=True)
+        self.assertEqual(self.scheduler.first_open_ms, {'qa': 12.5})
+        self.assertNotIn('qa', self.scheduler.pending())
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), '需要 /proc/self/statm')
+    def test_rss_is_current_not_peak(self):
+        block = b'x' * (64 * 1024 * 1024)
+        with_block = process_rss_mb()
+        del block
+        # 释放后预算应看到内存回落，而峰值不会下降
+        self.assertLess(process_rss_mb(), with_block - 32)
+        self.assertGreater(process_peak_rss_mb(), with_block - 1)
+
+    def test_unknown_rss_skips_memory_budget(self):
+        self.scheduler._rss_start = 100.0
+        with mock.patch('core.prewarm.process_rss_mb', return_value=None):
+            self.assertTrue(self.scheduler._within_budget())
+        with mock.patch('core.prewarm.process_rss_mb', return_value=100.0 + self.scheduler.memory_budget_mb):
+            self.assertFalse(self.scheduler._within_budget())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from core.render_pool import MarkdownRenderPool, render_pool
+from ui.bubbles.message_widget import ChatMessageWidget
+from utils.markdown_engine import markdown_engine
+from tests.helpers import wait_until
+
+USER_STYLE = 'QTextBrowser {background:#fff;}'
+AI_STYLE = 'QTextBrowser {background:#eee;}'
+
+
+def _big_answer(tag: str) -> str:
+    code = '\n'.join(f'    value_{i} = compute({i})  # {tag}' for i in range(400))
+    return f'# {tag}\n\nIntro **bold**\n\n```python\ndef run():\n{code}\n```\n'
+
+
+class TestRenderPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    @classmethod
+    def tearDownClass(cls):
+        render_pool.shutdown()
+
+    def test_render_in_worker_process_fills_cache(self):
+        pool = MarkdownRenderPool(max_workers=1)
+        text = _big_answer('pool')
+        self.assertTrue(pool.should_offload(text))
+        results = []
+        request = pool.render(text)
+        request.finished.connect(results.append)
+        request.failed.connect(results.append)
+        self.assertTrue(wait_until(self._app, lambda: results, timeout=30.0))
+        self.assertIn('codehilite', results[0])
+        # 结果写回主进程缓存，之后不再交给子进程
+        self.assertEqual(markdown_engine.cached(text), results[0])
+        self.assertFalse(pool.should_offload(text))
+        pool.shutdown()
+
+    def test_widget_shows_placeholder_then_html(self):
+        text = _big_answer('widget')
+        w = ChatMessageWidget('ai', text, 400, USER_STYLE, AI_STYLE)
+        # 占位为纯文本，代码块尚未增强
+        self.assertEqual(w._code_blocks, [])
+        self.assertIn('```python', w.content.toPlainText())
+        self.assertTrue(wait_until(self._app, lambda: len(w._code_blocks) == 1, timeout=30.0))
+        self.assertNotIn('```', w.content.toPlainText())
+        w.deleteLater()
+
+    def test_stale_result_is_discarded(self):
+        w = ChatMessageWidget('ai', _big_answer('stale'), 400, USER_STYLE, AI_STYLE)
+        w.set_markdown('short **answer**')
+        self.assertIn('answer', w.content.toPlainText())
+        self.assertTrue(wait_until(self._app, lambda: render_pool.active_count == 0, timeout=30.0))
+        self._app.processEvents()
+        self.assertEqual(w.raw_text, 'short **answer**')
+        self.assertNotIn('stale', w.content.toPlainText())
+        w.deleteLater()
+
+
+if __name__ == '__main__':
+    unittest.main()
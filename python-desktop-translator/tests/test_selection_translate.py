@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.app_config import AppConfig
+from services.translation_service import TranslationService
+from ui.selection_translate import FIRST_GLYPH_BUDGET_MS, SelectionTranslator
+from tests.helpers import wait_until
+
+
+class _FakeClient:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.payloads = []
+
+    def chat_stream(self, payload):
+        self.payloads.append(payload)
+        for piece in self.pieces:
+            time.sleep(0.01)
+            yield piece
+
+
+def _make_config():
+    with tempfile.TemporaryDirectory() as appdata, mock.patch.dict(os.environ, {'APPDATA': appdata}):
+        config = AppConfig()
+    config.target_language = 'zh'
+    return config
+
+
+class TestSelectionTranslate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.config = _make_config()
+        self.client = _FakeClient(['你好', '，世界'])
+        self.service = TranslationService(self.client, self.config)
+        self.done = []
+
+    def _translator(self, selection):
+        translator = SelectionTranslator(self.service, self.client, self.config, capture=lambda: selection)
+        translator.finished.connect(self.done.append)
+        return translator
+
+    def test_cache_hit_within_budget(self):
+        self.service.remember('Hello, world', '你好，世界', 'zh')
+        translator = self._translator('Hello, world')
+        translator.trigger()
+        self.assertTrue(wait_until(self._app, lambda: self.done))
+        stages = dict(self.done[0].stages)
+        self.assertEqual(list(stages), ['hotkey', 'capture', 'detect', 'cache', 'first_glyph'])
+        self.assertLess(stages['first_glyph'], FIRST_GLYPH_BUDGET_MS)
+        self.assertEqual(translator.popup.text(), '你好，世界')
+        self.assertEqual(self.client.payloads, [])
+        translator.popup.hide()
+
+    def test_miss_streams_and_fills_cache(self):
+        translator = self._translator('  Hello, world ')
+        translator.trigger()
+        self.assertTrue(wait_until(self._app, lambda: translator.popup.text() == '你好，世界'))
+        self.assertIn('first_chunk', dict(self.done[0].stages))
+        self.assertTrue(wait_until(self._app, lambda: self.service.cached('Hello, world', 'zh') == '你好，世界'))
+        translator.popup.hide()
+
+    def test_selection_already_in_target_language(self):
+        translator = self._translator('这是一段中文')
+        translator.trigger()
+        self.assertTrue(wait_until(self._app, lambda: self.client.payloads))
+        self.assertIn('英文', self.client.payloads[0]['messages'][0]['content'])
+        translator.popup.hide()
+
+    def test_empty_selection(self):
+        translator = self._translator('')
+        translator.trigger()
+        self.assertTrue(wait_until(self._app, lambda: self.done))
+        self.assertEqual(translator.popup.text(), '未检测到选中的文本')
+        translator.popup.hide()
+
+    def test_non_text_clipboard_is_restored(self):
+        clipboard = QApplication.clipboard()
+        original = QtCore.QMimeData()
+        original.setHtml('<b>rich</b>')
+        original.setData('application/x-custom', QtCore.QByteArray(b'\x00\x01payload'))
+        clipboard.setMimeData(original)
+        copied = threading.Event()
+
+        def _capture():
+            copied.wait(5)
+            return 'Hello'
+        translator = SelectionTranslator(self.service, self.client, self.config, capture=_capture)
+        translator.finished.connect(self.done.append)
+        translator.trigger()
+        clipboard.setText('__sentinel__')  # 模拟复制选中文本时覆盖剪贴板
+        copied.set()
+        self.assertTrue(wait_until(self._app, lambda: self.client.payloads))
+        mime = clipboard.mimeData()
+        self.assertIn('<b>rich</b>', mime.html())
+        self.assertEqual(bytes(mime.data('application/x-custom')), b'\x00\x01payload')
+        translator.popup.hide()
+
+
+class TestLanguageDetection(unittest.TestCase):
+    def test_detect(self):
+        service = TranslationService(None, _make_config())
+        self.assertEqual(service.detect_language('今天天气不错 OK'), 'zh')
+        self.assertEqual(service.detect_language('Xin chào, bạn khỏe không?'), 'vi')
+        self.assertEqual(service.detect_language('Good morning'), 'en')
+        self.assertEqual(service.detect_language('12345'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
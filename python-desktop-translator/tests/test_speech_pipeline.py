@@ -0,0 +1,140 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QApplication
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.speech_pipeline import (
+    EnergyVAD, ScriptedRecognizer, SpeechPipeline, WavFileSource, split_sentences,
+)
+from tests.helpers import RATE, tone, wait_until, write_wav
+
+
+def silence(seconds, amplitude=0.002):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * RATE)) * amplitude * 32767).astype(np.int16)
+
+
+def speech_like():
+    # 两段「说话」，中间停顿 0.8 秒
+    return np.concatenate([silence(0.5), tone(1.0), silence(0.8), tone(0.6), silence(0.8)])
+
+
+def feed_all(vad, audio, chunk_ms=100):
+    step = RATE * chunk_ms // 1000
+    utterances = []
+    for i in range(0, len(audio), step):
+        utterances.extend(vad.feed(audio[i:i + step]))
+    return utterances + vad.flush()
+
+
+class _FakeClient:
+    def chat_stream(self, payload):
+        yield "译:"
+        yield payload['text']
+
+
+class _SlowClient:
+    def chat_stream(self, payload):
+        yield "译:"
+        time.sleep(0.2)
+        yield payload['text']
+
+
+class TestEnergyVAD(unittest.TestCase):
+    def test_segments_utterances(self):
+        utterances = feed_all(EnergyVAD(RATE), speech_like())
+        self.assertEqual(len(utterances), 2)
+        first, second = utterances
+        self.assertAlmostEqual(first.start_s, 0.3, delta=0.05)   # 含 200 ms 预留
+        self.assertAlmostEqual(first.end_s, 2.0, delta=0.05)     # 含 500 ms 尾音
+        self.assertAlmostEqual(second.start_s, 2.1, delta=0.05)
+        self.assertEqual(len(first.audio), int(round((first.end_s - first.start_s) * RATE)))
+
+    def test_ignores_noise_and_clicks(self):
+        audio = np.concatenate([silence(1.0, amplitude=0.005), tone(0.06), silence(1.0, amplitude=0.005)])
+        self.assertEqual(feed_all(EnergyVAD(RATE), audio), [])
+
+    def test_chunk_size_does_not_change_result(self):
+        small = feed_all(EnergyVAD(RATE), speech_like(), chunk_ms=30)
+        large = feed_all(EnergyVAD(RATE), speech_like(), chunk_ms=1000)
+        self.assertEqual([(u.start_s, u.end_s) for u in small], [(u.start_s, u.end_s) for u in large])
+
+    def test_split_sentences(self):
+        self.assertEqual(split_sentences("Hello there. It costs 3.5 dollars"), ["Hello there.", "It costs 3.5 dollars"])
+        self.assertEqual(split_sentences("你好！今天天气不错。我们走吧"), ["你好！", "今天天气不错。", "我们走吧"])
+
+
+class TestSpeechPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.wav')
+        os.close(handle)
+        write_wav(self.path, speech_like())
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _run(self, speed):
+        recognizer = ScriptedRecognizer(["Hello there. How are you?", "Good bye"])
+        pipeline = SpeechPipeline(WavFileSource(self.path, speed=speed), recognizer, _FakeClient(),
+                                  lambda text: {'text': text})
+        translated, stopped = [], []
+        pipeline.translated.connect(lambda s: translated.append((s.index, s.translation, time.perf_counter())))
+        pipeline.stopped.connect(lambda: stopped.append(True))
+        pipeline.start()
+        wait_until(self._app, lambda: stopped and len(translated) == 3, timeout=10)
+        pipeline.wait(1)
+        return pipeline, translated
+
+    def test_translates_each_sentence(self):
+        pipeline, translated = self._run(speed=0)
+        self.assertEqual(sorted((i, t) for i, t, _ in translated),
+                         [(0, "译:Hello there."), (1, "译:How are you?"), (2, "译:Good bye")])
+        self.assertEqual(pipeline.latency_report()['count'], 3)
+
+    def test_translation_runs_while_audio_continues(self):
+        # 2 倍速播放约 1.9 秒：第一段在 1 秒左右切出，其译文应在音频读完之前就已完成
+        pipeline, translated = self._run(speed=2)
+        first_done = min(at for i, _, at in translated if i == 0)
+        self.assertLess(first_done, pipeline.capture_finished_at)
+        first = pipeline.sentences[0]
+        self.assertGreater(first.first_chunk_ms, 0)
+
+    def test_cancel_drops_translations_and_pipeline_is_released(self):
+        recognizer = ScriptedRecognizer(["Hello there. How are you?", "Good bye"])
+        pipeline = SpeechPipeline(WavFileSource(self.path, speed=0), recognizer, _SlowClient(),
+                                  lambda text: {'text': text})
+        translated, stopped, destroyed = [], [], []
+        pipeline.translated.connect(translated.append)
+        pipeline.translation_chunk.connect(lambda _s, _piece: pipeline.cancel())
+        pipeline.stopped.connect(lambda: stopped.append(True))
+        pipeline.stopped.connect(pipeline.delete_when_idle)
+        pipeline.destroyed.connect(lambda: destroyed.append(True))
+        pipeline.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not destroyed:
+            self._app.processEvents()
+            QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+            time.sleep(0.005)
+        self.assertTrue(stopped)
+        self.assertTrue(destroyed)
+        self.assertEqual(translated, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
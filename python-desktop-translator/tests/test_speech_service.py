@@ -0,0 +1,156 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.speech_service import AudioCache, AudioClip, SpeechService, ToneEngine, wav_duration
+
+
+class _SlowEngine(ToneEngine):
+    """每句合成耗时 delay_s，用于检验预合成能否消除句间停顿。"""
+
+    def __init__(self, delay_s=0.08):
+        super().__init__(ms_per_char=10)
+        self.delay_s = delay_s
+        self.calls = []
+
+    def synthesize(self, text, language, voice=""):
+        self.calls.append((text, language, voice))
+        time.sleep(self.delay_s)
+        return super().synthesize(text, language, voice)
+
+
+class _RecordingOutput:
+    """按片段时长「播放」（sleep），记录播放内容。"""
+
+    def __init__(self):
+        self.played = []
+        self.interrupted = []
+        self._stop = threading.Event()
+
+    def play(self, clip):
+        self.played.append(clip)
+        self.interrupted.append(self._stop.wait(wav_duration(clip)))
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        self._stop.clear()
+
+
+class _DecodingOutput(_RecordingOutput):
+    """只能播放 WAV：记录 prepare() 所在线程，模拟 MP3 解码。"""
+
+    def __init__(self):
+        super().__init__()
+        self.prepare_threads = []
+
+    def prepare(self, clip):
+        self.prepare_threads.append(threading.current_thread().name)
+        return AudioClip(clip.data, 'wav')
+
+    def play(self, clip):
+        assert clip.format == 'wav'
+        super().play(clip)
+
+
+class _Mp3Engine(ToneEngine):
+    def synthesize(self, text, language, voice=""):
+        return AudioClip(super().synthesize(text, language, voice).data, 'mp3')
+
+
+TEXT = "First sentence here. Second sentence here. Third sentence here. Fourth sentence here."
+
+
+class TestSpeechService(unittest.TestCase):
+    def setUp(self):
+        self.engine = _SlowEngine()
+        self.output = _RecordingOutput()
+        self.speech = SpeechService('en', engine=self.engine, output=self.output)
+
+    def tearDown(self):
+        self.speech.close()
+
+    def test_speak_returns_immediately_and_plays_in_order(self):
+        started = time.perf_counter()
+        self.speech.speak(TEXT)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertTrue(self.speech.wait(5))
+        self.assertEqual([text for text, _, _ in self.engine.calls],
+                         ["First sentence here.", "Second sentence here.", "Third sentence here.", "Fourth sentence here."])
+        self.assertEqual(len(self.output.played), 4)
+
+    def test_next_sentence_is_presynthesized(self):
+        # 每句合成 80 ms、播放约 200 ms：预合成时句间停顿应远小于合成耗时
+        self.speech.speak(TEXT)
+        self.assertTrue(self.speech.wait(5))
+        self.assertEqual(len(self.speech.gaps_ms), 3)
+        self.assertLess(max(self.speech.gaps_ms), 40)
+
+    def test_repeated_text_uses_cache(self):
+        self.speech.speak("Hello there.")
+        self.assertTrue(self.speech.wait(5))
+        self.speech.speak("Hello there.")
+        self.assertTrue(self.speech.wait(5))
+        self.assertEqual(len(self.engine.calls), 1)
+        self.assertEqual(len(self.output.played), 2)
+        self.speech.set_language('vi')
+        self.speech.synthesize("Hello there.")
+        self.assertEqual(len(self.engine.calls), 2)
+
+    def test_stop_discards_remaining_sentences(self):
+        self.speech.speak(TEXT)
+        time.sleep(0.15)
+        self.speech.stop()
+        self.assertTrue(self.speech.wait(0))
+        time.sleep(0.4)
+        self.assertLessEqual(len(self.output.played), 1)
+
+    def test_speak_interrupts_current_sentence(self):
+        self.speech.speak(TEXT)
+        time.sleep(0.15)
+        self.speech.speak("Hi.")
+        self.assertTrue(self.speech.wait(5))
+        self.assertTrue(self.output.interrupted[0])
+        self.assertFalse(self.output.interrupted[-1])
+        self.assertEqual(len(self.output.played), 2)
+
+    def test_clip_is_decoded_on_synth_thread_and_cached(self):
+        output = _DecodingOutput()
+        speech = SpeechService('en', engine=_Mp3Engine(ms_per_char=5), output=output)
+        try:
+            speech.speak("Hello there. Hello there.")
+            self.assertTrue(speech.wait(5))
+            speech.speak("Hello there.")
+            self.assertTrue(speech.wait(5))
+        finally:
+            speech.close()
+        # 解码只在合成线程进行一次，缓存的是解码后的片段，播放线程只写入音频帧
+        self.assertEqual(output.prepare_threads, ["TTSSynth"])
+        self.assertEqual(len(output.played), 3)
+        self.assertTrue(all(clip.format == 'wav' for clip in output.played))
+
+
+class TestAudioCache(unittest.TestCase):
+    def test_evicts_least_recently_used_by_size(self):
+        cache = AudioCache(max_bytes=10)
+        cache.put(('a', 'en', ''), AudioClip(b'x' * 4, 'wav'))
+        cache.put(('b', 'en', ''), AudioClip(b'x' * 4, 'wav'))
+        cache.get(('a', 'en', ''))
+        cache.put(('c', 'en', ''), AudioClip(b'x' * 4, 'wav'))
+        self.assertIsNone(cache.get(('b', 'en', '')))
+        self.assertIsNotNone(cache.get(('a', 'en', '')))
+        self.assertEqual(cache.size, 8)
+        cache.put(('huge', 'en', ''), AudioClip(b'x' * 11, 'wav'))
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(BASE_DIR, 'src')
+
+# 从空进程经 Bootstrap 启动到悬浮窗完成首次绘制的预算（秒）。
+# 本机实测约 0.18–0.26 秒，预算只留出约两倍余量，启动路径变慢时能及时发现
+VISIBLE_BUDGET_S = 0.6
+
+_PROBE = r'''
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, SRC_DIR)
+from PyQt5.QtWidgets import QApplication
+from core.bootstrap import Bootstrap
+t_import = time.perf_counter()
+app = QApplication([])
+bootstrap = Bootstrap()
+bootstrap.run()
+app.processEvents()
+t_visible = time.perf_counter()
+lazy = ['numpy', 'PyQt5.QtWebEngineWidgets', 'services.kb_index', 'services.answer_cache',
+        'ui.bubbles.ai_qa', 'ui.bubbles.internal_kb', 'ui.bubbles.ai_translate',
+        'ui.bubbles.text_polish', 'ui.bubbles.speech_translate', 'ui.bubbles.settings']
+print(json.dumps({
+    'import_s': t_import - t0,
+    'visible_s': t_visible - t0,
+    'window_visible': bootstrap.window.isVisible(),
+    'loaded': [m for m in lazy if m in sys.modules],
+}))
+'''
+
+
+class TestStartupImports(unittest.TestCase):
+    def _probe(self):
+        with tempfile.TemporaryDirectory() as appdata:
+            env = dict(os.environ, QT_QPA_PLATFORM='offscreen', APPDATA=appdata)
+            proc = subprocess.run(
+                [sys.executable, '-c', f'SRC_DIR = {SRC_DIR!r}\n' + _PROBE],
+                capture_output=True, text=True, env=env, timeout=120,
+            )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def test_floating_window_visible_without_bubbles_or_numpy(self):
+        result = self._probe()
+        self.assertTrue(result['window_visible'], result)
+        # numpy（知识库索引、问答缓存）、气泡模块与 QtWebEngine 仅在首次使用或后台预热时导入
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['visible_s'], VISIBLE_BUDGET_S, result)
+
+    def test_spawned_worker_reimport_of_main_is_quiet(self):
+        # spawn 子进程以 __mp_main__ 名义重新导入 main.py：不应打印诊断信息或加载 PyQt5/业务模块
+        probe = ('import runpy, sys\n'
+                 f'sys.path.insert(0, {SRC_DIR!r})\n'
+                 f'runpy.run_path({os.path.join(SRC_DIR, "main.py")!r}, run_name="__mp_main__")\n'
+                 'print(sorted(m for m in ("PyQt5", "core.bootstrap", "numpy") if m in sys.modules))\n')
+        proc = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, timeout=60)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), '[]')
+        self.assertEqual(proc.stderr, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
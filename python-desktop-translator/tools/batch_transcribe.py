@@ -0,0 +1,68 @@
+"""批量转写并翻译会议录音，输出带时间戳的双语字幕。
+
+用法：
+    python tools/batch_transcribe.py <音频文件或目录>... [--out 输出目录] [--workers N]
+                                     [--language zh-CN] [--target en] [--no-translate]
+                                     [--formats srt,jsonl]
+
+目录下的音频文件（.wav/.mp3/.m4a 等，不递归）逐个处理；每个文件生成同名的 .srt / .jsonl。
+WAV 直接内存映射读取，其它格式需要 ffmpeg。识别使用 SpeechRecognition，翻译使用应用配置中的 AI 服务器。
+"""
+
+import argparse
+import functools
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from config.app_config import AppConfig
+from services.batch_transcribe import BatchTranscriber, collect_audio_files
+from services.speech_pipeline import SpeechRecognitionBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量转写并翻译音频")
+    parser.add_argument("inputs", nargs="+", help="音频文件或目录")
+    parser.add_argument("--out", dest="out_dir", default=None, help="字幕输出目录（默认与音频同目录）")
+    parser.add_argument("--workers", type=int, default=None, help="识别进程数（默认 CPU 核数，0 表示不用子进程）")
+    parser.add_argument("--language", default=None, help="识别语言（默认取配置 speech_recognition_language）")
+    parser.add_argument("--target", default=None, help="翻译目标语言 zh|en|vi（默认取配置 target_language）")
+    parser.add_argument("--no-translate", action="store_true", help="只转写不翻译")
+    parser.add_argument("--formats", default="srt,jsonl", help="输出格式，逗号分隔：srt,jsonl")
+    args = parser.parse_args()
+
+    config = AppConfig()
+    translation_service = None
+    if not args.no_translate:
+        from services.ai_client import AIClient
+        from services.translation_service import TranslationService
+        translation_service = TranslationService(AIClient(config.ai_server, config.api_key), config)
+
+    language = args.language or config.speech_recognition_language
+    transcriber = BatchTranscriber(
+        functools.partial(SpeechRecognitionBackend, language),
+        translation_service,
+        target_language=args.target or config.target_language,
+        workers=args.workers,
+    )
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    files = collect_audio_files(args.inputs)
+    if not files:
+        print("[BatchTranscribe] 没有找到音频文件")
+        return
+    for path in files:
+        stats = transcriber.run(path, args.out_dir, formats)
+        speed = stats['audio_s'] / stats['elapsed_s'] if stats['elapsed_s'] else 0
+        rss = f"{stats['rss_mb']:.0f} MB" if stats['rss_mb'] is not None else "未知"
+        print(f"[BatchTranscribe] {os.path.basename(path)}: {stats['segments']} 段，音频 {stats['audio_s']}s，"
+              f"用时 {stats['elapsed_s']}s（{speed:.1f}x 实时），内存 {rss}")
+        for output in stats['outputs']:
+            print(f"    -> {output}")
+
+
+if __name__ == "__main__":
+    main()
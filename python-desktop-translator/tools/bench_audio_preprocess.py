@@ -0,0 +1,110 @@
+"""音频预处理基准：1 小时 44.1 kHz 立体声 WAV -> 16 kHz 单声道、响度归一化到 -20 dBFS。
+
+对比 utils.audio 的流式 NumPy 实现与 pydub（整段读入 AudioSegment）的耗时与峰值常驻内存。
+每种实现在独立子进程中运行，峰值内存互不影响；未安装 pydub 时只测 NumPy 实现。
+
+用法：
+    python tools/bench_audio_preprocess.py [--minutes 60] [--keep 文件路径]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+RATE = 44100
+
+
+def _make_wav(path: str, minutes: int):
+    """合成「说话 + 停顿」交替的立体声音频，按 10 秒一块写入，不占用大量内存。"""
+    rng = np.random.default_rng(0)
+    t = np.arange(10 * RATE) / RATE
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        for _ in range(minutes * 6):
+            envelope = (np.sin(2 * np.pi * 0.3 * t) > 0).astype(np.float32)
+            voice = 0.1 * envelope * np.sin(2 * np.pi * rng.uniform(150, 300) * t)
+            noise = 0.003 * rng.standard_normal(len(t))
+            left = ((voice + noise) * 32767).astype(np.int16)
+            right = ((0.8 * voice + noise) * 32767).astype(np.int16)
+            wav.writeframes(np.column_stack([left, right]).tobytes())
+
+
+def _run_numpy(src: str, dst: str):
+    from utils.audio import preprocess_wav
+    preprocess_wav(src, dst, sample_rate=16000, target_dbfs=-20.0)
+
+
+def _run_pydub(src: str, dst: str):
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(src)
+    segment = segment.set_channels(1).set_frame_rate(16000)
+    segment = segment.apply_gain(-20.0 - segment.dBFS)
+    segment.export(dst, format='wav')
+
+
+def _child(impl: str, src: str, dst: str):
+    start = time.perf_counter()
+    {'numpy': _run_numpy, 'pydub': _run_pydub}[impl](src, dst)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux 下单位为 KB
+    print(json.dumps({'elapsed_s': elapsed, 'peak_rss_mb': peak}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--keep", default=None, help="复用/保留的测试 WAV 路径（默认使用临时文件）")
+    parser.add_argument("--child", nargs=3, metavar=("IMPL", "SRC", "DST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_audio_")
+    try:
+        src = args.keep or os.path.join(workdir, "meeting.wav")
+        if not os.path.exists(src):
+            t0 = time.perf_counter()
+            _make_wav(src, args.minutes)
+            print(f"generated {args.minutes} min stereo WAV ({os.path.getsize(src) / 2**20:.0f} MB) "
+                  f"in {time.perf_counter() - t0:.1f}s")
+
+        from utils.audio import probe
+        t0 = time.perf_counter()
+        info = probe(src)
+        print(f"probe: {info.duration_s / 60:.1f} min in {(time.perf_counter() - t0) * 1000:.2f} ms (header only)")
+
+        if importlib.util.find_spec("pydub") is not None:
+            impls = ['numpy', 'pydub']
+        else:
+            impls = ['numpy']
+            print("pydub not installed: skipping the pydub baseline")
+        for impl in impls:
+            dst = os.path.join(workdir, f"out_{impl}.wav")
+            result = subprocess.run([sys.executable, __file__, "--child", impl, src, dst],
+                                    stdout=subprocess.PIPE, text=True, check=True)
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{impl:6s}: {stats['elapsed_s']:.1f}s  peak RSS {stats['peak_rss_mb']:.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""悬浮窗动画基准：每动画秒的绘制 CPU 毫秒数（frame_stats 统计）。
+
+legacy：旧实现，波纹每帧 update() 整个窗口
+region：FloatingWindow 当前实现，只重绘新旧圆环覆盖的区域
+bubbles：show_bubbles + retract_bubbles 一轮（单个动画组驱动）
+
+用法：
+    QT_QPA_PLATFORM=offscreen python tools/bench_floating_animation.py [--rounds 5] [--size 80]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('XIAOKAI_FRAME_STATS', '1')
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from PyQt5.QtWidgets import QApplication
+
+from config.app_config import AppConfig
+from services.ai_client import AIClient
+from ui.floating_window import FloatingWindow
+from ui.frame_budget import frame_stats
+
+
+def _legacy_ripple(window: FloatingWindow):
+    def _on_value(value):
+        window.ripple_radius = value
+        window.update()
+    window.ripple_animation.valueChanged.disconnect()
+    window.ripple_animation.valueChanged.connect(_on_value)
+
+
+def _spin(app, seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def _bench_ripple(app, window: FloatingWindow, rounds: int) -> dict:
+    frame_stats.reset()
+    window.is_hovered = True
+    for _ in range(rounds):
+        window.ripple_animation.start()
+        _spin(app, window.ripple_animation.duration() / 1000 + 0.05)
+    return frame_stats.report().get('floating', {})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--size", type=int, default=80)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    config = AppConfig()
+    window = FloatingWindow(config, AIClient(config.ai_server, config.api_key), None)
+    window.resize(args.size, args.size)
+    window.move(400, 400)
+    window.show()
+    app.processEvents()
+
+    region = _bench_ripple(app, window, args.rounds)
+    _legacy_ripple(window)
+    legacy = _bench_ripple(app, window, args.rounds)
+    for name, stats in (("legacy", legacy), ("region", region)):
+        print(f"{name:>8}: {stats.get('cpu_ms_per_anim_s', 0):8.2f} ms CPU per animation second "
+              f"({stats.get('frames', 0)} frames)")
+
+    frame_stats.reset()
+    for _ in range(args.rounds):
+        window.show_bubbles()
+        _spin(app, 1.0)
+        window.retract_bubbles()
+        _spin(app, 0.4)
+    stats = frame_stats.report().get('bubbles', {})
+    print(f"{'bubbles':>8}: {stats.get('cpu_ms_per_anim_s', 0):8.2f} ms CPU per animation second "
+          f"({stats.get('frames', 0)} frames)")
+    window.hide()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""流式渲染基准：对比每次刷新的耗时随回答长度的变化。
+
+legacy  ：旧实现，每次刷新 setPlainText(全文)
+incremental：ChatMessageWidget 当前实现（只追加新文本，闭合块渲染为 Markdown）
+
+用法：
+    QT_QPA_PLATFORM=offscreen python tools/bench_streaming_render.py [--chars 20000] [--chunk 40]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from PyQt5.QtWidgets import QApplication
+
+from ui.bubbles.message_widget import ChatMessageWidget
+
+_PARAGRAPH = (
+    "The service retries **transient** errors with exponential backoff and logs each attempt. "
+    "Configuration lives in `config.json` and is reloaded on change.\n\n"
+)
+_CODE = "```python\nfor i in range(3):\n    print(i)\n```\n\n"
+_LIST = "- first item\n- second item\n- third item\n\n"
+
+
+def _make_answer(chars: int) -> str:
+    parts, size, i = [], 0, 0
+    blocks = (_PARAGRAPH, _PARAGRAPH, _LIST, _CODE)
+    while size < chars:
+        block = blocks[i % len(blocks)]
+        parts.append(block)
+        size += len(block)
+        i += 1
+    return "".join(parts)[:chars]
+
+
+def _run(answer: str, chunk: int, legacy: bool):
+    widget = ChatMessageWidget('ai', '', 500, 'QTextBrowser{}', 'QTextBrowser{}')
+    widget.start_streaming()
+    samples = []  # (当前长度, 本次刷新耗时 ms)
+    for pos in range(0, len(answer), chunk):
+        piece = answer[pos:pos + chunk]
+        t = time.perf_counter()
+        if legacy:
+            widget.raw_text += piece
+            widget.content.setPlainText(widget.raw_text)
+            widget._adjust_height()
+        else:
+            widget.stream_text(piece)
+            widget._flush_stream_buffer()
+        samples.append((pos + len(piece), (time.perf_counter() - t) * 1000))
+    t = time.perf_counter()
+    if legacy:
+        widget.is_streaming = False
+        widget.stream_timer.stop()
+        widget.set_markdown(widget.raw_text)
+    else:
+        widget.end_streaming()
+    end_ms = (time.perf_counter() - t) * 1000
+    widget.deleteLater()
+    return samples, end_ms
+
+
+def _bucket_report(samples, chars: int):
+    edges = [chars // 4, chars // 2, chars * 3 // 4, chars]
+    rows, lo = [], 0
+    for hi in edges:
+        bucket = sorted(ms for n, ms in samples if lo < n <= hi)
+        if bucket:
+            rows.append((hi, sum(bucket) / len(bucket), bucket[-1]))
+        lo = hi
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chars", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=40)
+    args = parser.parse_args()
+
+    QApplication.instance() or QApplication([])
+    answer = _make_answer(args.chars)
+    for name, legacy in (("legacy", True), ("incremental", False)):
+        samples, end_ms = _run(answer, args.chunk, legacy)
+        total = sum(ms for _, ms in samples)
+        print(f"{name}: {len(samples)} flushes, total {total:.0f} ms, end_streaming {end_ms:.1f} ms")
+        for upto, mean, worst in _bucket_report(samples, args.chars):
+            print(f"  up to {upto:>6} chars: mean {mean:6.2f} ms  max {worst:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""主题切换基准：500 条消息在浅色/深色之间切换的耗时。
+
+legacy    ：旧实现，每条消息重设样式表 + 重新 set_markdown + 从磁盘加载并缩放头像
+style-only：ChatMessageWidget.apply_theme 当前实现（只替换样式表）
+history   ：ChatHistoryArea.apply_theme（虚拟化后只处理已创建组件的消息）
+
+用法：
+    QT_QPA_PLATFORM=offscreen python tools/bench_theme_toggle.py [--messages 500] [--rounds 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtWidgets import QApplication
+
+from ui.bubbles.chat_history_area import ChatHistoryArea
+from ui.bubbles.message_widget import ChatMessageWidget, _bubble_style
+from ui.theme_manager import ThemeManager, theme_manager
+
+_ANSWER = (
+    "The service retries **transient** errors and logs each attempt.\n\n"
+    "- first item\n- second item\n\n"
+    "```python\nfor i in range(3):\n    print(i)\n```\n"
+)
+_ICON = os.path.join(SRC, 'icons', 'Conduct.png')
+
+
+def _legacy_apply_theme(widget: ChatMessageWidget, user_style: str, ai_style: str):
+    widget.content.setStyleSheet(_bubble_style(user_style if widget.role == 'user' else ai_style))
+    widget._invalidate_height()
+    widget.set_markdown(widget.raw_text)
+    if widget.role == 'ai':
+        pix = QtGui.QPixmap(_ICON)
+        if not pix.isNull():
+            widget.role_label.setPixmap(pix.scaled(28, 28, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
+
+
+def _styles(i: int):
+    styles = ThemeManager.DARK_STYLES if i % 2 == 0 else ThemeManager.LIGHT_STYLES
+    return styles['message_user'], styles['message_ai']
+
+
+def _bench_widgets(widgets, rounds: int, legacy: bool) -> float:
+    t = time.perf_counter()
+    for i in range(rounds):
+        user_style, ai_style = _styles(i)
+        for w in widgets:
+            if legacy:
+                _legacy_apply_theme(w, user_style, ai_style)
+            else:
+                w.apply_theme(user_style, ai_style)
+    return (time.perf_counter() - t) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    user_style, ai_style = ThemeManager.LIGHT_STYLES['message_user'], ThemeManager.LIGHT_STYLES['message_ai']
+    items = [('user' if i % 2 else 'ai', f'Message {i}\n\n{_ANSWER}') for i in range(args.messages)]
+
+    widgets = [ChatMessageWidget(role, text, 500, user_style, ai_style) for role, text in items]
+    for name, legacy in (("legacy", True), ("style-only", False)):
+        ms = _bench_widgets(widgets, args.rounds, legacy)
+        print(f"{name:>10}: {ms:8.1f} ms per toggle of {len(widgets)} widgets")
+
+    area = ChatHistoryArea()
+    area.resize(600, 700)
+    area.show()
+    area.add_messages(items, user_style, ai_style)
+    app.processEvents()
+    t = time.perf_counter()
+    for _ in range(args.rounds):
+        theme_manager.toggle_theme()
+        area.apply_theme()
+        app.processEvents()
+    ms = (time.perf_counter() - t) * 1000 / args.rounds
+    print(f"{'history':>10}: {ms:8.1f} ms per toggle ({len(area.get_messages())} of {area.message_count()} realized)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""离线构建/增量更新内部知识库检索索引。
+
+用法：
+    python tools/build_kb_index.py <导出目录> [--index 索引目录] [--compact]
+
+导出目录下的 .html/.htm/.md/.markdown/.txt 文件会被切段并写入 BM25 倒排索引；
+未变化的文件自动跳过，目录中已删除的文件会从索引中移除。
+索引目录默认与应用配置同级（AppConfig.kb_index_dir），应用启动时自动加载。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from services.kb_index import KnowledgeBaseIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建内部知识库 BM25 索引")
+    parser.add_argument("export_dir", help="知识库导出文档所在目录")
+    parser.add_argument("--index", dest="index_dir", default=None, help="索引目录（默认使用应用配置目录）")
+    parser.add_argument("--compact", action="store_true", help="导入后强制合并所有段")
+    args = parser.parse_args()
+
+    index_dir = args.index_dir
+    if index_dir is None:
+        from config.app_config import AppConfig
+        index_dir = AppConfig().kb_index_dir
+
+    start = time.perf_counter()
+    index = KnowledgeBaseIndex(index_dir)
+    stats = index.ingest_directory(args.export_dir)
+    if args.compact:
+        index.compact()
+    print(f"[KB] 索引目录: {index_dir}")
+    print(f"[KB] 新增 {stats['added']} / 更新 {stats['updated']} / 未变 {stats['unchanged']} / 删除 {stats['removed']} 个文档")
+    print(f"[KB] 写入 {stats['passages']} 个段落，当前共 {index.passage_count} 个段落，用时 {time.perf_counter() - start:.1f}s")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()